@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+音频资源清单 - 用一次 os.scandir 遍历记录音频目录下每个文件的大小、修改时间
+和 WAV 头部给出的时长，播放时查清单代替逐次 Path.exists()；
+清单保存在磁盘上，重新扫描时大小和修改时间没变的文件沿用上次解析的时长
+
+直接运行可列出音频库中 duration_ms 与实际时长不符的条目：
+    python asset_manifest.py [Assets目录] [--tolerance 毫秒]
+"""
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+AUDIO_EXTENSIONS = ('.wav',)
+MANIFEST_VERSION = 1
+# 分类 -> 音频子目录（Assets/Audio 下）
+CATEGORY_FOLDERS = {
+    "Idle": "Index",
+    "DoubleClick": "Index",
+    "System": "Index",
+    "TimeAnnounce": "TimeAnnounce",
+}
+# 时长差多少毫秒以上算不符
+DEFAULT_TOLERANCE_MS = 100
+
+
+class AssetInfo:
+    """清单中的一个音频文件"""
+    __slots__ = ('size', 'mtime_ns', 'duration_ms')
+
+    def __init__(self, size: int, mtime_ns: int, duration_ms: Optional[int]):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.duration_ms = duration_ms  # 无法从头部解析时为 None
+
+    def __repr__(self):
+        return f"AssetInfo(size={self.size}, duration_ms={self.duration_ms})"
+
+
+def read_wav_duration(path: str, file_size: Optional[int] = None) -> Optional[int]:
+    """只读取 RIFF/WAVE 头部计算时长（毫秒），不解码音频数据；格式不符时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return None
+            if file_size is None:
+                file_size = os.fstat(f.fileno()).st_size
+            byte_rate = 0
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+                if chunk_id == b'fmt ':
+                    fmt = f.read(min(chunk_size, 16))
+                    if len(fmt) < 12:
+                        return None
+                    byte_rate = struct.unpack_from('<I', fmt, 8)[0]
+                    f.seek(chunk_size - len(fmt) + (chunk_size & 1), os.SEEK_CUR)
+                elif chunk_id == b'data':
+                    if not byte_rate:
+                        return None
+                    # 流式写入的文件 data 长度可能未回填，以实际文件大小为准
+                    data_size = min(chunk_size, file_size - f.tell())
+                    return data_size * 1000 // byte_rate
+                else:
+                    f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+
+def normalize_name(filename: str) -> str:
+    """统一为 / 分隔；Windows 上文件名不区分大小写"""
+    return os.path.normcase(filename).replace('\\', '/')
+
+
+def relative_key(path, root: str) -> Optional[str]:
+    """path 相对于 root 的统一路径（不在 root 下时为 None）"""
+    relative = os.path.relpath(os.path.normpath(str(path)), root)
+    if relative.startswith('..'):
+        return None
+    return normalize_name(relative)
+
+
+class AssetManifest:
+    """音频目录清单：根目录 -> {相对路径: AssetInfo}"""
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None  # 持久化位置，None 表示只在内存中
+        self._roots: Dict[str, Dict[str, AssetInfo]] = {}
+        self._subdirs: Dict[str, List[str]] = {}  # 根目录 -> 扫描到的所有目录（含自身）
+        self._saved: Dict[str, Dict[str, AssetInfo]] = {}  # 从磁盘读到、尚未重新扫描的根目录
+        self._dirty = False
+
+    def load(self):
+        """读取上次保存的清单（只用于复用 WAV 时长，文件是否存在以扫描结果为准）"""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION:
+                return
+            self._saved = {
+                root: {name: AssetInfo(*values) for name, values in files.items()}
+                for root, files in data.get('roots', {}).items()
+            }
+        except Exception as e:
+            print(f"[AssetManifest] 读取清单失败，已忽略: {e}")
+            self._saved = {}
+
+    def save(self):
+        """有变化时原子写入"""
+        if self.path is None or not self._dirty:
+            return
+        data = {
+            'version': MANIFEST_VERSION,
+            'roots': {
+                root: {name: [info.size, info.mtime_ns, info.duration_ms] for name, info in files.items()}
+                for root, files in self._roots.items()
+            },
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[AssetManifest] 写入清单失败: {e}")
+
+    @staticmethod
+    def _key(directory) -> str:
+        return os.path.normpath(str(directory))
+
+    def scan(self, directory) -> Dict[str, int]:
+        """扫描（或重新扫描）一个根目录及其子目录，返回 {added, removed, changed} 计数"""
+        root = self._key(directory)
+        old = self._roots.get(root)
+        if old is None:
+            old = self._saved.pop(root, {})
+        files: Dict[str, AssetInfo] = {}
+        subdirs = []
+        pending = [(root, "")]
+        while pending:
+            path, prefix = pending.pop()
+            try:
+                it = os.scandir(path)
+            except OSError:
+                continue
+            subdirs.append(path)
+            with it:
+                for item in it:
+                    try:
+                        if item.is_dir():
+                            pending.append((item.path, prefix + item.name + "/"))
+                            continue
+                        if not item.name.lower().endswith(AUDIO_EXTENSIONS):
+                            continue
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    name = normalize_name(prefix + item.name)
+                    previous = old.get(name)
+                    if previous is not None and previous.size == stat.st_size \
+                            and previous.mtime_ns == stat.st_mtime_ns:
+                        files[name] = previous
+                    else:
+                        files[name] = AssetInfo(stat.st_size, stat.st_mtime_ns,
+                                                read_wav_duration(item.path, stat.st_size))
+        self._roots[root] = files
+        self._subdirs[root] = subdirs
+        changes = {
+            'added': sum(1 for name in files if name not in old),
+            'removed': sum(1 for name in old if name not in files),
+            'changed': sum(1 for name, info in files.items() if name in old and old[name] is not info),
+        }
+        if any(changes.values()):
+            self._dirty = True
+        return changes
+
+    def get(self, directory, filename: str) -> Optional[AssetInfo]:
+        files = self._roots.get(self._key(directory))
+        if files is None or not filename:
+            return None
+        return files.get(normalize_name(filename))
+
+    def files(self, directory) -> Dict[str, AssetInfo]:
+        """根目录下的所有文件 {相对路径: AssetInfo}（未扫描时为空）"""
+        return dict(self._roots.get(self._key(directory), {}))
+
+    def has_root(self, directory) -> bool:
+        return self._key(directory) in self._roots
+
+    def exists(self, directory, filename: str) -> bool:
+        return self.get(directory, filename) is not None
+
+    def duration_ms(self, directory, filename: str) -> Optional[int]:
+        """文件头部给出的时长，文件缺失或无法解析时返回 None"""
+        info = self.get(directory, filename)
+        return None if info is None else info.duration_ms
+
+    def root_of(self, path) -> Optional[str]:
+        """path 所在的已扫描根目录"""
+        path = self._key(path)
+        for root, subdirs in self._subdirs.items():
+            if path in subdirs or path == root:
+                return root
+        return None
+
+    def directories(self, directory=None) -> List[str]:
+        """已扫描到的目录（供目录监视器使用）"""
+        if directory is not None:
+            return list(self._subdirs.get(self._key(directory), []))
+        return [d for subdirs in self._subdirs.values() for d in subdirs]
+
+    def __len__(self):
+        return sum(len(files) for files in self._roots.values())
+
+
+def audio_sources(manifest: AssetManifest, audio_dir) -> Dict[str, tuple]:
+    """清单中各分类目录的音频 -> {相对 audio_dir 的路径: (文件路径, AssetInfo)}；各目录须已扫描"""
+    sources = {}
+    for folder in dict.fromkeys(CATEGORY_FOLDERS.values()):
+        root = Path(audio_dir) / folder
+        for name, info in manifest.files(root).items():
+            sources[normalize_name(f"{folder}/{name}")] = (str(root / name), info)
+    return sources
+
+
+def duration_report(assets_dir: str = "Assets", tolerance_ms: int = DEFAULT_TOLERANCE_MS) -> List[tuple]:
+    """对比音频库 JSON 中的 duration_ms 与文件实际时长
+
+    Returns:
+        [(分类, 条目ID, 文件名, JSON时长, 实际时长 or None)]，实际时长为 None 表示文件缺失或无法解析
+    """
+    assets = Path(assets_dir)
+    manifest = AssetManifest()
+    mismatches = []
+    for category, folder in CATEGORY_FOLDERS.items():
+        json_path = assets / "Library" / f"{category.lower()}.json"
+        if not json_path.exists():
+            continue
+        audio_dir = assets / "Audio" / folder
+        if not manifest.has_root(audio_dir):
+            manifest.scan(audio_dir)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get("entries", [])
+        for entry in entries:
+            filename = entry.get("filename", "")
+            declared = entry.get("duration_ms", 2000)
+            actual = manifest.duration_ms(audio_dir, filename)
+            if actual is None or abs(actual - declared) > tolerance_ms:
+                mismatches.append((category, entry.get("id", ""), filename, declared, actual))
+    return mismatches
+
+
+def main(argv: List[str]) -> int:
+    assets_dir = "Assets"
+    tolerance_ms = DEFAULT_TOLERANCE_MS
+    args = iter(argv)
+    for arg in args:
+        if arg == "--tolerance":
+            tolerance_ms = int(next(args, DEFAULT_TOLERANCE_MS))
+        else:
+            assets_dir = arg
+    mismatches = duration_report(assets_dir, tolerance_ms)
+    for category, entry_id, filename, declared, actual in mismatches:
+        actual_text = "文件缺失或无法解析" if actual is None else f"{actual}ms"
+        print(f"{category:<13} {entry_id:<24} {filename:<28} JSON {declared}ms -> 实际 {actual_text}")
+    print(f"共 {len(mismatches)} 个条目的时长与文件不符（容差 {tolerance_ms}ms）")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
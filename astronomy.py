@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+天文计算 - 按城市坐标本地计算日出、日落和晨昏蒙影时间（NOAA 太阳位置近似算法），
+用普通的 Python 循环逐日算出全年（约 30 ms）并按城市缓存到磁盘，无需网络
+"""
+import json
+import math
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+# 各事件对应的太阳天顶角（度）
+ZENITH = {
+    'sun': 90.833,          # 日出/日落（含大气折射和太阳视半径）
+    'civil': 96.0,          # 民用晨昏蒙影
+    'nautical': 102.0,      # 航海晨昏蒙影
+    'astronomical': 108.0,  # 天文晨昏蒙影
+}
+# 表中字段：(上午事件名, 下午事件名, 天顶角键)
+EVENT_NAMES = [
+    ('sunrise', 'sunset', 'sun'),
+    ('civil_dawn', 'civil_dusk', 'civil'),
+    ('nautical_dawn', 'nautical_dusk', 'nautical'),
+    ('astronomical_dawn', 'astronomical_dusk', 'astronomical'),
+]
+
+
+def compute_year_table(lng: float, lat: float, year: int) -> Dict[str, Dict[str, Optional[str]]]:
+    """计算一整年的日出日落表，返回 {"YYYY-MM-DD": {事件名: "HH:MM" 或 None}}
+
+    时间为本机时区；极昼/极夜时对应事件为 None。
+    """
+    days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    lat_rad = math.radians(lat)
+    cos_zeniths = {key: math.cos(math.radians(z)) for key, z in ZENITH.items()}
+    year_start = datetime(year, 1, 1, tzinfo=timezone.utc)
+
+    # 先逐日算出全年每天正午的均时差和太阳赤纬
+    gammas = [2 * math.pi / days * n for n in range(days)]
+    eqtimes = [229.18 * (0.000075 + 0.001868 * math.cos(g) - 0.032077 * math.sin(g)
+                         - 0.014615 * math.cos(2 * g) - 0.040849 * math.sin(2 * g)) for g in gammas]
+    decls = [0.006918 - 0.399912 * math.cos(g) + 0.070257 * math.sin(g)
+             - 0.006758 * math.cos(2 * g) + 0.000907 * math.sin(2 * g)
+             - 0.002697 * math.cos(3 * g) + 0.00148 * math.sin(3 * g) for g in gammas]
+
+    table = {}
+    for n in range(days):
+        day_start = year_start + timedelta(days=n)
+        cos_lat_decl = math.cos(lat_rad) * math.cos(decls[n])
+        tan_lat_decl = math.tan(lat_rad) * math.tan(decls[n])
+        row = {}
+        for morning, evening, key in EVENT_NAMES:
+            cos_ha = cos_zeniths[key] / cos_lat_decl - tan_lat_decl
+            if not -1 <= cos_ha <= 1:
+                row[morning] = row[evening] = None
+                continue
+            ha_deg = math.degrees(math.acos(cos_ha))
+            # UTC 分钟数（相对当天 0 点）
+            rise_min = 720 - 4 * (lng + ha_deg) - eqtimes[n]
+            set_min = 720 - 4 * (lng - ha_deg) - eqtimes[n]
+            row[morning] = (day_start + timedelta(minutes=rise_min)).astimezone().strftime("%H:%M")
+            row[evening] = (day_start + timedelta(minutes=set_min)).astimezone().strftime("%H:%M")
+        table[day_start.strftime("%Y-%m-%d")] = row
+    return table
+
+
+class AstronomyTable:
+    """按城市坐标缓存的全年天文表"""
+    def __init__(self, cache_dir: str = "cache/astronomy"):
+        self.cache_dir = Path(cache_dir)
+        self._tables: Dict[str, dict] = {}
+
+    def _cache_key(self, lng: float, lat: float, year: int) -> str:
+        # 文件名里带上时区偏移，换时区后重新计算
+        offset = int(datetime.now().astimezone().utcoffset().total_seconds() // 60)
+        return f"{lng:.4f}_{lat:.4f}_{year}_{offset:+d}"
+
+    def _load_year(self, lng: float, lat: float, year: int) -> dict:
+        key = self._cache_key(lng, lat, year)
+        if key in self._tables:
+            return self._tables[key]
+        path = self.cache_dir / f"{key}.json"
+        table = None
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    table = json.load(f)
+            except Exception as e:
+                print(f"[Astronomy] 读取缓存失败，重新计算: {e}")
+        if table is None:
+            table = compute_year_table(lng, lat, year)
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(table, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"[Astronomy] 保存缓存失败: {e}")
+            print(f"[Astronomy] 已计算 {year} 年天文表 ({lng:.4f}, {lat:.4f})")
+        self._tables = {key: table}  # 只保留当前城市/年份
+        return table
+
+    def get_day(self, lng: float, lat: float, day: date) -> Optional[Dict[str, Optional[str]]]:
+        """某一天的日出日落和晨昏蒙影时间"""
+        return self._load_year(lng, lat, day.year).get(day.strftime("%Y-%m-%d"))
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+音频包 - 把 Assets/Audio 下的所有 WAV 解码后打包成一个文件，运行时 mmap 映射，
+播放时直接把映射区域交给 QAudioSink，不再逐个打开、解析、解码小文件
+
+文件结构：
+    文件头   MAGIC(8) + 索引偏移(8) + 索引长度(4)，其余补零到 DATA_OFFSET
+    数据区   各音频的 PCM 数据，按 DATA_ALIGN 对齐
+    索引     JSON：{相对路径: [偏移, 长度, 采样率, 声道数, 采样字节数, 时长ms, 源文件大小, 源文件mtime_ns]}
+
+源文件仍然存在且大小、修改时间与打包时不同（或是包中没有的新文件）时以散文件为准，便于替换语音。
+有 audio_optimize.py 生成的优化版本时打包优化后的音频（索引中仍记录源文件的大小和修改时间）。
+
+构建（源文件和优化结果都没有变化时跳过）：
+    python audio_bank.py [Assets目录] [--force] [--output cache/audio.bank]
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from asset_manifest import CATEGORY_FOLDERS, AssetInfo, AssetManifest, audio_sources, relative_key
+from audio_optimize import DEFAULT_OUTPUT_DIR, OptimizedAudio
+from pcm_cache import PcmClip, decode_wav
+
+MAGIC = b'TFBANK01'
+BANK_VERSION = 1
+HEADER = struct.Struct('<8sQI')
+DATA_OFFSET = 64
+DATA_ALIGN = 16
+
+
+class AudioBank:
+    """只读的 mmap 音频包"""
+    def __init__(self, path: str = "cache/audio.bank", audio_dir: str = "Assets/Audio"):
+        self.path = Path(path)
+        self.audio_dir = os.path.normpath(str(audio_dir))
+        self.version: Optional[int] = None
+        self.clips: Dict[str, list] = {}
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+    def open(self) -> bool:
+        """映射音频包，文件不存在或格式不符时返回 False"""
+        self.close()
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return False
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_offset, index_length = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError("不是音频包文件")
+            index = json.loads(mapped[index_offset:index_offset + index_length].decode('utf-8'))
+            if index.get('version') != BANK_VERSION:
+                raise ValueError(f"版本不符: {index.get('version')}")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[AudioBank] 读取音频包失败，已忽略: {e}")
+            f.close()
+            return False
+        self._file = f
+        self._map = mapped
+        self._view = memoryview(mapped)
+        self.version = index['version']
+        self.clips = index.get('clips', {})
+        return True
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # 仍有正在播放的片段引用映射区，随进程退出释放
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.clips = {}
+
+    def key(self, path) -> Optional[str]:
+        """文件路径 -> 包内路径（不在音频目录下时为 None）"""
+        return relative_key(path, self.audio_dir)
+
+    def _item(self, path) -> Optional[list]:
+        key = self.key(path)
+        return None if key is None else self.clips.get(key)
+
+    def has(self, path) -> bool:
+        return self._item(path) is not None
+
+    def duration_ms(self, path) -> Optional[int]:
+        item = self._item(path)
+        return None if item is None else item[5]
+
+    def clip(self, path, loose: Optional[AssetInfo] = None) -> Optional[PcmClip]:
+        """包中的音频（数据为映射区的切片，不复制）；loose 为同名散文件，与打包时不同则返回 None"""
+        item = self._item(path)
+        if item is None or self._view is None:
+            return None
+        offset, length, sample_rate, channels, sample_width, _duration, size, mtime_ns = item
+        if loose is not None and (loose.size, loose.mtime_ns) != (size, mtime_ns):
+            return None
+        return PcmClip(str(path), self._view[offset:offset + length], sample_rate, channels,
+                       sample_width, mtime_ns / 1e9, size)
+
+    def overridden(self, sources: Dict[str, Tuple[str, AssetInfo]]) -> List[str]:
+        """以散文件为准的包内路径：与打包时不同的文件和包中没有的新文件"""
+        return [key for key, (_path, info) in sources.items()
+                if key not in self.clips or (info.size, info.mtime_ns) != tuple(self.clips[key][6:8])]
+
+    def __len__(self):
+        return len(self.clips)
+
+
+def _read_index(bank_path: Path) -> Optional[dict]:
+    try:
+        with open(bank_path, 'rb') as f:
+            magic, index_offset, index_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                return None
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+    return index if index.get('version') == BANK_VERSION else None
+
+
+def build_bank(assets_dir: str = "Assets", bank_path: str = "cache/audio.bank", force: bool = False,
+               optimized_dir: Optional[str] = DEFAULT_OUTPUT_DIR) -> Optional[dict]:
+    """打包音频；源文件与现有音频包一致时跳过并返回 None，否则返回 {clips, optimized, skipped, bytes}"""
+    audio_dir = Path(assets_dir) / "Audio"
+    bank_path = Path(bank_path)
+    manifest = AssetManifest()
+    for folder in dict.fromkeys(CATEGORY_FOLDERS.values()):
+        manifest.scan(audio_dir / folder)
+    sources = audio_sources(manifest, audio_dir)
+    optimized = OptimizedAudio(optimized_dir, str(audio_dir)) if optimized_dir else None
+    if optimized is not None:
+        optimized.load()
+    inputs = {key: optimized.path_for(path, info) if optimized is not None else None
+              for key, (path, info) in sources.items()}
+    signature = {key: [info.size, info.mtime_ns] + (optimized.files[key]['output'] if inputs[key] else [])
+                 for key, (_path, info) in sources.items()}
+
+    if not force:
+        index = _read_index(bank_path)
+        if index is not None and index.get('sources') == signature:
+            return None
+
+    clips = {}
+    skipped = []
+    bank_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = bank_path.with_name(bank_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * DATA_OFFSET)
+        for key, (path, info) in sorted(sources.items()):
+            if inputs[key] is not None:
+                clip = decode_wav(str(inputs[key]))
+            else:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stat = None
+                clip = decode_wav(path, stat) if stat is not None else None
+                if clip is not None and (stat.st_size, stat.st_mtime_ns) != (info.size, info.mtime_ns):
+                    clip = None
+            if clip is None:
+                # 非 PCM 或扫描后被改动的文件不打包，运行时走散文件
+                skipped.append(key)
+                continue
+            offset = f.tell()
+            f.write(clip.data)
+            f.write(b'\0' * (-f.tell() % DATA_ALIGN))
+            clips[key] = [offset, len(clip.data), clip.sample_rate, clip.channels, clip.sample_width,
+                          clip.duration_ms, info.size, info.mtime_ns]
+        index = {
+            'version': BANK_VERSION,
+            'clips': clips,
+            'sources': signature,
+        }
+        data = json.dumps(index, ensure_ascii=False).encode('utf-8')
+        index_offset = f.tell()
+        f.write(data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, index_offset, len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, bank_path)
+    return {'clips': len(clips), 'optimized': sum(1 for key in clips if inputs[key] is not None),
+            'skipped': skipped, 'bytes': bank_path.stat().st_size}
+
+
+def main(argv: List[str]) -> int:
+    assets_dir = "Assets"
+    bank_path = "cache/audio.bank"
+    force = False
+    args = iter(argv)
+    for arg in args:
+        if arg == "--force":
+            force = True
+        elif arg == "--output":
+            bank_path = next(args, bank_path)
+        else:
+            assets_dir = arg
+    start = time.perf_counter()
+    try:
+        result = build_bank(assets_dir, bank_path, force)
+    except OSError as e:
+        # Windows 上程序运行中映射着音频包时无法替换
+        print(f"写入音频包失败（请先退出程序）: {e}")
+        return 1
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if result is None:
+        print(f"音频文件没有变化，跳过: {bank_path}")
+        return 0
+    for key in result['skipped']:
+        print(f"未打包（非 PCM WAV 或无法读取）: {key}")
+    print(f"已打包 {result['clips']} 个音频（其中 {result['optimized']} 个为优化版本） -> {bank_path} "
+          f"({result['bytes'] / 1048576:.1f} MB, {elapsed_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
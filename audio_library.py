@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+音频条目存储 - 条目字段按列存放在紧凑数组中：数值用 array，重复度高的字符串
+存入共享字符串池、列中只存编号，长文本以 UTF-8 拼接存放；
+AudioEntry 只是指向某一行的轻量视图，按需创建
+"""
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional
+
+# 数值列：字段 -> (array 类型码, 默认值)
+NUMERIC_COLUMNS = {
+    'weight': ('d', 10),
+    'duration_ms': ('i', 2000),
+    'cooldown_minutes': ('d', 0),
+    'hour': ('h', -1),
+    'minute': ('h', -1),
+}
+# 布尔列：字段 -> 标志位
+FLAG_COLUMNS = {
+    'play_once_per_day': 1,
+    'is_error': 2,
+}
+# 几乎每条都不同、且需要作为字典键的字符串列，直接存引用
+UNIQUE_COLUMNS = {
+    'id': "",
+}
+# 几乎每条都不同、只在播放时读取的文本列，UTF-8 拼接存放，读取时解码
+BLOB_COLUMNS = {
+    'text': "",
+}
+# 取值高度重复的字符串列，存字符串池编号
+POOLED_COLUMNS = {
+    'filename': "",
+    'animation': "Talking",
+    'trigger': "",
+    'correction_text': "",
+    'correction_filename': "",
+}
+
+
+class EntryTable:
+    """按列存放的音频条目表"""
+    def __init__(self):
+        self.numbers = {name: array(code) for name, (code, _) in NUMERIC_COLUMNS.items()}
+        self.flags = array('B')
+        self.unique: Dict[str, list] = {name: [] for name in UNIQUE_COLUMNS}
+        self.blobs = {name: bytearray() for name in BLOB_COLUMNS}
+        self.offsets = {name: array('I', [0]) for name in BLOB_COLUMNS}  # 第 i 行为 [offsets[i], offsets[i+1])
+        self.pooled = {name: array('I') for name in POOLED_COLUMNS}
+        self.pool: List[str] = []
+        self._pool_index: Dict[str, int] = {}
+
+    def _intern(self, value) -> int:
+        try:
+            code = self._pool_index.get(value)
+        except TypeError:
+            # 不可哈希的值（格式错误的配置）按字符串保存
+            value = str(value)
+            code = self._pool_index.get(value)
+        if code is None:
+            code = len(self.pool)
+            self.pool.append(value)
+            self._pool_index[value] = code
+        return code
+
+    def append(self, data: dict) -> int:
+        """追加一行，返回行号"""
+        row = len(self.flags)
+        for name, (code, default) in NUMERIC_COLUMNS.items():
+            value = data.get(name, default)
+            try:
+                self.numbers[name].append(float(value) if code == 'd' else int(value))
+            except (TypeError, ValueError, OverflowError):
+                print(f"[AudioLibrary] 字段 {name} 的值无效，使用默认值: {value!r}")
+                self.numbers[name].append(default)
+        flags = 0
+        for name, bit in FLAG_COLUMNS.items():
+            if data.get(name, False):
+                flags |= bit
+        self.flags.append(flags)
+        for name, default in UNIQUE_COLUMNS.items():
+            self.unique[name].append(data.get(name, default))
+        for name, default in BLOB_COLUMNS.items():
+            value = data.get(name, default)
+            self.blobs[name] += (value if isinstance(value, str) else str(value)).encode('utf-8')
+            self.offsets[name].append(len(self.blobs[name]))
+        for name, default in POOLED_COLUMNS.items():
+            self.pooled[name].append(self._intern(data.get(name, default)))
+        return row
+
+    def blob(self, name: str, row: int) -> str:
+        offsets = self.offsets[name]
+        return self.blobs[name][offsets[row]:offsets[row + 1]].decode('utf-8')
+
+    def string(self, name: str, row: int):
+        if name in self.unique:
+            return self.unique[name][row]
+        if name in self.blobs:
+            return self.blob(name, row)
+        return self.pool[self.pooled[name][row]]
+
+    def row_values(self, row: int) -> tuple:
+        """一行所有字段的值（用于比较两张表中的条目是否相同）"""
+        return (tuple(column[row] for column in self.numbers.values()), self.flags[row],
+                tuple(column[row] for column in self.unique.values()),
+                tuple(self.blob(name, row) for name in self.blobs),
+                tuple(self.pool[column[row]] for column in self.pooled.values()))
+
+    def entry(self, row: int) -> 'AudioEntry':
+        return AudioEntry(table=self, row=row)
+
+    def __len__(self):
+        return len(self.flags)
+
+
+def _number_column(name: str) -> property:
+    def fget(self):
+        return self._table.numbers[name][self._row]
+
+    def fset(self, value):
+        self._table.numbers[name][self._row] = value
+    return property(fget, fset)
+
+
+def _flag_column(name: str) -> property:
+    bit = FLAG_COLUMNS[name]
+
+    def fget(self):
+        return bool(self._table.flags[self._row] & bit)
+
+    def fset(self, value):
+        flags = self._table.flags[self._row]
+        self._table.flags[self._row] = (flags | bit) if value else (flags & ~bit)
+    return property(fget, fset)
+
+
+def _unique_column(name: str) -> property:
+    def fget(self):
+        return self._table.unique[name][self._row]
+
+    def fset(self, value):
+        self._table.unique[name][self._row] = value
+    return property(fget, fset)
+
+
+def _blob_column(name: str) -> property:
+    def fget(self):
+        return self._table.blob(name, self._row)
+    # 拼接存放的列不支持原地修改
+    return property(fget)
+
+
+def _pooled_column(name: str) -> property:
+    def fget(self):
+        return self._table.pool[self._table.pooled[name][self._row]]
+
+    def fset(self, value):
+        self._table.pooled[name][self._row] = self._table._intern(value)
+    return property(fget, fset)
+
+
+class AudioEntry:
+    """音频条目（EntryTable 中一行的视图，同一行的视图相等）
+
+    AudioEntry(data) 会单独建一张一行的表，与旧用法兼容。
+    """
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, data: Optional[dict] = None, table: Optional[EntryTable] = None, row: int = -1):
+        if table is None:
+            table = EntryTable()
+            row = table.append(data or {})
+        self._table = table
+        self._row = row
+
+    id = _unique_column('id')
+    text = _blob_column('text')
+    filename = _pooled_column('filename')
+    animation = _pooled_column('animation')
+    trigger = _pooled_column('trigger')
+    correction_text = _pooled_column('correction_text')
+    correction_filename = _pooled_column('correction_filename')
+    weight = _number_column('weight')
+    duration_ms = _number_column('duration_ms')
+    cooldown_minutes = _number_column('cooldown_minutes')
+    hour = _number_column('hour')
+    minute = _number_column('minute')
+    play_once_per_day = _flag_column('play_once_per_day')
+    is_error = _flag_column('is_error')
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def __eq__(self, other):
+        if not isinstance(other, AudioEntry):
+            return NotImplemented
+        return self._table is other._table and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._table), self._row))
+
+    def __repr__(self):
+        return f"AudioEntry(id={self.id!r}, filename={self.filename!r})"
+
+
+class EntryList(Sequence):
+    """条目表的只读序列视图，访问时才创建 AudioEntry"""
+    __slots__ = ('_table',)
+
+    def __init__(self, table: EntryTable):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [AudioEntry(table=self._table, row=row) for row in range(len(self._table))[index]]
+        if index < 0:
+            index += len(self._table)
+        if not 0 <= index < len(self._table):
+            raise IndexError("entry index out of range")
+        return AudioEntry(table=self._table, row=index)
+
+    def __iter__(self) -> Iterator[AudioEntry]:
+        table = self._table
+        for row in range(len(table)):
+            yield AudioEntry(table=table, row=row)
@@ -1,32 +1,30 @@
 """
 音频管理器 - 管理所有音频资源和播放
 """
+import heapq
 import json
 import os
 import random
+import time
+from array import array
 from pathlib import Path
-from typing import Optional, Dict, List, Callable
-from PyQt6.QtCore import QObject, pyqtSignal, QFileSystemWatcher
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-
-
-class AudioEntry:
-    """音频条目"""
-    def __init__(self, data: dict):
-        self.id = data.get("id", "")
-        self.filename = data.get("filename", "")
-        self.text = data.get("text", "")
-        self.weight = data.get("weight", 10)
-        self.animation = data.get("animation", "Talking")
-        self.duration_ms = data.get("duration_ms", 2000)
-        self.trigger = data.get("trigger", "")
-        self.play_once_per_day = data.get("play_once_per_day", False)
-        self.cooldown_minutes = data.get("cooldown_minutes", 0)
-        self.hour = data.get("hour", -1)
-        self.minute = data.get("minute", -1)
-        self.is_error = data.get("is_error", False)
-        self.correction_text = data.get("correction_text", "")
-        self.correction_filename = data.get("correction_filename", "")
+from typing import Optional, Dict, List, Callable, Sequence
+import threading
+from datetime import date
+from functools import partial
+from PyQt6.QtCore import QObject, pyqtSignal, QFileSystemWatcher, QIODevice, QRunnable, QThreadPool, QTimer
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioSink, QAudioFormat, QAudio, QMediaDevices
+
+from audio_library import FLAG_COLUMNS, AudioEntry, EntryList, EntryTable
+from asset_manifest import CATEGORY_FOLDERS, DEFAULT_TOLERANCE_MS, AssetInfo, AssetManifest, audio_sources
+from audio_bank import AudioBank
+from audio_optimize import DEFAULT_OUTPUT_DIR, OptimizedAudio
+from library_cache import LibraryCache, file_digest
+from play_journal import PlayJournal, day_start
+from playback_scheduler import DROPPED, PlaybackScheduler, Priority
+from player_pool import PlayerPool
+from pcm_cache import DEFAULT_BUDGET_BYTES, PcmCache, PcmClip
+from weighted_sampler import WeightedSampler
 
 
 class AudioCategory:
@@ -36,168 +34,339 @@ class AudioCategory:
         self.audio_dir = audio_dir
         self.json_path = json_path
         self.description = ""
-        self.entries: List[AudioEntry] = []
+        self.entries: Sequence[AudioEntry] = []
         self.error_rate = 0
         self.correction_delay_ms = 1500
         self._last_played: Dict[str, float] = {}  # 记录上次播放时间
         self._played_today: set = set()  # 今天已播放的一次性条目
         self._recent_played: list = []  # 最近播放的条目ID列表
+        self._recent_set: set = set()  # 同上，用于 O(1) 判断
         self._recent_limit: int = 5  # 最近播放记录上限
         self._no_repeat_duration: int = 300  # 防重复时间（秒，默认5分钟）
+        # 列式条目表，索引中只存行号（load() 时重建）
+        self._table = EntryTable()
+        self._by_id: Dict[str, int] = {}
+        self._duplicate_ids: Dict[str, List[int]] = {}  # 出现多次的 id -> 所有行号
+        self._by_trigger: Dict[str, array] = {}  # 条目的trigger原值 -> 行号
+        self._trigger_matches: Dict[str, Sequence[int]] = {}  # 查询trigger -> 子串匹配的行号（按需缓存）
+        self._time_table: Dict[tuple, List[int]] = {}  # (时, 分, is_error, 错误槽位) -> 行号
+        # 加权抽样器：None 为全部条目，其余为 trigger 查询（按需创建，状态变化时增量更新）
+        self._samplers: Dict[Optional[str], WeightedSampler] = {}
+        self._cooldown_heap: list = []  # (冷却结束时间戳, 条目ID)
+        self._max_cooldown: Dict[str, float] = {}  # 有冷却的条目ID -> 冷却分钟数（同 id 取最大）
+        self._manifest: Optional[AssetManifest] = None
+        self._bank: Optional[AudioBank] = None
+        self._missing_rows: set = set()  # 音频文件缺失、不参与抽样的行号
+        self._now = 0.0  # 本次抽样/更新使用的当前时间
+        self.play_listener: Optional[Callable[[str, float], None]] = None  # 播放记录回调 (条目ID, 时间戳)
 
-    def load(self):
-        """加载JSON配置"""
+    def load(self, cache: Optional[LibraryCache] = None) -> bool:
+        """加载JSON配置；提供 cache 时源文件未变化则直接使用编译结果，返回是否命中缓存"""
         if not os.path.exists(self.json_path):
-            return
+            return False
         
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        compiled = cache.lookup(self.json_path) if cache is not None else None
+        if compiled is not None:
+            self._apply_compiled(compiled)
+            return True
+        
+        with open(self.json_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
         
         self.description = data.get("description", "")
         self.error_rate = data.get("error_rate", 0)
         self.correction_delay_ms = data.get("correction_delay_ms", 1500)
         
-        self.entries = []
+        table = EntryTable()
         for entry_data in data.get("entries", []):
-            self.entries.append(AudioEntry(entry_data))
+            table.append(entry_data)
+        self._table = table
+        self.entries = EntryList(table)
+        self._build_index()
+        if cache is not None:
+            cache.store(self.json_path, stat, file_digest(raw), self._compiled())
+        return False
 
-    def get_random_entry(self) -> Optional[AudioEntry]:
-        """根据权重随机获取条目"""
-        if not self.entries:
-            return None
-        
-        # 过滤掉在冷却中的条目
-        import time
-        now = time.time()
-        available_entries = []
-        weights = []
-        
-        for entry in self.entries:
-            # 检查是否是一次性且已播放
-            if entry.play_once_per_day and entry.id in self._played_today:
+    def reload(self, cache: Optional[LibraryCache] = None) -> Dict[str, int]:
+        """热重载：读取新配置后按 id 与现有条目比较，没有变化时保留现有条目表和抽样器；
+        仍存在的 id 保留播放状态（冷却、今日已播、最近播放），已删除的 id 清除状态
+
+        有任何变化（哪怕只改了一条）时整体换用新的条目表并重建索引，抽样器在下次抽样时重建：
+        列式表中的文本按偏移量连续存放，索引和抽样器都以行号为键，删除或插入一行会让其后的行号全部移动，
+        逐条修补并不比重建省事；重建与首次加载同为 O(n)，耗时主要在解析 JSON。播放状态按 id 保存，不受影响。
+
+        Returns:
+            {added, removed, modified} 计数，全为 0 表示没有变化
+        """
+        fresh = AudioCategory(self.name, self.audio_dir, self.json_path)
+        fresh.load(cache)
+        old_rows = self._table_by_id(self._table)
+        new_rows = self._table_by_id(fresh._table)
+        diff = {
+            'added': sum(1 for entry_id in new_rows if entry_id not in old_rows),
+            'removed': sum(1 for entry_id in old_rows if entry_id not in new_rows),
+            'modified': sum(1 for entry_id, values in new_rows.items()
+                            if entry_id in old_rows and old_rows[entry_id] != values),
+        }
+        order_changed = list(old_rows) != list(new_rows)
+        settings_changed = (self.description, self.error_rate, self.correction_delay_ms) != \
+            (fresh.description, fresh.error_rate, fresh.correction_delay_ms)
+        if not any(diff.values()) and not order_changed:
+            if settings_changed:
+                self.description = fresh.description
+                self.error_rate = fresh.error_rate
+                self.correction_delay_ms = fresh.correction_delay_ms
+            return diff
+        
+        # 清除已删除条目的播放状态
+        for entry_id in [i for i in self._last_played if i not in new_rows]:
+            del self._last_played[entry_id]
+        self._played_today &= new_rows.keys()
+        self._recent_played = [i for i in self._recent_played if i in new_rows]
+        self._recent_set = set(self._recent_played)
+        self._apply_compiled(fresh._compiled())
+        return diff
+
+    @staticmethod
+    def _table_by_id(table: EntryTable) -> Dict[str, list]:
+        """id -> 该 id 所有行的字段值（按出现顺序）"""
+        rows: Dict[str, list] = {}
+        for row, entry_id in enumerate(table.unique['id']):
+            rows.setdefault(entry_id, []).append(table.row_values(row))
+        return rows
+
+    # 编译缓存中保存的字段：配置项、条目表和静态索引
+    COMPILED_FIELDS = ('description', 'error_rate', 'correction_delay_ms', '_table',
+                       '_by_id', '_duplicate_ids', '_by_trigger', '_time_table', '_max_cooldown')
+
+    def _compiled(self) -> dict:
+        return {name: getattr(self, name) for name in self.COMPILED_FIELDS}
+
+    def _apply_compiled(self, compiled: dict):
+        for name in self.COMPILED_FIELDS:
+            setattr(self, name, compiled[name])
+        self.entries = EntryList(self._table)
+        self._reset_dynamic_index()
+
+    def _reset_dynamic_index(self):
+        """清空依赖播放状态的索引（抽样器、冷却堆），热重载后冷却状态保留"""
+        self._trigger_matches = {}
+        self._samplers = {}
+        self._cooldown_heap = []
+        for entry_id in self._last_played:
+            self._push_cooldown(entry_id)
+        self._update_missing()
+
+    def set_manifest(self, manifest: Optional[AssetManifest]):
+        """设置（或在音频目录变化后刷新）资源清单，文件缺失的条目不再被抽中"""
+        self._manifest = manifest
+        self._update_missing()
+        self._samplers = {}
+
+    def set_bank(self, bank: Optional[AudioBank]):
+        """设置音频包：散文件不存在时从包中播放"""
+        self._bank = bank
+        self._update_missing()
+        self._samplers = {}
+
+    def _in_bank(self, filename: str) -> bool:
+        return self._bank is not None and self._bank.has(Path(self.audio_dir) / filename)
+
+    def _update_missing(self):
+        self._missing_rows = set()
+        if self._manifest is None:
+            return
+        table = self._table
+        filenames = table.pooled['filename']
+        missing_codes = {code for code in set(filenames)
+                         if not self._manifest.exists(self.audio_dir, table.pool[code])
+                         and not self._in_bank(table.pool[code])}
+        if missing_codes:
+            self._missing_rows = {row for row, code in enumerate(filenames) if code in missing_codes}
+
+    def missing_entries(self) -> List[AudioEntry]:
+        """音频文件缺失的条目"""
+        return [self._table.entry(row) for row in sorted(self._missing_rows)]
+
+    def has_audio(self, filename: str) -> bool:
+        """音频文件是否存在（有资源清单时查清单，否则直接检查文件；也可以只在音频包中）"""
+        if not filename:
+            return False
+        if self._manifest is not None:
+            return self._manifest.exists(self.audio_dir, filename) or self._in_bank(filename)
+        return (Path(self.audio_dir) / filename).exists() or self._in_bank(filename)
+
+    def file_duration_ms(self, filename: str, default: int) -> int:
+        """音频文件的实际时长（由 WAV 头部或音频包索引得出），未知时返回 default"""
+        duration = None
+        if self._manifest is not None and self._manifest.exists(self.audio_dir, filename):
+            duration = self._manifest.duration_ms(self.audio_dir, filename)
+        elif self._bank is not None:
+            duration = self._bank.duration_ms(Path(self.audio_dir) / filename)
+        return default if duration is None else duration
+
+    def entry_duration_ms(self, entry: AudioEntry) -> int:
+        """条目的实际时长，未知时使用 JSON 中的 duration_ms"""
+        return self.file_duration_ms(entry.filename, entry.duration_ms)
+
+    def duration_mismatches(self, tolerance_ms: int = DEFAULT_TOLERANCE_MS) -> List[AudioEntry]:
+        """JSON 中 duration_ms 与实际时长相差超过 tolerance_ms 的条目（文件缺失的不计）"""
+        return [entry for entry in self.entries
+                if self.has_audio(entry.filename)
+                and abs(self.entry_duration_ms(entry) - entry.duration_ms) > tolerance_ms]
+
+    def _build_index(self):
+        """重建 id / trigger / 报时时刻索引"""
+        table = self._table
+        ids = table.unique['id']
+        triggers = table.pooled['trigger']
+        cooldowns = table.numbers['cooldown_minutes']
+        hours = table.numbers['hour']
+        minutes = table.numbers['minute']
+        self._by_id = {}
+        self._duplicate_ids = {}
+        self._time_table = {}
+        self._max_cooldown = {}
+        by_trigger_code: Dict[int, array] = {}
+        for row, entry_id in enumerate(ids):
+            # 同 id 保留第一条，与原先的线性查找一致
+            first = self._by_id.setdefault(entry_id, row)
+            if first != row:
+                self._duplicate_ids.setdefault(entry_id, [first]).append(row)
+            if cooldowns[row] > self._max_cooldown.get(entry_id, 0):
+                self._max_cooldown[entry_id] = cooldowns[row]
+            rows = by_trigger_code.get(triggers[row])
+            if rows is None:
+                rows = by_trigger_code[triggers[row]] = array('i')
+            rows.append(row)
+            hour, minute = hours[row], minutes[row]
+            if hour < 0 or minute < 0:
                 continue
-            
-            # 检查冷却时间
-            if entry.id in self._last_played:
-                elapsed = (now - self._last_played[entry.id]) / 60  # 转换为分钟
-                if entry.cooldown_minutes > 0 and elapsed < entry.cooldown_minutes:
-                    continue
-            
-            # 检查是否在最近播放列表中（防重复）
-            if entry.id in self._recent_played:
+            if not table.flags[row] & FLAG_COLUMNS['is_error']:
+                self._time_table.setdefault((hour, minute, False, ""), []).append(row)
                 continue
-            
-            available_entries.append(entry)
-            weights.append(entry.weight)
-        
-        # 如果所有条目都被过滤了，放宽条件（只排除最近一个）
-        if not available_entries and self.entries:
-            for entry in self.entries:
-                if entry.play_once_per_day and entry.id in self._played_today:
-                    continue
-                if entry.id in self._recent_played and len(self._recent_played) > 0:
-                    if entry.id == self._recent_played[-1]:
-                        continue
-                available_entries.append(entry)
-                weights.append(entry.weight)
-        
-        if not available_entries:
+            for slot in ("error_01", "error_02"):
+                if slot in entry_id:
+                    self._time_table.setdefault((hour, minute, True, slot), []).append(row)
+        self._by_trigger = {table.pool[code]: rows for code, rows in by_trigger_code.items()}
+        self._reset_dynamic_index()
+
+    def _rows_for_id(self, entry_id: str) -> List[int]:
+        """同 id 的所有行号（正常情况下只有一行）"""
+        rows = self._duplicate_ids.get(entry_id)
+        if rows is not None:
+            return rows
+        row = self._by_id.get(entry_id)
+        return [] if row is None else [row]
+
+    def _match_trigger(self, trigger: str) -> Sequence[int]:
+        """trigger 子串匹配的行号（升序），结果按查询缓存"""
+        matches = self._trigger_matches.get(trigger)
+        if matches is None:
+            # 只需比较不同的 trigger 值，而不是每个条目
+            matched_keys = [key for key in self._by_trigger if trigger in key]
+            if len(matched_keys) == 1:
+                matches = self._by_trigger[matched_keys[0]]
+            else:
+                matches = array('i', sorted(row for key in matched_keys for row in self._by_trigger[key]))
+            self._trigger_matches[trigger] = matches
+        return matches
+
+    def _push_cooldown(self, entry_id: str):
+        """记录冷却结束时间，到时把条目放回抽样器"""
+        cooldown = self._max_cooldown.get(entry_id, 0)
+        if cooldown > 0 and entry_id in self._last_played:
+            heapq.heappush(self._cooldown_heap, (self._last_played[entry_id] + cooldown * 60, entry_id))
+
+    def _relaxed_ok(self, row: int) -> bool:
+        """放宽条件：只排除音频缺失和今天已播放的一次性条目（最近一条由抽样时排除）"""
+        if row in self._missing_rows:
+            return False
+        table = self._table
+        return not (table.flags[row] & FLAG_COLUMNS['play_once_per_day']
+                    and table.unique['id'][row] in self._played_today)
+
+    def _strict_ok(self, row: int) -> bool:
+        """严格条件：再排除冷却中和最近播放过的条目"""
+        if not self._relaxed_ok(row):
+            return False
+        entry_id = self._table.unique['id'][row]
+        cooldown = self._table.numbers['cooldown_minutes'][row]
+        if cooldown > 0 and entry_id in self._last_played \
+                and self._now < self._last_played[entry_id] + cooldown * 60:
+            return False
+        return entry_id not in self._recent_set
+
+    def _sampler(self, trigger: Optional[str]) -> WeightedSampler:
+        sampler = self._samplers.get(trigger)
+        if sampler is None:
+            rows = range(len(self._table)) if trigger is None else self._match_trigger(trigger)
+            weights = self._table.numbers['weight']
+            sampler = WeightedSampler(rows, weight=weights.__getitem__,
+                                      strict=self._strict_ok, relaxed=self._relaxed_ok)
+            self._samplers[trigger] = sampler
+        return sampler
+
+    def _refresh(self, entry_id: str):
+        """条目状态变化，增量更新所有抽样器"""
+        if not self._samplers:
+            return
+        for row in self._rows_for_id(entry_id):
+            for sampler in self._samplers.values():
+                sampler.refresh(row)
+
+    def _sample(self, trigger: Optional[str]) -> Optional[AudioEntry]:
+        self._now = time.time()
+        # 冷却结束的条目重新加入抽样
+        while self._cooldown_heap and self._cooldown_heap[0][0] <= self._now:
+            _, entry_id = heapq.heappop(self._cooldown_heap)
+            self._refresh(entry_id)
+        sampler = self._sampler(trigger)
+        exclude = self._rows_for_id(self._recent_played[-1]) if self._recent_played else ()
+        row = sampler.sample(exclude=exclude)
+        return None if row is None else self._table.entry(row)
+
+    def get_random_entry(self) -> Optional[AudioEntry]:
+        """根据权重随机获取条目
+
+        优先从不在冷却、不在最近播放列表、今天未播放过（一次性条目）的条目中选；
+        都被过滤时放宽条件，只排除最近播放的一条。
+        """
+        if not self.entries:
             return None
-        
-        # 加权随机选择
-        total = sum(weights)
-        r = random.uniform(0, total)
-        upto = 0
-        for entry, weight in zip(available_entries, weights):
-            upto += weight
-            if r <= upto:
-                return entry
-        
-        return available_entries[-1]
+        return self._sample(None)
 
     def get_entry_by_id(self, entry_id: str) -> Optional[AudioEntry]:
         """根据ID获取条目"""
-        for entry in self.entries:
-            if entry.id == entry_id:
-                return entry
-        return None
+        row = self._by_id.get(entry_id)
+        return None if row is None else self._table.entry(row)
 
     def get_random_entry_by_trigger(self, trigger: str) -> Optional[AudioEntry]:
-        """根据trigger随机获取条目"""
-        import time
-        now = time.time()
-        
-        # 筛选符合条件的条目
-        available_entries = []
-        weights = []
-        
-        for entry in self.entries:
-            # 检查trigger是否匹配
-            if trigger not in entry.trigger:
-                continue
-            
-            # 检查是否是一次性且已播放
-            if entry.play_once_per_day and entry.id in self._played_today:
-                continue
-            
-            # 检查冷却时间
-            if entry.id in self._last_played:
-                elapsed = (now - self._last_played[entry.id]) / 60
-                if entry.cooldown_minutes > 0 and elapsed < entry.cooldown_minutes:
-                    continue
-            
-            # 检查是否在最近播放列表中（防重复）
-            if entry.id in self._recent_played:
-                continue
-            
-            available_entries.append(entry)
-            weights.append(entry.weight)
-        
-        # 如果所有条目都被过滤了，放宽条件（只排除最近一个）
-        if not available_entries:
-            for entry in self.entries:
-                if trigger not in entry.trigger:
-                    continue
-                if entry.play_once_per_day and entry.id in self._played_today:
-                    continue
-                if entry.id in self._recent_played and len(self._recent_played) > 0:
-                    if entry.id == self._recent_played[-1]:
-                        continue
-                available_entries.append(entry)
-                weights.append(entry.weight)
-        
-        if not available_entries:
+        """根据trigger随机获取条目（筛选规则同 get_random_entry）"""
+        if not self._match_trigger(trigger):
             return None
-        
-        # 加权随机选择
-        total = sum(weights)
-        r = random.uniform(0, total)
-        upto = 0
-        for entry, weight in zip(available_entries, weights):
-            upto += weight
-            if r <= upto:
-                return entry
-        
-        return available_entries[-1]
+        return self._sample(trigger)
 
     def get_entries_by_trigger(self, trigger: str) -> List[AudioEntry]:
         """根据trigger获取所有匹配的条目"""
-        result = []
-        for entry in self.entries:
-            if trigger in entry.trigger:
-                result.append(entry)
-        return result
+        return [self._table.entry(row) for row in self._match_trigger(trigger)]
+
+    def _playable(self, rows: Optional[List[int]]) -> Optional[List[int]]:
+        """去掉音频缺失的行"""
+        if not rows or not self._missing_rows:
+            return rows
+        return [row for row in rows if row not in self._missing_rows]
 
     def get_time_entry(self, hour: int, minute: int) -> Optional[AudioEntry]:
         """获取整点报时条目"""
-        # 先找正常版本
-        normal_entries = [e for e in self.entries 
-                         if e.hour == hour and e.minute == minute and not e.is_error]
+        normal_rows = self._playable(self._time_table.get((hour, minute, False, "")))
         
-        if not normal_entries:
+        if not normal_rows:
             return None
         
-        return random.choice(normal_entries)
+        return self._table.entry(random.choice(normal_rows))
 
     def get_time_entry_with_error(self, hour: int, minute: int) -> tuple:
         """获取整点报时条目，可能包含错误彩蛋
@@ -208,47 +377,142 @@ class AudioCategory:
             如果没有触发错误，返回 (正确条目, None)
         """
         # 先找正常版本
-        normal_entries = [e for e in self.entries 
-                         if e.hour == hour and e.minute == minute and not e.is_error]
+        normal_rows = self._playable(self._time_table.get((hour, minute, False, "")))
         
-        if not normal_entries:
+        if not normal_rows:
             return None, None
         
         # 检查是否触发错误彩蛋
         if random.random() < self.error_rate:
             # 找对应的错误版本 (error_01 和 error_02)
-            error_01_list = [e for e in self.entries 
-                           if e.hour == hour and e.minute == minute 
-                           and e.is_error and "error_01" in e.id]
-            error_02_list = [e for e in self.entries 
-                           if e.hour == hour and e.minute == minute 
-                           and e.is_error and "error_02" in e.id]
+            error_01_rows = self._playable(self._time_table.get((hour, minute, True, "error_01")))
+            error_02_rows = self._playable(self._time_table.get((hour, minute, True, "error_02")))
             
-            if error_01_list and error_02_list:
-                return None, [error_01_list[0], error_02_list[0]]
+            if error_01_rows and error_02_rows:
+                return None, [self._table.entry(error_01_rows[0]), self._table.entry(error_02_rows[0])]
         
-        return random.choice(normal_entries), None
+        return self._table.entry(random.choice(normal_rows)), None
 
     def mark_played(self, entry_id: str):
         """标记条目已播放"""
-        import time
         self._last_played[entry_id] = time.time()
+        if self.play_listener is not None:
+            self.play_listener(entry_id, self._last_played[entry_id])
         entry = self.get_entry_by_id(entry_id)
         if entry and entry.play_once_per_day:
             self._played_today.add(entry_id)
         
         # 更新最近播放列表（防重复）
-        if entry_id in self._recent_played:
+        if entry_id in self._recent_set:
             self._recent_played.remove(entry_id)
         self._recent_played.append(entry_id)
+        self._recent_set.add(entry_id)
         # 限制列表长度
         if len(self._recent_played) > self._recent_limit:
-            self._recent_played.pop(0)
+            evicted = self._recent_played.pop(0)
+            self._recent_set.discard(evicted)
+            self._now = time.time()
+            self._refresh(evicted)
+        self._now = time.time()
+        self._refresh(entry_id)
+        self._push_cooldown(entry_id)
 
     def reset_daily(self):
         """重置每日记录"""
         self._played_today.clear()
         self._recent_played.clear()
+        self._recent_set.clear()
+        # 大量条目状态同时变化，直接重建抽样器
+        self._samplers = {}
+
+    def restore_state(self, last_played: Dict[str, float], recent: List[str], today_start: float):
+        """恢复上次运行的播放状态（今日已播由播放时间是否晚于今天零点判断）"""
+        self._last_played.update(last_played)
+        self._played_today = {
+            entry_id for entry_id, played in self._last_played.items()
+            if played >= today_start and any(self._table.flags[row] & FLAG_COLUMNS['play_once_per_day']
+                                             for row in self._rows_for_id(entry_id))
+        }
+        self._recent_played = [entry_id for entry_id in recent if entry_id in self._by_id][-self._recent_limit:]
+        self._recent_set = set(self._recent_played)
+        self._samplers = {}
+        self._cooldown_heap = []
+        for entry_id in self._last_played:
+            self._push_cooldown(entry_id)
+
+
+# 音频目录变化后等待多久再重新扫描（复制大量文件时只扫一次）
+ASSET_RESCAN_DELAY_MS = 500
+# 音频库 JSON 变化后等待多久再重新加载（编辑器保存时会连续触发多次通知）
+LIBRARY_RELOAD_DELAY_MS = 300
+# 检查日期变化的间隔（休眠唤醒后定时器可能错过零点，所以定期检查而不是只定一次零点）
+DAY_CHECK_INTERVAL_MS = 60 * 1000
+# 启动后预加载的高权重 Idle 台词数量
+PRELOAD_IDLE_COUNT = 5
+# 预加载的 trigger：(分类, trigger)
+PRELOAD_TRIGGERS = [("System", "on_start"), ("DoubleClick", "double_click")]
+# 推测播放请求在调度器中的 key（取消时按它定位）
+SPECULATIVE_KEY = "speculative-click"
+# PCM 采样字节数 -> QAudioFormat 采样格式
+PCM_SAMPLE_FORMATS = {
+    1: QAudioFormat.SampleFormat.UInt8,
+    2: QAudioFormat.SampleFormat.Int16,
+    4: QAudioFormat.SampleFormat.Int32,
+}
+
+
+class PcmDevice(QIODevice):
+    """只读地把一段 PCM 数据提供给 QAudioSink；按需切片读取，不预先整段复制"""
+    def __init__(self, data, parent=None):
+        super().__init__(parent)
+        self._data = memoryview(data)
+        self._pos = 0
+    
+    def readData(self, maxlen: int) -> bytes:
+        chunk = self._data[self._pos:self._pos + maxlen]
+        self._pos += len(chunk)
+        return chunk.tobytes()
+    
+    def writeData(self, data) -> int:
+        return -1
+    
+    def seek(self, pos: int) -> bool:
+        if not 0 <= pos <= len(self._data):
+            return False
+        self._pos = pos
+        return super().seek(pos)
+    
+    def size(self) -> int:
+        return len(self._data)
+    
+    def bytesAvailable(self) -> int:
+        return len(self._data) - self._pos + super().bytesAvailable()
+    
+    def close(self):
+        super().close()
+        self._data.release()
+
+
+class _PcmDecodeSignals(QObject):
+    finished = pyqtSignal(str, object)  # 文件路径, PcmClip 或 None
+
+
+class PcmDecodeTask(QRunnable):
+    """后台解码任务 - 在线程池中解码 WAV 并放入缓存，结果通过排队信号回到主线程"""
+    def __init__(self, cache: PcmCache, path: str):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = _PcmDecodeSignals()
+        self.path = path
+        self._cache = cache
+
+    def run(self):
+        clip = None
+        try:
+            clip = self._cache.load(self.path)
+        finally:
+            # 解码失败也要发出信号：主线程收到后才释放对任务的引用
+            self.signals.finished.emit(self.path, clip)
 
 
 class AudioManager(QObject):
@@ -256,83 +520,379 @@ class AudioManager(QObject):
     # 信号
     audio_started = pyqtSignal(str, str, int)  # category, text, duration_ms
     audio_finished = pyqtSignal()  # 音频播放完成
+    playback_started = pyqtSignal(float)  # 真正进入播放状态的时刻（time.perf_counter()）
     
-    def __init__(self, assets_dir: str = "Assets"):
+    def __init__(self, assets_dir: str = "Assets", pcm_cache_bytes: int = DEFAULT_BUDGET_BYTES,
+                 library_cache_path: Optional[str] = "cache/library.pickle",
+                 asset_manifest_path: Optional[str] = "cache/assets.json",
+                 journal_dir: Optional[str] = "cache/play_journal",
+                 audio_bank_path: Optional[str] = "cache/audio.bank",
+                 optimized_dir: Optional[str] = DEFAULT_OUTPUT_DIR):
         super().__init__()
         self.assets_dir = Path(assets_dir)
         self.audio_dir = self.assets_dir / "Audio"
         self.library_dir = self.assets_dir / "Library"
+        # 音频库编译缓存（None 表示每次都解析 JSON）
+        self.library_cache = LibraryCache(library_cache_path) if library_cache_path else None
         
         self.categories: Dict[str, AudioCategory] = {}
         self.volume = 0.8
         self.mute = False
         
-        # 播放器
-        self._player = QMediaPlayer()
-        self._audio_output = QAudioOutput()
-        self._player.setAudioOutput(self._audio_output)
-        self._player.mediaStatusChanged.connect(self._on_media_status_changed)
-        
-        # 文件监视器（热重载）
+        # 播放器池：链式播放的下一段在当前音频播放时由空闲播放器预加载
+        self._players = PlayerPool(parent=self)
+        self._players.media_status_changed.connect(self._on_media_status_changed)
+        self._players.playback_state_changed.connect(self._on_player_state_changed)
+        self._players.error_occurred.connect(self._on_player_error)
+        self._player_playing = False  # QMediaPlayer 正在播放一段音频，尚未收到结束/出错通知
+        
+        # 音频包（python audio_bank.py 生成）：mmap 映射，包中的音频直接交给 QAudioSink；
+        # 散文件与打包时不同则以散文件为准
+        self.audio_bank = AudioBank(audio_bank_path, self.audio_dir) if audio_bank_path else None
+        # 离线优化过的音频（python audio_optimize.py 生成）：源文件未变化时代替源文件播放
+        self.optimized_audio = OptimizedAudio(optimized_dir, self.audio_dir) if optimized_dir else None
+        
+        # 已解码音频缓存：命中的 WAV 经 QAudioSink 直接播放内存中的 PCM，其余走 QMediaPlayer
+        self.pcm_cache = PcmCache(pcm_cache_bytes)
+        # 未命中缓存时在线程池中解码，GUI 线程不等待；同一文件只解码一次，完成后依次调用回调
+        self._decode_pool = QThreadPool()
+        self._decode_pool.setMaxThreadCount(1)
+        self._decoding: Dict[str, tuple] = {}  # 文件路径 -> (任务, [回调])
+        self._sink: Optional[QAudioSink] = None
+        self._sink_format: Optional[tuple] = None
+        self._sink_device: Optional[PcmDevice] = None
+        self._sink_playing = False
+        self._sink_announced = False
+        self._sink_started_at = 0.0
+        self._sink_duration_ms = 0
+        
+        # 推测播放：预先选好并解码、尚未开始播放的条目 (分类, 条目)
+        self._prepared: Optional[tuple] = None
+        
+        # 文件监视器（热重载）：同时监视 JSON 文件和所在目录，
+        # 编辑器“写临时文件再改名”的保存方式会让文件监视失效，靠目录通知补上
         self._watcher = QFileSystemWatcher()
         self._watcher.fileChanged.connect(self._on_file_changed)
+        self._library_files: Dict[str, str] = {}  # JSON 路径 -> 分类名
+        self._library_stats: Dict[str, Optional[tuple]] = {}  # 分类名 -> 上次加载时的文件状态
+        self._pending_reloads: set = set()
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(LIBRARY_RELOAD_DELAY_MS)
+        self._reload_timer.timeout.connect(self._reload_library)
+        
+        # 音频资源清单：启动时扫描一次，之后由目录监视器触发重新扫描；
+        # 清单落盘，未变化的文件不再重复读取 WAV 头部
+        self.asset_manifest = AssetManifest(asset_manifest_path)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._pending_rescans: set = set()
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(ASSET_RESCAN_DELAY_MS)
+        self._rescan_timer.timeout.connect(self._rescan_assets)
+        
+        # 播放记录日志：重启后恢复冷却和今日已播状态，日期变化时自动重置每日记录
+        self.journal = PlayJournal(journal_dir) if journal_dir else None
+        self._day = date.today()
+        self._day_timer = QTimer(self)
+        self._day_timer.setInterval(DAY_CHECK_INTERVAL_MS)
+        self._day_timer.timeout.connect(self._check_day)
         
         # 当前播放信息
         self._current_category: Optional[str] = None
         self._current_entry: Optional[AudioEntry] = None
         self._is_correction_playing = False
+        self._is_time_error_playing = False
+        self._time_error_sequence: list = []
+        self._time_error_index = 0
+        self._generation = 0  # 每次打断/取消加一，使尚未执行的链式播放定时器失效
+        self._finishing = False  # 正在发出 audio_finished（回调中可接着播放链式音频）
+        
+        # 播放调度：按优先级决定立即播放、打断、排队还是丢弃
+        self.scheduler = PlaybackScheduler(stop=self._interrupt)
         
     def initialize(self):
         """初始化音频管理器"""
+        start = time.perf_counter()
+        self.asset_manifest.load()
+        for folder in dict.fromkeys(CATEGORY_FOLDERS.values()):
+            self._scan_assets(self.audio_dir / folder)
+        self.asset_manifest.save()
+        scan_ms = (time.perf_counter() - start) * 1000
+        print(f"[AudioManager] 音频目录扫描完成: {len(self.asset_manifest)} 个文件，{scan_ms:.1f} ms")
+        self._load_optimized_audio()
+        self._open_audio_bank()
+        
         # 加载所有分类（音频文件统一在Index目录）
-        self._load_category("Idle", "Index")
-        self._load_category("DoubleClick", "Index")
-        self._load_category("System", "Index")
-        self._load_category("TimeAnnounce", "TimeAnnounce")
+        start = time.perf_counter()
+        cached = sum(self._load_category(name, folder) for name, folder in CATEGORY_FOLDERS.items())
+        if self.library_cache is not None:
+            self.library_cache.save()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[AudioManager] 音频库加载完成: {elapsed_ms:.1f} ms，"
+              f"{cached}/{len(self.categories)} 个分类来自编译缓存")
+        self._report_missing()
+        self._restore_play_state()
+        mismatched = sum(len(cat.duration_mismatches()) for cat in self.categories.values())
+        if mismatched:
+            print(f"[AudioManager] {mismatched} 个条目的 duration_ms 与实际时长不符，已按实际时长显示"
+                  f"（运行 python asset_manifest.py 查看列表）")
         
         self.set_volume(self.volume)
         self.set_mute(self.mute)
+        self.preload_common()
+    
+    def _audio_path(self, category: str, entry: AudioEntry) -> Path:
+        return Path(self.categories[category].audio_dir) / entry.filename
+    
+    def _open_audio_bank(self):
+        """映射音频包，并统计以散文件为准的音频"""
+        if self.audio_bank is None:
+            return
+        start = time.perf_counter()
+        if not self.audio_bank.open():
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        overridden = self.audio_bank.overridden(audio_sources(self.asset_manifest, self.audio_dir))
+        print(f"[AudioBank] 已映射音频包: {len(self.audio_bank)} 个音频，{elapsed_ms:.1f} ms")
+        if overridden:
+            print(f"[AudioBank] {len(overridden)} 个音频与音频包不同或不在包中，以散文件为准"
+                  f"（运行 python audio_bank.py 重新打包）")
+    
+    def _load_optimized_audio(self):
+        if self.optimized_audio is None:
+            return
+        count = self.optimized_audio.load()
+        if count:
+            settings = self.optimized_audio.settings
+            print(f"[AudioManager] 使用优化音频: {count} 个 "
+                  f"({settings.get('target_lufs')} LUFS, {settings.get('sample_rate')} Hz)")
+    
+    def _loose_info(self, audio_path: Path) -> Optional[AssetInfo]:
+        """资源清单中的散文件信息"""
+        root = self.asset_manifest.root_of(audio_path.parent)
+        return self.asset_manifest.get(root, os.path.relpath(audio_path, root)) if root else None
+    
+    def _bank_clip(self, audio_path: Path) -> Optional[PcmClip]:
+        """音频包中的音频；存在不同的同名散文件时返回 None"""
+        if self.audio_bank is None or not self.audio_bank.clips:
+            return None
+        return self.audio_bank.clip(audio_path, self._loose_info(audio_path))
+    
+    def _resolve(self, audio_path: Path) -> Path:
+        """实际播放的文件：源文件未变化的优化版本，否则是源文件本身"""
+        if self.optimized_audio is None or not self.optimized_audio.files:
+            return audio_path
+        return self.optimized_audio.path_for(audio_path, self._loose_info(audio_path)) or audio_path
     
-    def _load_category(self, name: str, folder: str):
-        """加载单个分类"""
+    def _restore_play_state(self):
+        """从播放记录日志恢复各分类的播放状态，并开始记录新的播放"""
+        self._day_timer.start()
+        if self.journal is None:
+            return
+        start = time.perf_counter()
+        replayed = self.journal.load()
+        today_start = day_start(self.journal.day)
+        for name, cat in self.categories.items():
+            state = self.journal.state(name)
+            cat.restore_state(state.last_played, state.recent, today_start)
+            cat.play_listener = partial(self.journal.record, name)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[AudioManager] 播放记录已恢复: 重放 {replayed} 条日志，{elapsed_ms:.1f} ms")
+    
+    def _check_day(self):
+        """日期变化：重置每日记录并压缩日志"""
+        today = date.today()
+        if today == self._day:
+            return
+        self._day = today
+        print(f"[AudioManager] 日期变更为 {today}，重置每日播放记录")
+        self.reset_daily()
+        if self.journal is not None:
+            self.journal.rollover(today)
+    
+    def shutdown(self):
+        """退出前等待进行中的后台解码，并把播放记录写入磁盘"""
+        self._decode_pool.clear()
+        self._decode_pool.waitForDone(1000)
+        if self.journal is not None:
+            self.journal.close()
+    
+    def _scan_assets(self, directory: Path):
+        """扫描音频目录并监视其中所有子目录"""
+        changes = self.asset_manifest.scan(directory)
+        watched = set(self._watcher.directories())
+        new_dirs = [d for d in self.asset_manifest.directories(directory) if d not in watched]
+        if new_dirs:
+            self._watcher.addPaths(new_dirs)
+        return changes
+    
+    def _report_missing(self, categories=None):
+        """列出音频文件缺失的条目"""
+        for cat in categories or self.categories.values():
+            missing = cat.missing_entries()
+            if not missing:
+                continue
+            names = ", ".join(dict.fromkeys(e.filename for e in missing))
+            if len(names) > 200:
+                names = names[:200] + "..."
+            print(f"[AudioManager] ⚠ {cat.name}: {len(missing)} 个条目的音频文件缺失，已排除: {names}")
+    
+    def _on_directory_changed(self, path: str):
+        """音频库或音频目录变化：合并短时间内的多次通知后重新加载/扫描"""
+        if os.path.normpath(path) == os.path.normpath(self.library_dir):
+            # 不知道具体是哪个文件，检查全部分类（文件状态没变的会被跳过）
+            self._pending_reloads.update(self.categories)
+            self._reload_timer.start()
+            return
+        root = self.asset_manifest.root_of(path)
+        if root is None:
+            return
+        self._pending_rescans.add(root)
+        self._rescan_timer.start()
+    
+    def _rescan_assets(self):
+        roots, self._pending_rescans = self._pending_rescans, set()
+        for root in roots:
+            changes = self._scan_assets(Path(root))
+            if not any(changes.values()):
+                continue
+            print(f"[AudioManager] 音频目录变化: {root} "
+                  f"(新增 {changes['added']}, 删除 {changes['removed']}, 修改 {changes['changed']})")
+            affected = [cat for cat in self.categories.values()
+                        if self.asset_manifest.root_of(cat.audio_dir) == root]
+            for cat in affected:
+                cat.set_manifest(self.asset_manifest)
+            self._report_missing(affected)
+            if changes['removed'] or changes['changed']:
+                self.pcm_cache.evict_stale()
+        self.asset_manifest.save()
+    
+    def preload_common(self):
+        """在后台线程预解码常用音频：开场白、双击台词和权重最高的几条 Idle 台词"""
+        if not self.pcm_cache.enabled:
+            return
+        paths = []
+        for category, trigger in PRELOAD_TRIGGERS:
+            if category in self.categories:
+                paths += [self._audio_path(category, e) for e in self.categories[category].get_entries_by_trigger(trigger)]
+        if "Idle" in self.categories:
+            idle = sorted(self.categories["Idle"].entries, key=lambda e: -e.weight)[:PRELOAD_IDLE_COUNT]
+            paths += [self._audio_path("Idle", e) for e in idle]
+        # 音频包中的音频无需解码
+        paths = [str(self._resolve(p)) for p in dict.fromkeys(paths) if self._bank_clip(p) is None]
+        
+        def worker():
+            loaded = self.pcm_cache.preload(paths)
+            print(f"[AudioCache] 预加载完成: 新解码 {loaded} 个文件，{self.pcm_cache.describe()}")
+        threading.Thread(target=worker, name="AudioPreload", daemon=True).start()
+    
+    def _load_category(self, name: str, folder: str) -> bool:
+        """加载单个分类，返回是否命中编译缓存"""
         audio_dir = self.audio_dir / folder
         json_path = self.library_dir / f"{name.lower()}.json"
         
+        if not self.asset_manifest.has_root(audio_dir):
+            self._scan_assets(audio_dir)
         category = AudioCategory(name, str(audio_dir), str(json_path))
-        category.load()
+        category.set_manifest(self.asset_manifest)
+        category.set_bank(self.audio_bank)
+        self._library_stats[name] = self._file_state(json_path)
+        cached = category.load(self.library_cache)
         self.categories[name] = category
         
-        # 监视JSON文件变更
-        if json_path.exists():
-            self._watcher.addPath(str(json_path))
+        # 监视JSON文件及所在目录的变更
+        self._library_files[os.path.normpath(json_path)] = name
+        self._watch_library_file(name)
+        if self.library_dir.exists() and str(self.library_dir) not in self._watcher.directories():
+            self._watcher.addPath(str(self.library_dir))
+        return cached
+    
+    @staticmethod
+    def _file_state(path) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+    
+    def _watch_library_file(self, name: str):
+        """（重新）监视分类的 JSON 文件；文件被替换后监视会失效，需要重新添加"""
+        json_path = self.categories[name].json_path if name in self.categories else None
+        if json_path and os.path.exists(json_path) and json_path not in self._watcher.files():
+            self._watcher.addPath(json_path)
     
     def _on_file_changed(self, path: str):
-        """文件变更回调（热重载）"""
-        path = Path(path)
-        category_name = path.stem.capitalize()
-        
-        # 特殊处理
-        if category_name == "Doubleclick":
-            category_name = "DoubleClick"
-        elif category_name == "Timeannounce":
-            category_name = "TimeAnnounce"
-        
-        if category_name in self.categories:
-            print(f"[AudioManager] 检测到配置变更: {category_name}")
-            self.categories[category_name].load()
+        """文件变更回调（热重载），合并短时间内的多次通知"""
+        name = self._library_files.get(os.path.normpath(path))
+        if name is not None:
+            self._pending_reloads.add(name)
+            self._reload_timer.start()
+    
+    def _reload_library(self):
+        """重新加载有变化的分类，只替换变化的部分"""
+        names, self._pending_reloads = self._pending_reloads, set()
+        reloaded = []
+        for name in names:
+            cat = self.categories.get(name)
+            if cat is None:
+                continue
+            state = self._file_state(cat.json_path)
+            if state is None:
+                # 改名替换的中间状态，等目录通知再处理
+                continue
+            self._watch_library_file(name)
+            if state == self._library_stats.get(name):
+                continue
+            try:
+                diff = cat.reload(self.library_cache)
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                # 文件可能还没写完，下次通知时重试
+                print(f"[AudioManager] 重新加载 {name} 失败: {e}")
+                continue
+            self._library_stats[name] = state
+            if not any(diff.values()):
+                continue
+            print(f"[AudioManager] 检测到配置变更: {name} "
+                  f"(新增 {diff['added']}, 删除 {diff['removed']}, 修改 {diff['modified']})")
+            reloaded.append(cat)
+        if self.library_cache is not None:
+            self.library_cache.save()
+        if not reloaded:
+            return
+        self._report_missing(reloaded)
+        # 音频文件可能随配置一起被替换
+        removed = self.pcm_cache.evict_stale()
+        if removed:
+            print(f"[AudioCache] 已移除 {removed} 个过期缓存")
+        self.preload_common()
     
     def set_volume(self, volume: float):
         """设置音量"""
         self.volume = max(0.0, min(1.0, volume))
-        self._audio_output.setVolume(self.volume)
+        self._players.set_volume(self.volume)
+        self._update_sink_volume()
     
     def set_mute(self, mute: bool):
         """设置静音"""
         self.mute = mute
-        self._audio_output.setMuted(mute)
+        self._players.set_muted(mute)
+        self._update_sink_volume()
+    
+    def _update_sink_volume(self):
+        if self._sink is not None:
+            self._sink.setVolume(0.0 if self.mute else self.volume)
+    
+    def _submit(self, priority: Priority, start: Callable[[], bool], key: Optional[str] = None,
+                label: str = "") -> bool:
+        """交给调度器，返回是否已开始播放或进入队列"""
+        return self.scheduler.submit(priority, start, key=key, label=label) != DROPPED
     
-    def play_random(self, category: str) -> bool:
-        """随机播放分类中的音频"""
+    def play_random(self, category: str, priority: Priority = Priority.INTERACTION) -> bool:
+        """随机播放分类中的音频（正在播放优先级更高的音频时排队或丢弃，不会提前选取条目）"""
+        return self._submit(priority, partial(self._play_random_now, category), label=f"{category}/随机")
+    
+    def _play_random_now(self, category: str) -> bool:
         print(f"\n[AudioManager] ========== 随机播放 ==========")
         print(f"[AudioManager] 目标分类: {category}")
         
@@ -343,7 +903,7 @@ class AudioManager(QObject):
             return False
         
         cat = self.categories[category]
-        available = len([e for e in cat.entries if e.id not in cat._recent_played])
+        available = len(cat.entries) - len([i for i in cat._recent_played if i in cat._by_id])
         total = len(cat.entries)
         
         print(f"[AudioManager] 分类状态: {available}/{total} 可用 (排除最近{len(cat._recent_played)}条)")
@@ -360,7 +920,45 @@ class AudioManager(QObject):
         
         return self._play_entry(category, entry)
     
-    def play_specific(self, category: str, entry_id: str) -> bool:
+    def prepare_random(self, category: str) -> Optional[AudioEntry]:
+        """预选一条随机音频并在后台提前解码，但不播放也不标记已播放（推测播放用）"""
+        self._prepared = None
+        if category not in self.categories:
+            return None
+        entry = self.categories[category].get_random_entry()
+        if entry is None:
+            return None
+        if self.pcm_cache.enabled and self.categories[category].has_audio(entry.filename):
+            audio_path = self._audio_path(category, entry)
+            if self._bank_clip(audio_path) is None:
+                self._decode_async(str(self._resolve(audio_path)))
+        self._prepared = (category, entry)
+        return entry
+    
+    def play_prepared(self) -> bool:
+        """播放 prepare_random() 预选的条目"""
+        if self._prepared is None:
+            return False
+        category, entry = self._prepared
+        self._prepared = None
+        print(f"\n[AudioManager] 推测播放: {category}/{entry.id}")
+        return self._submit(Priority.INTERACTION, partial(self._play_entry, category, entry),
+                            key=SPECULATIVE_KEY, label=f"{category}/{entry.id}")
+    
+    def discard_prepared(self):
+        """放弃预选的条目"""
+        self._prepared = None
+    
+    def cancel_prepared(self) -> bool:
+        """取消 play_prepared() 提交的播放：正在播放时打断，仍在排队时移出队列（不影响排在前面的音频），
+        返回是否打断了正在播放的音频"""
+        if self.scheduler.is_current(SPECULATIVE_KEY):
+            self.cancel()
+            return True
+        self.scheduler.remove(SPECULATIVE_KEY)
+        return False
+    
+    def play_specific(self, category: str, entry_id: str, priority: Priority = Priority.INTERACTION) -> bool:
         """播放指定条目"""
         if category not in self.categories:
             return False
@@ -371,10 +969,14 @@ class AudioManager(QObject):
         if entry is None:
             return False
         
-        return self._play_entry(category, entry)
+        return self._submit(priority, partial(self._play_entry, category, entry), label=f"{category}/{entry_id}")
 
-    def play_by_trigger(self, category: str, trigger: str) -> bool:
-        """根据trigger随机播放分类中的音频"""
+    def play_by_trigger(self, category: str, trigger: str, priority: Priority = Priority.INTERACTION) -> bool:
+        """根据trigger随机播放分类中的音频（相同 trigger 的请求正在播放或排队时合并）"""
+        return self._submit(priority, partial(self._play_by_trigger_now, category, trigger),
+                            key=f"{category}:{trigger}", label=f"{category}:{trigger}")
+    
+    def _play_by_trigger_now(self, category: str, trigger: str) -> bool:
         print(f"\n[AudioManager] ========== 按Trigger播放 ==========")
         print(f"[AudioManager] 分类: {category}")
         print(f"[AudioManager] Trigger: {trigger}")
@@ -387,7 +989,7 @@ class AudioManager(QObject):
         cat = self.categories[category]
         
         # 统计匹配的条目
-        matching = [e for e in cat.entries if trigger in e.trigger]
+        matching = cat.get_entries_by_trigger(trigger)
         print(f"[AudioManager] 匹配条目数: {len(matching)}")
         
         entry = cat.get_random_entry_by_trigger(trigger)
@@ -403,7 +1005,11 @@ class AudioManager(QObject):
         return self._play_entry(category, entry)
     
     def play_time(self, hour: int, minute: int) -> bool:
-        """播放整点报时"""
+        """播放整点报时（不会被其他音频打断）"""
+        return self._submit(Priority.TIME, partial(self._play_time_now, hour, minute),
+                            key="TimeAnnounce", label=f"报时 {hour:02d}:{minute:02d}")
+    
+    def _play_time_now(self, hour: int, minute: int) -> bool:
         if "TimeAnnounce" not in self.categories:
             return False
         
@@ -430,7 +1036,8 @@ class AudioManager(QObject):
         
         # 合并文本
         combined_text = "".join([e.text for e in error_entries])
-        total_duration = sum([e.duration_ms for e in error_entries]) + self.categories["TimeAnnounce"].correction_delay_ms
+        cat = self.categories["TimeAnnounce"]
+        total_duration = sum([cat.entry_duration_ms(e) for e in error_entries]) + cat.correction_delay_ms
         
         # 发射信号显示合并文本
         self.audio_started.emit("TimeAnnounce", combined_text, total_duration)
@@ -442,7 +1049,7 @@ class AudioManager(QObject):
         """播放下一条时间错误音频"""
         if self._time_error_index >= len(self._time_error_sequence):
             # 序列播放完成
-            self.audio_finished.emit()
+            self._finish_playback()
             return True
         
         entry = self._time_error_sequence[self._time_error_index]
@@ -451,7 +1058,7 @@ class AudioManager(QObject):
         cat = self.categories["TimeAnnounce"]
         audio_path = Path(cat.audio_dir) / entry.filename
         
-        if not audio_path.exists():
+        if not cat.has_audio(entry.filename):
             print(f"[AudioManager] 音频文件不存在: {audio_path}")
             # 跳过这条，播放下一条
             return self._play_time_error_next()
@@ -463,15 +1070,13 @@ class AudioManager(QObject):
         self._current_entry = entry
         self._is_time_error_playing = True
         
-        # 设置音频源
-        from PyQt6.QtCore import QUrl
-        self._player.setSource(QUrl.fromLocalFile(str(audio_path)))
-        
         # 标记已播放
         cat.mark_played(entry.id)
         
-        # 播放
-        self._player.play()
+        # 播放，并预加载序列中的下一条
+        self._start_playback(audio_path)
+        if self._time_error_index < len(self._time_error_sequence):
+            self._prime(Path(cat.audio_dir) / self._time_error_sequence[self._time_error_index].filename)
         
         return True
     
@@ -482,14 +1087,15 @@ class AudioManager(QObject):
         print(f"[AudioManager] 条目ID: {entry.id}")
         print(f"[AudioManager] 文本: {entry.text}")
         print(f"[AudioManager] 文件名: {entry.filename}")
-        print(f"[AudioManager] 时长: {entry.duration_ms}ms")
-        
         cat = self.categories[category]
+        duration_ms = cat.entry_duration_ms(entry)
+        print(f"[AudioManager] 时长: {duration_ms}ms")
+        
         audio_path = Path(cat.audio_dir) / entry.filename
         
         print(f"[AudioManager] 完整路径: {audio_path}")
         
-        if not audio_path.exists():
+        if not cat.has_audio(entry.filename):
             print(f"[AudioManager] ✗ 错误: 音频文件不存在!")
             print(f"[AudioManager] ------------------------------")
             return False
@@ -503,47 +1109,209 @@ class AudioManager(QObject):
         self._current_entry = entry
         self._is_correction_playing = False
         
-        # 设置音频源
-        from PyQt6.QtCore import QUrl
-        self._player.setSource(QUrl.fromLocalFile(str(audio_path)))
-        
         # 标记已播放
         cat.mark_played(entry.id)
         
         # 播放
-        self._player.play()
+        backend = self._start_playback(audio_path)
         
-        print(f"[AudioManager] ✓ 开始播放")
+        print(f"[AudioManager] ✓ 开始播放 ({backend})")
         print(f"[AudioManager] ------------------------------")
         
+        # 带纠正彩蛋的条目：播放期间预加载纠正音频
+        if entry.is_error and entry.correction_filename and cat.has_audio(entry.correction_filename):
+            self._prime(Path(cat.audio_dir) / entry.correction_filename)
+        
         # 发射信号
-        self.audio_started.emit(category, entry.text, entry.duration_ms)
+        self.audio_started.emit(category, entry.text, duration_ms)
         
         return True
     
+    def play_entry_quiet(self, category: str, entry: AudioEntry) -> bool:
+        """播放条目但不发出 audio_started 信号、不标记已播放（用于调用方自行显示文本的序列）
+
+        在 audio_finished 回调中调用时视为同一段播放的延续，不经过调度器。
+        """
+        if self._finishing:
+            return self._play_entry_quiet_now(category, entry)
+        return self._submit(Priority.INTERACTION, partial(self._play_entry_quiet_now, category, entry),
+                            label=f"{category}/{entry.id}")
+    
+    def _play_entry_quiet_now(self, category: str, entry: AudioEntry) -> bool:
+        if not self.categories[category].has_audio(entry.filename):
+            return False
+        audio_path = self._audio_path(category, entry)
+        self.stop()
+        self._current_entry = entry
+        self._current_category = category
+        self._is_correction_playing = False
+        self._start_playback(audio_path)
+        return True
+    
+    def prime_entry(self, category: str, entry: AudioEntry):
+        """预加载调用方接下来要播放的条目（如静音序列的下一条），使衔接没有加载停顿"""
+        if category in self.categories and self.categories[category].has_audio(entry.filename):
+            self._prime(self._audio_path(category, entry))
+    
+    def _prime(self, audio_path: Path):
+        """链式播放的下一段：能走 PCM 缓存的在后台提前解码，否则由空闲的 QMediaPlayer 提前加载"""
+        if self._bank_clip(audio_path) is not None:
+            return
+        audio_path = self._resolve(audio_path)
+        if self.pcm_cache.enabled:
+            clip = self.pcm_cache.lookup(str(audio_path))
+            if clip is None:
+                self._decode_async(str(audio_path), partial(self._on_prime_decoded, audio_path, self._generation))
+                return
+            if clip.sample_width in PCM_SAMPLE_FORMATS:
+                return
+        self._players.prime(audio_path)
+    
+    def _on_prime_decoded(self, audio_path: Path, generation: int, clip: Optional[PcmClip]):
+        """预加载的后台解码完成（主线程）：无法走 QAudioSink 时改由空闲播放器预加载"""
+        if generation != self._generation:
+            return
+        if clip is None or clip.sample_width not in PCM_SAMPLE_FORMATS:
+            self._players.prime(audio_path)
+    
+    def _decode_async(self, path: str, callback: Optional[Callable[[Optional[PcmClip]], None]] = None):
+        """在线程池中解码并放入缓存，完成后在主线程调用 callback(clip)"""
+        pending = self._decoding.get(path)
+        if pending is not None:
+            if callback is not None:
+                pending[1].append(callback)
+            return
+        task = PcmDecodeTask(self.pcm_cache, path)
+        task.signals.finished.connect(self._on_pcm_decoded)
+        self._decoding[path] = (task, [callback] if callback is not None else [])
+        self._decode_pool.start(task)
+    
+    def _on_pcm_decoded(self, path: str, clip: Optional[PcmClip]):
+        pending = self._decoding.pop(path, None)
+        if pending is None:
+            return
+        for callback in pending[1]:
+            callback(clip)
+    
+    def _start_playback(self, audio_path: Path) -> str:
+        """开始播放音频文件，返回使用的后端描述"""
+        clip = self._bank_clip(audio_path)
+        if clip is not None and self._play_pcm(clip):
+            return "音频包"
+        audio_path = self._resolve(audio_path)
+        clip = self.pcm_cache.lookup(str(audio_path)) if self.pcm_cache.enabled else None
+        if clip is not None and self._play_pcm(clip):
+            return "PCM缓存"
+        if clip is None and self.pcm_cache.enabled:
+            # 未命中时不在 GUI 线程解码：这次由 QMediaPlayer 播放，后台解码供下次使用
+            self._decode_async(str(audio_path))
+        # 先置位：文件无效时错误通知可能在 play() 中同步发出
+        self._player_playing = True
+        if self._players.play(audio_path):
+            return "QMediaPlayer（已预加载）"
+        return "QMediaPlayer"
+    
+    def _play_pcm(self, clip: PcmClip) -> bool:
+        """通过 QAudioSink 播放已解码的 PCM（缓存中的数据或音频包的映射区），格式不受支持时返回 False"""
+        sample_format = PCM_SAMPLE_FORMATS.get(clip.sample_width)
+        if sample_format is None:
+            return False
+        format_key = (clip.sample_rate, clip.channels, clip.sample_width)
+        if self._sink is None or self._sink_format != format_key:
+            audio_format = QAudioFormat()
+            audio_format.setSampleRate(clip.sample_rate)
+            audio_format.setChannelCount(clip.channels)
+            audio_format.setSampleFormat(sample_format)
+            device = QMediaDevices.defaultAudioOutput()
+            if device.isNull() or not device.isFormatSupported(audio_format):
+                return False
+            if self._sink is not None:
+                self._sink.stateChanged.disconnect(self._on_sink_state_changed)
+                self._sink.stop()
+                self._sink.deleteLater()
+            self._sink = QAudioSink(device, audio_format, self)
+            self._sink.stateChanged.connect(self._on_sink_state_changed)
+            self._sink_format = format_key
+            self._update_sink_volume()
+        
+        old_device = self._sink_device
+        self._sink_device = PcmDevice(clip.data, self)
+        self._sink_device.open(QIODevice.OpenModeFlag.ReadOnly)
+        self._sink_playing = True
+        self._sink_announced = False
+        self._sink_started_at = time.monotonic()
+        self._sink_duration_ms = clip.duration_ms
+        self._sink.start(self._sink_device)
+        if old_device is not None:
+            old_device.close()
+            old_device.deleteLater()
+        if self._sink.error() != QAudio.Error.NoError:
+            # 设备拒绝（如打开失败）时不会再有状态变化通知，交给下一个后端
+            print(f"[AudioCache] QAudioSink 无法开始播放: {self._sink.error()}")
+            self._sink_playing = False
+            self._sink.stop()
+            return False
+        return True
+    
+    def _on_sink_state_changed(self, state):
+        """QAudioSink 状态变更：数据播完进入 IdleState 视为播放结束"""
+        if state == QAudio.State.ActiveState and self._sink_playing and not self._sink_announced:
+            self._sink_announced = True
+            self.playback_started.emit(time.perf_counter())
+        elif state == QAudio.State.IdleState and self._sink_playing:
+            self._sink_playing = False
+            self._sink.stop()
+            self._on_playback_end()
+        elif state == QAudio.State.StoppedState and self._sink_playing \
+                and self._sink.error() != QAudio.Error.NoError:
+            print(f"[AudioCache] QAudioSink 播放出错: {self._sink.error()}")
+            self._sink_playing = False
+            self._on_playback_end()
+    
+    def _on_player_state_changed(self, state):
+        if state == QMediaPlayer.PlaybackState.PlayingState:
+            self.playback_started.emit(time.perf_counter())
+    
     def _on_media_status_changed(self, status):
-        """媒体状态变更回调"""
-        if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            # 检查是否正在播放时间错误序列
-            if hasattr(self, '_is_time_error_playing') and self._is_time_error_playing:
-                self._is_time_error_playing = False
-                # 延迟后播放下一条
-                if hasattr(self, '_time_error_sequence') and self._time_error_index < len(self._time_error_sequence):
-                    from PyQt6.QtCore import QTimer
-                    delay = self.categories["TimeAnnounce"].correction_delay_ms
-                    QTimer.singleShot(delay, self._play_time_error_next)
-                    return
-                else:
-                    self._finish_playback()
-                    return
-            
-            # 检查是否需要播放纠正音频（彩蛋）
-            if (self._current_entry and self._current_entry.is_error 
-                and self._current_entry.correction_filename
-                and not self._is_correction_playing):
-                self._play_correction()
+        """媒体状态变更回调：播完或文件无效都视为这一段结束"""
+        if status == QMediaPlayer.MediaStatus.InvalidMedia:
+            print("[AudioManager] QMediaPlayer: 无效的媒体文件")
+        elif status != QMediaPlayer.MediaStatus.EndOfMedia:
+            return
+        self._end_player_playback()
+    
+    def _on_player_error(self, error, text: str):
+        print(f"[AudioManager] QMediaPlayer 播放出错: {error} {text}")
+        self._end_player_playback()
+    
+    def _end_player_playback(self):
+        """QMediaPlayer 的一段音频结束（出错和 InvalidMedia 可能先后到达，只处理一次）"""
+        if not self._player_playing:
+            return
+        self._player_playing = False
+        self._on_playback_end()
+    
+    def _on_playback_end(self):
+        """一段音频播放结束（QMediaPlayer 和 QAudioSink 共用）"""
+        # 检查是否正在播放时间错误序列
+        if self._is_time_error_playing:
+            self._is_time_error_playing = False
+            # 延迟后播放下一条
+            if self._time_error_index < len(self._time_error_sequence):
+                delay = self.categories["TimeAnnounce"].correction_delay_ms
+                self._after(delay, self._play_time_error_next)
+                return
             else:
                 self._finish_playback()
+                return
+        
+        # 检查是否需要播放纠正音频（彩蛋）
+        if (self._current_entry and self._current_entry.is_error 
+            and self._current_entry.correction_filename
+            and not self._is_correction_playing):
+            self._play_correction()
+        else:
+            self._finish_playback()
     
     def _play_correction(self):
         """播放纠正音频（彩蛋）"""
@@ -556,8 +1324,7 @@ class AudioManager(QObject):
             return
         
         # 延迟后播放纠正
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(cat.correction_delay_ms, self._do_play_correction)
+        self._after(cat.correction_delay_ms, self._do_play_correction)
     
     def _do_play_correction(self):
         """实际播放纠正音频"""
@@ -571,34 +1338,84 @@ class AudioManager(QObject):
         
         correction_path = Path(cat.audio_dir) / entry.correction_filename
         
-        if correction_path.exists():
+        if cat.has_audio(entry.correction_filename):
             self._is_correction_playing = True
-            self._player.setSource(str(correction_path))
-            self._player.play()
+            self._start_playback(correction_path)
             
             # 发射纠正信号
             self.audio_started.emit(
                 self._current_category, 
                 entry.correction_text, 
-                2000  # 默认纠正音频时长
+                cat.file_duration_ms(entry.correction_filename, 2000)  # 时长未知时默认 2000ms
             )
         else:
             self._finish_playback()
     
+    def _after(self, delay_ms: int, callback: Callable[[], object]):
+        """延迟执行链式播放的下一步；期间被打断或取消则不再执行"""
+        generation = self._generation
+        QTimer.singleShot(delay_ms, lambda: generation == self._generation and callback())
+    
     def _finish_playback(self):
         """完成播放"""
         self._current_category = None
         self._current_entry = None
         self._is_correction_playing = False
-        self.audio_finished.emit()
+        self._finishing = True
+        try:
+            self.audio_finished.emit()
+        finally:
+            self._finishing = False
+        # 回调中没有接着播放链式音频时，开始播放队列中的下一条
+        if self._current_entry is None:
+            self.scheduler.finished()
+    
+    def _interrupt(self):
+        """停止当前音频并放弃未完成的链式播放（纠正彩蛋、报时错误序列）"""
+        self._generation += 1
+        self.stop()
+        self._players.discard_primed()
+        self._current_category = None
+        self._current_entry = None
+        self._is_correction_playing = False
+        self._is_time_error_playing = False
+    
+    def cancel(self, clear_queue: bool = False):
+        """取消当前播放；clear_queue 为 False 时接着播放队列中的下一条"""
+        if clear_queue:
+            self.scheduler.clear()
+        self._interrupt()
+        self.scheduler.finished()
     
     def stop(self):
         """停止播放"""
-        self._player.stop()
+        self._player_playing = False
+        self._players.stop()
+        if self._sink is not None and self._sink_playing:
+            self._sink_playing = False
+            self._sink.stop()
     
     def is_playing(self) -> bool:
         """是否正在播放"""
-        return self._player.playbackState() == QMediaPlayer.PlaybackState.PlayingState
+        if self._players.playback_state() == QMediaPlayer.PlaybackState.PlayingState:
+            return True
+        # 按时长兜底，避免在不处理事件的等待循环中收不到 IdleState
+        if self._sink_playing:
+            elapsed_ms = (time.monotonic() - self._sink_started_at) * 1000
+            return elapsed_ms < self._sink_duration_ms + 500
+        return False
+    
+    def entry_duration_ms(self, category: str, entry: AudioEntry) -> int:
+        """条目的实际时长（毫秒）"""
+        return self.categories[category].entry_duration_ms(entry)
+    
+    def scheduler_stats(self) -> dict:
+        """播放调度统计（队列长度、打断次数、各原因的丢弃次数）"""
+        return self.scheduler.stats()
+    
+    def cache_stats(self) -> dict:
+        """解码缓存统计（条目数、字节数、命中/未命中、淘汰次数）"""
+        return self.pcm_cache.stats()
     
     def reset_daily(self):
         """重置每日记录"""
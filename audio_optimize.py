@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+音频离线优化 - 裁掉首尾静音、按 BS.1770 积分响度（LUFS）统一音量、重采样到输出设备的采样率，
+结果写入 cache/optimized_audio（保持 Assets/Audio 下的相对路径）并附 manifest.json；
+AudioManager 播放时优先使用源文件未变化的优化版本
+
+多进程并行处理；装有 NumPy 时用它做向量化计算，否则使用标准库实现（结果相同，速度较慢）。
+K 加权滤波是递归滤波器，两种实现都逐采样用纯 Python 计算：每秒音频每个声道约 30ms，
+连同解码和重采样一条 3 秒的语音约 0.3 秒（单核 x86 实测），几百条单进程约需一两分钟，多核时按进程数缩短。
+源文件与参数都没变的音频会跳过。
+
+    python audio_optimize.py [Assets目录] [--lufs -16] [--rate 48000] [--workers N] [--force]
+"""
+import array
+import json
+import math
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from asset_manifest import CATEGORY_FOLDERS, AssetInfo, AssetManifest, audio_sources, relative_key
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+OPTIMIZE_VERSION = 2  # 2: K 加权改用 BS.1770 标准系数，旧结果需要重新处理
+DEFAULT_OUTPUT_DIR = "cache/optimized_audio"
+MANIFEST_NAME = "manifest.json"
+DEFAULT_TARGET_LUFS = -16.0
+DEFAULT_SAMPLE_RATE = 48000
+# 峰值超过 -1 dBFS 时降低增益，不做限幅
+PEAK_CEILING_DB = -1.0
+# 低于 -50 dBFS 视为静音；裁剪后在首尾各保留 10ms
+SILENCE_THRESHOLD_DB = -50.0
+TRIM_PAD_MS = 10
+# BS.1770 门限：400ms 块、75% 重叠，绝对门限 -70 LUFS，相对门限 -10 LU
+BLOCK_MS = 400
+BLOCK_STEP_MS = 100
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# K 加权滤波器的模拟原型（与 BS.1770 在 48kHz 下给出的系数一致）
+K_SHELF_FREQ = 1681.974450955533
+K_SHELF_GAIN_DB = 3.999843853973347
+K_SHELF_Q = 0.7071752369554196
+K_SHELF_VB_EXPONENT = 0.4996667741545416
+K_HIGH_PASS_FREQ = 38.13547087602444
+K_HIGH_PASS_Q = 0.5003270373238773
+
+SAMPLE_TYPECODES = {1: 'B', 2: 'h', 4: 'i'}
+
+
+def _db_to_gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+# ---------- 解码 / 编码 ----------
+
+def _decode(data: bytes, sample_width: int, channels: int) -> list:
+    """PCM 字节 -> 每个声道一组 [-1, 1) 的浮点采样"""
+    if np is not None:
+        dtype = {1: np.uint8, 2: '<i2', 4: '<i4'}[sample_width]
+        samples = np.frombuffer(data, dtype=dtype).astype(np.float64)
+        if sample_width == 1:
+            samples -= 128
+        samples /= 2 ** (8 * sample_width - 1)
+        return list(samples.reshape(-1, channels).T)
+    samples = array.array(SAMPLE_TYPECODES[sample_width])
+    samples.frombytes(data[:len(data) - len(data) % samples.itemsize])
+    if sys.byteorder == 'big' and sample_width > 1:
+        samples.byteswap()
+    offset = 128 if sample_width == 1 else 0
+    scale = 1 / 2 ** (8 * sample_width - 1)
+    return [[(s - offset) * scale for s in samples[c::channels]] for c in range(channels)]
+
+
+def _encode(channels: list) -> bytes:
+    """浮点采样 -> 16 位交错 PCM"""
+    if np is not None:
+        frames = np.clip(np.round(np.vstack(channels).T * 32767), -32768, 32767).astype('<i2')
+        return frames.tobytes()
+    out = array.array('h', bytes(2 * len(channels) * len(channels[0])))
+    for c, samples in enumerate(channels):
+        out[c::len(channels)] = array.array('h', (max(-32768, min(32767, round(s * 32767))) for s in samples))
+    if sys.byteorder == 'big':
+        out.byteswap()
+    return out.tobytes()
+
+
+# ---------- 静音裁剪 ----------
+
+def _audible_bounds(channels: list, threshold: float) -> tuple:
+    """第一个和最后一个超过门限的帧 (start, end)，全是静音时为 (0, 0)"""
+    if np is not None:
+        peak = np.max(np.abs(np.vstack(channels)), axis=0)
+        loud = np.flatnonzero(peak > threshold)
+        return (int(loud[0]), int(loud[-1]) + 1) if loud.size else (0, 0)
+    frames = len(channels[0])
+
+    def loud(i):
+        return any(abs(samples[i]) > threshold for samples in channels)
+
+    start = next((i for i in range(frames) if loud(i)), None)
+    if start is None:
+        return 0, 0
+    end = next(i for i in range(frames - 1, start - 1, -1) if loud(i)) + 1
+    return start, end
+
+
+def _peak(channels: list) -> float:
+    if np is not None:
+        return float(np.max(np.abs(np.vstack(channels))))
+    return max(max(abs(s) for s in samples) for samples in channels)
+
+
+# ---------- 响度 ----------
+
+def _k_weighting(rate: int) -> list:
+    """K 加权滤波器（高架 + 高通）的双二阶系数 [(b0, b1, b2, a1, a2)]
+
+    由模拟原型经双线性变换得到（与 libebur128 相同），48kHz 时即 BS.1770 给出的系数
+    """
+    # 高架：+4dB，约 1.68kHz
+    k = math.tan(math.pi * K_SHELF_FREQ / rate)
+    vh = 10 ** (K_SHELF_GAIN_DB / 20)
+    vb = vh ** K_SHELF_VB_EXPONENT
+    a0 = 1 + k / K_SHELF_Q + k * k
+    shelf = ((vh + vb * k / K_SHELF_Q + k * k) / a0,
+             2 * (k * k - vh) / a0,
+             (vh - vb * k / K_SHELF_Q + k * k) / a0,
+             2 * (k * k - 1) / a0,
+             (1 - k / K_SHELF_Q + k * k) / a0)
+    # 高通：约 38Hz
+    k = math.tan(math.pi * K_HIGH_PASS_FREQ / rate)
+    a0 = 1 + k / K_HIGH_PASS_Q + k * k
+    high_pass = (1.0, -2.0, 1.0,
+                 2 * (k * k - 1) / a0,
+                 (1 - k / K_HIGH_PASS_Q + k * k) / a0)
+    return [shelf, high_pass]
+
+
+def _biquad(samples, coefficients) -> list:
+    b0, b1, b2, a1, a2 = coefficients
+    x1 = x2 = y1 = y2 = 0.0
+    out = []
+    append = out.append
+    for x in samples:
+        y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x2, x1, y2, y1 = x1, x, y1, y
+        append(y)
+    return out
+
+
+def integrated_loudness(channels: list, rate: int) -> float:
+    """BS.1770 积分响度（LUFS，各声道权重为 1），全是静音时为 -inf"""
+    filters = _k_weighting(rate)
+    weighted = []
+    for samples in channels:
+        samples = samples.tolist() if np is not None else samples
+        for coefficients in filters:
+            samples = _biquad(samples, coefficients)
+        weighted.append(samples)
+    frames = len(weighted[0])
+    block = max(1, min(frames, rate * BLOCK_MS // 1000))
+    step = max(1, rate * BLOCK_STEP_MS // 1000)
+    starts = range(0, frames - block + 1, step) if frames >= block else [0]
+    if np is not None:
+        squares = np.vstack(weighted) ** 2
+        cumulative = np.concatenate((np.zeros((len(weighted), 1)), np.cumsum(squares, axis=1)), axis=1)
+        starts = np.asarray(starts)
+        powers = ((cumulative[:, starts + block] - cumulative[:, starts]) / block).sum(axis=0).tolist()
+    else:
+        cumulative = []
+        for samples in weighted:
+            total = 0.0
+            running = [0.0]
+            for s in samples:
+                total += s * s
+                running.append(total)
+            cumulative.append(running)
+        powers = [sum((running[i + block] - running[i]) / block for running in cumulative) for i in starts]
+
+    def to_lufs(power):
+        return -0.691 + 10 * math.log10(power) if power > 0 else float('-inf')
+
+    gated = [p for p in powers if to_lufs(p) > ABSOLUTE_GATE]
+    if not gated:
+        return float('-inf')
+    threshold = to_lufs(sum(gated) / len(gated)) + RELATIVE_GATE
+    gated = [p for p in gated if to_lufs(p) > threshold]
+    return to_lufs(sum(gated) / len(gated))
+
+
+# ---------- 重采样 ----------
+
+def _resample(samples, source_rate: int, target_rate: int):
+    """线性插值重采样（语音素材多为升采样；降采样时不额外做低通）"""
+    frames = len(samples)
+    count = max(1, round(frames * target_rate / source_rate))
+    ratio = source_rate / target_rate
+    if np is not None:
+        return np.interp(np.arange(count) * ratio, np.arange(frames), samples)
+    out = []
+    last = frames - 1
+    for i in range(count):
+        position = i * ratio
+        index = int(position)
+        if index >= last:
+            out.append(samples[last])
+            continue
+        fraction = position - index
+        out.append(samples[index] + (samples[index + 1] - samples[index]) * fraction)
+    return out
+
+
+# ---------- 单个文件 ----------
+
+def optimize_clip(source: str, target: str, target_lufs: float, sample_rate: int) -> dict:
+    """优化一个 WAV 文件并写入 target，返回记录（失败时含 error）"""
+    try:
+        stat = os.stat(source)
+        with wave.open(source, 'rb') as f:
+            rate, channel_count, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+            data = f.readframes(f.getnframes())
+    except (OSError, EOFError, wave.Error) as e:
+        return {'error': str(e)}
+    if width not in SAMPLE_TYPECODES or not data:
+        return {'error': f"不支持的采样格式（{width * 8} 位）"}
+
+    channels = _decode(data, width, channel_count)
+    frames = len(channels[0])
+    start, end = _audible_bounds(channels, _db_to_gain(SILENCE_THRESHOLD_DB))
+    if end:
+        pad = rate * TRIM_PAD_MS // 1000
+        start, end = max(0, start - pad), min(frames, end + pad)
+        channels = [samples[start:end] for samples in channels]
+    else:
+        start = end = 0
+
+    loudness = integrated_loudness(channels, rate) if end else float('-inf')
+    gain_db = target_lufs - loudness if math.isfinite(loudness) else 0.0
+    peak = _peak(channels)
+    if peak > 0:
+        gain_db = min(gain_db, PEAK_CEILING_DB - 20 * math.log10(peak))
+    gain = _db_to_gain(gain_db)
+    if np is not None:
+        channels = [samples * gain for samples in channels]
+    else:
+        channels = [[s * gain for s in samples] for samples in channels]
+    if rate != sample_rate:
+        channels = [_resample(samples, rate, sample_rate) for samples in channels]
+
+    output = _encode(channels)
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target + ".tmp"
+    with wave.open(tmp_path, 'wb') as f:
+        f.setnchannels(channel_count)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(output)
+    os.replace(tmp_path, target)
+    result = os.stat(target)
+    return {
+        'source': [stat.st_size, stat.st_mtime_ns],
+        'output': [result.st_size, result.st_mtime_ns],
+        'duration_ms': len(output) * 1000 // (2 * channel_count * sample_rate),
+        'lead_ms': start * 1000 // rate,
+        'tail_ms': (frames - end) * 1000 // rate if end else 0,
+        'loudness': round(loudness, 2) if math.isfinite(loudness) else None,
+        'gain_db': round(gain_db, 2),
+    }
+
+
+# ---------- 运行时 ----------
+
+class OptimizedAudio:
+    """已优化的音频集合：源文件未变化且优化结果完好的条目才会被使用"""
+    def __init__(self, directory: str = DEFAULT_OUTPUT_DIR, audio_dir: str = "Assets/Audio"):
+        self.directory = Path(directory)
+        self.audio_dir = os.path.normpath(str(audio_dir))
+        self.settings: dict = {}
+        self.files: Dict[str, dict] = {}
+
+    def load(self) -> int:
+        """读取 manifest 并用一次目录扫描核对输出文件，返回可用的数量"""
+        self.files = {}
+        manifest_path = self.directory / MANIFEST_NAME
+        if not manifest_path.exists():
+            return 0
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[AudioOptimize] 读取优化清单失败，已忽略: {e}")
+            return 0
+        if data.get('version') != OPTIMIZE_VERSION:
+            return 0
+        self.settings = data.get('settings', {})
+        outputs = AssetManifest()
+        outputs.scan(self.directory)
+        for key, record in data.get('files', {}).items():
+            info = outputs.get(self.directory, key)
+            if info is not None and [info.size, info.mtime_ns] == record['output']:
+                self.files[key] = record
+        return len(self.files)
+
+    def path_for(self, path, source: Optional[AssetInfo]) -> Optional[Path]:
+        """源文件对应的优化版本；source 为源文件清单信息，与优化时不同则返回 None"""
+        key = relative_key(path, self.audio_dir)
+        record = self.files.get(key) if key is not None else None
+        if record is None:
+            return None
+        if source is not None and [source.size, source.mtime_ns] != record['source']:
+            return None
+        return self.directory / key
+
+    def __len__(self):
+        return len(self.files)
+
+
+# ---------- 命令行 ----------
+
+def _configured_rate() -> int:
+    """config.json 中的 audio_sample_rate"""
+    try:
+        with open("config.json", 'r', encoding='utf-8') as f:
+            return int(json.load(f).get("audio_sample_rate", DEFAULT_SAMPLE_RATE))
+    except (OSError, ValueError, TypeError):
+        return DEFAULT_SAMPLE_RATE
+
+
+def optimize_assets(assets_dir: str = "Assets", output_dir: str = DEFAULT_OUTPUT_DIR,
+                    target_lufs: float = DEFAULT_TARGET_LUFS, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                    workers: Optional[int] = None, force: bool = False) -> dict:
+    """优化全部音频，返回 {optimized, reused, failed: {文件: 原因}, removed}"""
+    audio_dir = Path(assets_dir) / "Audio"
+    output_dir = Path(output_dir)
+    manifest = AssetManifest()
+    for folder in dict.fromkeys(CATEGORY_FOLDERS.values()):
+        manifest.scan(audio_dir / folder)
+    sources = audio_sources(manifest, audio_dir)
+
+    settings = {'target_lufs': target_lufs, 'sample_rate': sample_rate,
+                'threshold_db': SILENCE_THRESHOLD_DB, 'pad_ms': TRIM_PAD_MS, 'peak_db': PEAK_CEILING_DB}
+    previous = OptimizedAudio(str(output_dir), str(audio_dir))
+    previous.load()
+    reuse = not force and previous.settings == settings
+
+    files: Dict[str, dict] = {}
+    pending = []
+    for key, (path, info) in sorted(sources.items()):
+        record = previous.files.get(key) if reuse else None
+        if record is not None and record['source'] == [info.size, info.mtime_ns]:
+            files[key] = record
+        else:
+            pending.append((key, path))
+
+    failed = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(optimize_clip, path, str(output_dir / key), target_lufs, sample_rate): key
+                       for key, path in pending}
+            for future in as_completed(futures):
+                key = futures[future]
+                record = future.result()
+                if 'error' in record:
+                    failed[key] = record['error']
+                else:
+                    files[key] = record
+
+    # 删除源文件已不存在的优化结果
+    removed = 0
+    for key in previous.files:
+        if key not in sources:
+            try:
+                os.remove(output_dir / key)
+                removed += 1
+            except OSError:
+                pass
+
+    data = {'version': OPTIMIZE_VERSION, 'settings': settings, 'files': dict(sorted(files.items()))}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+    return {'optimized': len(pending) - len(failed), 'reused': len(files) - len(pending) + len(failed),
+            'failed': failed, 'removed': removed}
+
+
+def main(argv: List[str]) -> int:
+    assets_dir = "Assets"
+    target_lufs = DEFAULT_TARGET_LUFS
+    sample_rate = None
+    workers = None
+    force = False
+    args = iter(argv)
+    for arg in args:
+        if arg == "--lufs":
+            target_lufs = float(next(args, target_lufs))
+        elif arg == "--rate":
+            sample_rate = int(next(args, DEFAULT_SAMPLE_RATE))
+        elif arg == "--workers":
+            workers = int(next(args, 0)) or None
+        elif arg == "--force":
+            force = True
+        else:
+            assets_dir = arg
+    sample_rate = sample_rate or _configured_rate()
+    start = time.perf_counter()
+    result = optimize_assets(assets_dir, DEFAULT_OUTPUT_DIR, target_lufs, sample_rate, workers, force)
+    elapsed = time.perf_counter() - start
+    for key, error in result['failed'].items():
+        print(f"未优化 {key}: {error}")
+    print(f"优化 {result['optimized']} 个，沿用 {result['reused']} 个，删除 {result['removed']} 个 -> "
+          f"{DEFAULT_OUTPUT_DIR}（{target_lufs} LUFS, {sample_rate} Hz, "
+          f"{'NumPy' if np is not None else '标准库'}，{elapsed:.1f} 秒）")
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+城市索引 - 从 Assets/Data/cities.txt 懒加载城市坐标，坐标存放在紧凑数组中，
+名称和别名存放在前缀树中，支持别名、后缀归一化和前缀补全，
+以及基于 k-d 树的最近城市查询（坐标 -> 城市）
+"""
+import math
+import threading
+from array import array
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+DEFAULT_CITY_FILE = "Assets/Data/cities.txt"
+
+# 查询时可去掉的行政区划后缀（长的在前）；城市表不含区县，区/县/旗等县级后缀不去掉，
+# 否则“朝阳区”（北京）会被当成辽宁的朝阳
+ADMIN_SUFFIXES = ('特别行政区', '自治州', '地区', '市', '州', '盟')
+
+_END = ''  # 前缀树终止标记（名称中不会出现空字符串）
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def lnglat_to_xyz(lng: float, lat: float) -> Tuple[float, float, float]:
+    """经纬度 -> 单位球面坐标（弦长与球面距离单调对应）"""
+    lng_rad = math.radians(lng)
+    lat_rad = math.radians(lat)
+    cos_lat = math.cos(lat_rad)
+    return cos_lat * math.cos(lng_rad), cos_lat * math.sin(lng_rad), math.sin(lat_rad)
+
+
+def chord_to_km(chord: float) -> float:
+    """单位球弦长 -> 球面距离（公里）"""
+    return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+
+
+class KDTree:
+    """三维 k-d 树（隐式存储：每段中点为节点，按深度轮换切分轴）"""
+    def __init__(self, points: array):
+        self._points = points  # 交错存放 [x0, y0, z0, x1, ...]
+        count = len(points) // 3
+        self._order = array('i', range(count))
+        self._build(0, count, 0)
+
+    def _build(self, lo: int, hi: int, depth: int):
+        if hi - lo <= 1:
+            return
+        axis = depth % 3
+        points = self._points
+        self._order[lo:hi] = array('i', sorted(self._order[lo:hi], key=lambda i: points[i * 3 + axis]))
+        mid = (lo + hi) // 2
+        self._build(lo, mid, depth + 1)
+        self._build(mid + 1, hi, depth + 1)
+
+    def nearest(self, x: float, y: float, z: float) -> Tuple[int, float]:
+        """最近点查询，返回 (下标, 欧氏距离)；空树返回 (-1, inf)"""
+        points = self._points
+        order = self._order
+        query = (x, y, z)
+        best = [-1, math.inf]  # 下标, 距离平方
+
+        def search(lo: int, hi: int, depth: int):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            index = order[mid]
+            base = index * 3
+            dx = x - points[base]
+            dy = y - points[base + 1]
+            dz = z - points[base + 2]
+            dist2 = dx * dx + dy * dy + dz * dz
+            if dist2 < best[1]:
+                best[0], best[1] = index, dist2
+            axis = depth % 3
+            diff = query[axis] - points[base + axis]
+            if diff < 0:
+                search(lo, mid, depth + 1)
+                if diff * diff < best[1]:
+                    search(mid + 1, hi, depth + 1)
+            else:
+                search(mid + 1, hi, depth + 1)
+                if diff * diff < best[1]:
+                    search(lo, mid, depth + 1)
+
+        search(0, len(order), 0)
+        return best[0], math.sqrt(best[1])
+
+
+class CityIndex:
+    """城市坐标索引（首次查询时加载）"""
+    def __init__(self, path: str = DEFAULT_CITY_FILE):
+        self.path = Path(path)
+        self.names: List[str] = []  # 下标 -> 规范名称
+        self.coords = array('d')  # 交错存放 [经度0, 纬度0, 经度1, 纬度1, ...]
+        self._trie: dict = {}
+        self._kdtree: Optional[KDTree] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._load()
+            self._loaded = True
+
+    def _load(self):
+        if not self.path.exists():
+            print(f"[CityIndex] 城市数据文件不存在: {self.path}")
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = line.split('\t')
+                try:
+                    name, lng, lat = fields[0], float(fields[1]), float(fields[2])
+                except (IndexError, ValueError):
+                    print(f"[CityIndex] 忽略格式错误的行 {line_no}: {line}")
+                    continue
+                index = len(self.names)
+                self.names.append(name)
+                self.coords.append(lng)
+                self.coords.append(lat)
+                self._insert(name, index)
+                if len(fields) > 3:
+                    for alias in fields[3].split(','):
+                        if alias.strip():
+                            self._insert(alias.strip(), index)
+        print(f"[CityIndex] 已加载 {len(self.names)} 个城市")
+
+    def _insert(self, key: str, index: int):
+        node = self._trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        # 同名键保留第一次出现的城市
+        node.setdefault(_END, index)
+
+    def _find_node(self, key: str) -> Optional[dict]:
+        node = self._trie
+        for ch in key:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _exact(self, key: str) -> Optional[int]:
+        node = self._find_node(key)
+        if node is None:
+            return None
+        return node.get(_END)
+
+    def _collect(self, node: dict, prefix: str, limit: int, result: list):
+        """深度优先收集前缀下的键（前缀本身在前，其余按字符顺序）"""
+        if _END in node:
+            result.append((prefix, node[_END]))
+            if len(result) >= limit:
+                return
+        for ch in sorted(k for k in node if k != _END):
+            self._collect(node[ch], prefix + ch, limit, result)
+            if len(result) >= limit:
+                return
+
+    def _lookup_index(self, name: str) -> Optional[int]:
+        """名称 -> 城市下标：精确/别名 -> 去后缀 -> 唯一前缀"""
+        name = name.strip()
+        if not name:
+            return None
+        index = self._exact(name)
+        if index is not None:
+            return index
+        for suffix in ADMIN_SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix) + 1:
+                index = self._exact(name[:-len(suffix)])
+                if index is not None:
+                    return index
+        node = self._find_node(name)
+        if node is not None:
+            matches = []
+            self._collect(node, name, 8, matches)
+            candidates = {i for _, i in matches}
+            if len(candidates) == 1:
+                return candidates.pop()
+        return None
+
+    def get(self, name: str) -> Optional[Tuple[float, float]]:
+        """获取城市坐标 (经度, 纬度)，找不到返回 None"""
+        self._ensure_loaded()
+        index = self._lookup_index(name)
+        if index is None:
+            return None
+        return self.coords[index * 2], self.coords[index * 2 + 1]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """获取规范城市名（别名/带后缀的名称会被归一化）"""
+        self._ensure_loaded()
+        index = self._lookup_index(name)
+        if index is None:
+            return None
+        return self.names[index]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """前缀补全，返回匹配的名称和别名"""
+        self._ensure_loaded()
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+        result = []
+        self._collect(node, prefix, limit, result)
+        return [key for key, _ in result]
+
+    def nearest(self, lng: float, lat: float) -> Optional[Tuple[str, float]]:
+        """最近的城市，返回 (城市名, 距离公里)；没有城市数据时返回 None"""
+        self._ensure_loaded()
+        if not self.names:
+            return None
+        if self._kdtree is None:
+            with self._lock:
+                if self._kdtree is None:
+                    xyz = array('d')
+                    for i in range(len(self.names)):
+                        xyz.extend(lnglat_to_xyz(self.coords[i * 2], self.coords[i * 2 + 1]))
+                    self._kdtree = KDTree(xyz)
+        index, chord = self._kdtree.nearest(*lnglat_to_xyz(lng, lat))
+        return self.names[index], chord_to_km(chord)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self.names)
+
+
+# 全局共享索引
+CITY_INDEX = CityIndex()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+CPU采样器 - 后台线程非阻塞采样CPU使用率，结果写入定长环形缓冲区
+"""
+import threading
+from array import array
+from typing import Optional
+
+import psutil
+
+
+class RingBuffer:
+    """定长环形缓冲区（基于 array，线程安全）"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = array('d', [0.0]) * capacity
+        self._index = 0  # 下一个写入位置
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, value: float):
+        """写入一个值，满时覆盖最旧的值"""
+        with self._lock:
+            self._data[self._index] = value
+            self._index = (self._index + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def latest(self) -> Optional[float]:
+        """最近一次写入的值"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self._data[self._index - 1]
+
+    def average(self, n: int = 0) -> Optional[float]:
+        """最近 n 个值的平均（n<=0 表示全部）"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            if n <= 0 or n > self._count:
+                n = self._count
+            start = self._index - n
+            if start >= 0:
+                total = sum(self._data[start:self._index])
+            else:
+                total = sum(self._data[start:]) + sum(self._data[:self._index])
+            return total / n
+
+    def values(self) -> list:
+        """按时间顺序返回所有值（旧 -> 新）"""
+        with self._lock:
+            if self._count < self.capacity:
+                return list(self._data[:self._count])
+            return list(self._data[self._index:]) + list(self._data[:self._index])
+
+    def __len__(self):
+        return self._count
+
+
+class CpuSampler:
+    """CPU使用率采样线程
+
+    使用 psutil.cpu_percent(interval=None) 基于上一次采样做差值计算，
+    不会阻塞调用线程；GUI 线程只读取缓冲区。
+    """
+    def __init__(self, interval: float = 1.0, history_seconds: int = 300):
+        self.interval = interval
+        self.history = RingBuffer(max(1, int(history_seconds / interval)))
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动采样线程（重复调用无副作用）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="CpuSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        # 第一次调用只建立基准，返回值无意义
+        psutil.cpu_percent(interval=None)
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.history.append(psutil.cpu_percent(interval=None))
+            except Exception as e:
+                print(f"[CPU] 采样失败: {e}")
+
+    def latest(self) -> Optional[float]:
+        """最新采样值（%）"""
+        return self.history.latest()
+
+    def average(self, seconds: float) -> Optional[float]:
+        """最近 seconds 秒内的平均使用率（%）"""
+        return self.history.average(max(1, int(seconds / self.interval)))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+CPU温度读取 - 直接读取 Linux sysfs（hwmon / thermal_zone），
+只在首次或读取失败时探测传感器（探测不到时定期重试），之后保持文件描述符打开并用 pread 重复读取；
+没有 sysfs 时退回 psutil / Windows WMI，并缓存探测结果
+"""
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import psutil
+
+# hwmon 驱动名 -> 优先级（越大越优先）
+HWMON_CPU_DRIVERS = {
+    'coretemp': 100,      # Intel
+    'k10temp': 100,       # AMD
+    'zenpower': 100,      # AMD (第三方驱动)
+    'cpu_thermal': 80,    # ARM / 树莓派
+    'soc_thermal': 60,
+    'acpitz': 20,         # ACPI 热区，通常不是 CPU 本身
+}
+# 传感器标签 -> 额外加分（封装温度优先于单核温度）
+HWMON_PREFERRED_LABELS = {
+    'package id 0': 10,
+    'tctl': 10,
+    'tdie': 9,
+    'cpu': 5,
+}
+# thermal_zone 类型 -> 优先级
+THERMAL_ZONE_TYPES = {
+    'x86_pkg_temp': 90,
+    'cpu-thermal': 80,
+    'cpu_thermal': 80,
+    'soc_thermal': 60,
+    'acpitz': 20,
+}
+# 探测不到传感器（或重新探测失败）后隔该秒数再探测，传感器驱动可能稍后才加载
+SENSOR_REPROBE_INTERVAL = 60
+
+
+def _read_text(path: Path) -> str:
+    try:
+        return path.read_text(encoding='utf-8').strip()
+    except OSError:
+        return ""
+
+
+class SysfsTempReader:
+    """sysfs CPU 温度读取器（root 可指向伪造的目录树以便测试）"""
+    def __init__(self, root: str = "/", reprobe_interval: float = SENSOR_REPROBE_INTERVAL):
+        self.root = Path(root)
+        self.reprobe_interval = reprobe_interval
+        self.path: Optional[Path] = None
+        self.label = ""
+        self._fd: Optional[int] = None
+        self._probed_at: Optional[float] = None  # 上次探测的 monotonic 时间，None 表示未探测
+
+    def _candidates(self) -> List[Tuple[int, Path, str]]:
+        """列出所有可用传感器 (优先级, 文件路径, 描述)"""
+        candidates = []
+        hwmon_dir = self.root / "sys/class/hwmon"
+        if hwmon_dir.is_dir():
+            for hwmon in sorted(hwmon_dir.iterdir()):
+                driver = _read_text(hwmon / "name")
+                base_score = HWMON_CPU_DRIVERS.get(driver)
+                if base_score is None:
+                    continue
+                for temp_input in sorted(hwmon.glob("temp*_input")):
+                    label = _read_text(temp_input.with_name(temp_input.name.replace("_input", "_label")))
+                    score = base_score + HWMON_PREFERRED_LABELS.get(label.lower(), 0)
+                    candidates.append((score, temp_input, f"{driver}/{label or temp_input.name}"))
+        thermal_dir = self.root / "sys/class/thermal"
+        if thermal_dir.is_dir():
+            for zone in sorted(thermal_dir.glob("thermal_zone*")):
+                zone_type = _read_text(zone / "type")
+                score = THERMAL_ZONE_TYPES.get(zone_type.lower())
+                if score is not None and (zone / "temp").exists():
+                    candidates.append((score, zone / "temp", f"{zone.name}/{zone_type}"))
+        return candidates
+
+    def probe(self) -> bool:
+        """探测并打开最合适的 CPU 温度传感器"""
+        self.close()
+        self._probed_at = time.monotonic()
+        # 按优先级从高到低尝试，跳过读不出合理数值的传感器
+        for _, path, label in sorted(self._candidates(), key=lambda c: -c[0]):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            self._fd = fd
+            self.path = path
+            self.label = label
+            try:
+                ok = self._read_fd() is not None
+            except (OSError, ValueError):
+                ok = False
+            if ok:
+                print(f"[CPU] 使用温度传感器: {label} ({path})")
+                return True
+            self.close()
+        return False
+
+    def _read_fd(self) -> Optional[float]:
+        if hasattr(os, "pread"):
+            raw = os.pread(self._fd, 32, 0)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            raw = os.read(self._fd, 32)
+        temp = int(raw.strip()) / 1000
+        if -50 < temp < 150:
+            return temp
+        return None
+
+    def read(self) -> Optional[float]:
+        """读取当前温度（°C），读取失败时立即重新探测一次，之后每 reprobe_interval 秒探测一次"""
+        if self._fd is None:
+            if self._probed_at is not None and time.monotonic() - self._probed_at < self.reprobe_interval:
+                return None
+            if not self.probe():
+                return None
+        try:
+            temp = self._read_fd()
+            if temp is not None:
+                return temp
+        except (OSError, ValueError):
+            pass
+        print(f"[CPU] 传感器读取失败，重新探测: {self.label}")
+        if self.probe():
+            try:
+                return self._read_fd()
+            except (OSError, ValueError):
+                self.close()
+        return None
+
+    def reset(self):
+        """允许下一次 read() 重新探测（例如切换监测模式后）"""
+        self.close()
+        self._probed_at = None
+
+    def close(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+        self.path = None
+        self.label = ""
+
+    def is_available(self) -> bool:
+        return self._fd is not None
+
+
+# WMI 需要启动 PowerShell 进程：成功时结果复用该秒数，失败后隔该秒数再试
+WMI_MIN_INTERVAL = 60
+WMI_RETRY_INTERVAL = 600
+
+
+def read_wmi_temp() -> Optional[float]:
+    """通过 PowerShell 读取 MSAcpi_ThermalZoneTemperature（Windows）"""
+    temps = []
+    try:
+        result = subprocess.run(
+            ['powershell', '-Command',
+             'Get-CimInstance -Namespace root/wmi -ClassName MSAcpi_ThermalZoneTemperature | ForEach-Object { $_.CurrentTemperature }'],
+            capture_output=True, text=True, timeout=5
+        )
+        for line in result.stdout.split('\n'):
+            line = line.strip()
+            if line.isdigit():
+                temp_c = (int(line) / 10) - 273.15
+                if -50 < temp_c < 150:
+                    temps.append(temp_c)
+    except Exception as e:
+        print(f"[CPU] WMI 读取失败: {e}")
+    return max(temps) if temps else None
+
+
+class CpuTempReader:
+    """CPU温度读取：sysfs -> psutil -> WMI，记住可用的来源，失败时才重新探测"""
+    def __init__(self, sysfs_root: str = "/"):
+        self.sysfs = SysfsTempReader(sysfs_root)
+        self.source = ""  # 当前来源描述，如 "coretemp/Package id 0"
+        self._psutil_key: Optional[Tuple[str, str]] = None
+        self._psutil_probed_at: Optional[float] = None
+        self._wmi_value: Optional[float] = None
+        self._wmi_checked_at = 0.0
+
+    def read(self) -> Optional[Tuple[str, float]]:
+        """读取CPU温度，返回 (来源, °C)，所有来源都不可用时返回 None"""
+        temp = self.sysfs.read()
+        if temp is not None:
+            self.source = self.sysfs.label
+            return self.source, temp
+        temp = self._read_psutil()
+        if temp is not None:
+            return self.source, temp
+        if os.name == 'nt':
+            temp = self._read_wmi()
+            if temp is not None:
+                self.source = "WMI ThermalZone"
+                return self.source, temp
+        self.source = ""
+        return None
+
+    def _read_psutil(self) -> Optional[float]:
+        if not hasattr(psutil, "sensors_temperatures"):
+            return None
+        if (self._psutil_key is None and self._psutil_probed_at is not None
+                and time.monotonic() - self._psutil_probed_at < SENSOR_REPROBE_INTERVAL):
+            return None
+        try:
+            temps = psutil.sensors_temperatures()
+        except Exception as e:
+            print(f"[CPU] psutil 错误: {e}")
+            return None
+        if self._psutil_key is not None:
+            group, label = self._psutil_key
+            for entry in temps.get(group, []):
+                if (entry.label or "") == label and entry.current and -50 < entry.current < 150:
+                    return entry.current
+            print(f"[CPU] psutil 传感器消失，重新探测: {group}/{label}")
+        # 探测：按驱动和标签优先级选一个传感器并记住
+        self._psutil_probed_at = time.monotonic()
+        self._psutil_key = None
+        best = None
+        for group, entries in temps.items():
+            base_score = HWMON_CPU_DRIVERS.get(group, 0)
+            for entry in entries:
+                if not entry.current or not -50 < entry.current < 150:
+                    continue
+                score = base_score + HWMON_PREFERRED_LABELS.get((entry.label or "").lower(), 0)
+                if best is None or score > best[0]:
+                    best = (score, group, entry.label or "", entry.current)
+        if best is None:
+            return None
+        _, group, label, temp = best
+        self._psutil_key = (group, label)
+        self.source = f"{group}/{label or '未命名'}"
+        print(f"[CPU] 使用 psutil 传感器: {self.source}")
+        return temp
+
+    def _read_wmi(self) -> Optional[float]:
+        now = time.monotonic()
+        interval = WMI_MIN_INTERVAL if self._wmi_value is not None else WMI_RETRY_INTERVAL
+        if self._wmi_checked_at and now - self._wmi_checked_at < interval:
+            return self._wmi_value
+        self._wmi_checked_at = now
+        self._wmi_value = read_wmi_temp()
+        return self._wmi_value
+
+    def reset(self):
+        """清除所有探测结果，下次读取时重新探测"""
+        self.sysfs.reset()
+        self._psutil_key = None
+        self._psutil_probed_at = None
+        self._wmi_value = None
+        self._wmi_checked_at = 0.0
+        self.source = ""
+
+    def close(self):
+        self.sysfs.close()
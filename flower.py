@@ -6,16 +6,20 @@
 import sys
 import json
 import os
+import time
 from pathlib import Path
-from PyQt6.QtCore import Qt, QTimer, QPoint
+from PyQt6.QtCore import Qt, QTimer, QPoint, QStringListModel
 from PyQt6.QtGui import QPixmap, QFont, QColor, QPainter, QFontMetrics
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QApplication, QMenu,
-    QInputDialog, QMessageBox
+    QInputDialog, QMessageBox, QLineEdit, QCompleter
 )
 
 from audio_manager import AudioManager
+from playback_scheduler import Priority
+from cpu_sampler import RingBuffer
 from event_watcher import EventWatcher
+from city_index import CITY_INDEX
 
 
 class WeatherPopupWidget(QWidget):
@@ -404,6 +408,12 @@ class BubbleWidget(QWidget):
             )
 
 
+# 连击判定时间窗口
+CLICK_INTERVAL_MS = 300
+# 推测单击：按下后等待该时长仍无第二次点击才开始播放
+SPECULATIVE_DELAY_MS = 50
+
+
 class FlowerWidget(QWidget):
     """花体主窗体"""
     
@@ -431,6 +441,16 @@ class FlowerWidget(QWidget):
         self._click_timer.setSingleShot(True)
         self._click_timer.timeout.connect(self._on_click_timeout)
         
+        # 推测单击：按下即预选并解码Idle台词，短暂等待后开始播放，出现第二次点击则取消
+        self._speculative_timer = QTimer()
+        self._speculative_timer.setSingleShot(True)
+        self._speculative_timer.timeout.connect(self._on_speculative_timeout)
+        self._speculative_playing = False
+        # 单击延迟统计（按下 -> 进入播放状态），按路径分别记录
+        self._press_time = None
+        self._latency_path = None
+        self._click_latency = {"speculative": RingBuffer(100), "timer": RingBuffer(100)}
+        
         # 静音序列播放状态
         self._mute_sequence_playing = False
         self._mute_sequence_entries = []
@@ -459,16 +479,21 @@ class FlowerWidget(QWidget):
     def _init_components(self):
         """初始化组件"""
         # 音频管理器
-        self.audio_manager = AudioManager()
+        cache_mb = self.config.get("audio_cache_mb", 32)
+        self.audio_manager = AudioManager(pcm_cache_bytes=int(cache_mb * 1024 * 1024))
         self.audio_manager.initialize()
         self.audio_manager.set_volume(self.config.get("volume", 0.8))
         self.audio_manager.audio_started.connect(self._on_audio_started)
         self.audio_manager.audio_finished.connect(self._on_audio_finished)
+        self.audio_manager.playback_started.connect(self._on_playback_started)
+        # 退出（包括以管理员身份重启）前保存播放记录
+        QApplication.instance().aboutToQuit.connect(self.audio_manager.shutdown)
         
         # 事件监视器
         self.event_watcher = EventWatcher(self.config)
         self.event_watcher.idle_trigger.connect(self._on_idle_trigger)
         self.event_watcher.weather_good.connect(self._on_weather_good)
+        self.event_watcher.weather_rain.connect(self._on_weather_rain)
         self.event_watcher.cpu_temp_high.connect(self._on_cpu_temp_high)
         self.event_watcher.cpu_temp_low.connect(self._on_cpu_temp_low)
         self.event_watcher.cpu_usage_high.connect(self._on_cpu_usage_high)
@@ -506,6 +531,9 @@ class FlowerWidget(QWidget):
         print(f"\n[WeatherInfo] {info_text}\n")
         if data:
             self._last_weather_data = data
+            # 弹窗正在显示（例如先用缓存渲染），后台刷新完成后就地更新
+            if self.weather_popup.isVisible():
+                self.weather_popup.update_weather(data)
     
     def _on_weather_popup(self):
         """收到天气弹窗信号"""
@@ -570,6 +598,15 @@ class FlowerWidget(QWidget):
         print("[WeatherPopup] 弹窗已关闭，自动刷新天气数据...")
         self.event_watcher.force_check_weather()
     
+    def _toggle_speculative_click(self, enabled: bool):
+        """切换推测单击（按下即准备播放，不再等待连击判定）"""
+        self.config["speculative_click"] = enabled
+        self._save_config()
+        for path, history in self._click_latency.items():
+            if len(history):
+                print(f"[Click] {path} 路径平均延迟: {history.average():.1f}ms ({len(history)}次)")
+        print(f"[Config] 单击快速响应: {'开启' if enabled else '关闭'}")
+    
     def _toggle_weather_popup(self, enabled: bool):
         """切换天气弹窗开关"""
         self._weather_popup_enabled = enabled
@@ -625,6 +662,12 @@ class FlowerWidget(QWidget):
         self.mute_action.setChecked(self.config.get("mute", False))
         self.mute_action.triggered.connect(self._toggle_mute)
         
+        # 推测单击
+        self.speculative_click_action = self.context_menu.addAction("单击快速响应")
+        self.speculative_click_action.setCheckable(True)
+        self.speculative_click_action.setChecked(self.config.get("speculative_click", False))
+        self.speculative_click_action.triggered.connect(self._toggle_speculative_click)
+        
         # CPU监测菜单
         self.cpu_monitor_menu = self.context_menu.addMenu("CPU监测")
         
@@ -693,6 +736,10 @@ class FlowerWidget(QWidget):
         self.context_menu.addAction("设置天气城市").triggered.connect(self._set_weather_city)
         self.context_menu.addAction("刷新天气").triggered.connect(self._refresh_weather)
         
+        # 天气接口熔断状态（打开菜单时刷新）
+        self.api_status_menu = self.context_menu.addMenu("天气接口状态")
+        self.api_status_menu.aboutToShow.connect(self._update_api_status_menu)
+        
         self.context_menu.addSeparator()
         
         # 时间设置
@@ -732,19 +779,55 @@ class FlowerWidget(QWidget):
         self._load_flower_image()
     
     def _set_weather_city(self):
-        """设置天气城市"""
+        """设置天气城市（输入时按城市索引提示补全）"""
         current_city = self.config.get("weather_city", "")
-        text, ok = QInputDialog.getText(
-            self, "设置天气城市", 
-            "请输入城市名称（如：北京、上海）：",
-            text=current_city
-        )
+        dialog = QInputDialog(self)
+        dialog.setWindowTitle("设置天气城市")
+        dialog.setLabelText("请输入城市名称（如：北京、上海）：")
+        dialog.setTextValue(current_city)
+        
+        line_edit = dialog.findChild(QLineEdit)
+        if line_edit is not None:
+            model = QStringListModel(dialog)
+            completer = QCompleter(model, dialog)
+            completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+            line_edit.setCompleter(completer)
+            line_edit.textEdited.connect(lambda t: model.setStringList(CITY_INDEX.complete(t)))
+        
+        ok = dialog.exec()
+        text = dialog.textValue().strip()
         if ok and text:
             self.config["weather_city"] = text
             self._save_config()
-            self.bubble.show_text(f"已设置天气城市：{text}", 3000)
+            self.event_watcher.cancel_weather_fetch()
+            resolved = CITY_INDEX.resolve(text)
+            if resolved is None:
+                suggestions = CITY_INDEX.complete(text[:1], 5)
+                hint = f"\n可选：{'、'.join(suggestions)}" if suggestions else ""
+                self.bubble.show_text(f"已设置天气城市：{text}\n(未找到坐标，彩云天气不可用){hint}", 4000)
+            elif resolved != text:
+                self.bubble.show_text(f"已设置天气城市：{text}（{resolved}）", 3000)
+            else:
+                self.bubble.show_text(f"已设置天气城市：{text}", 3000)
             self._update_bubble_position()
     
+    def _update_api_status_menu(self):
+        """刷新天气接口状态子菜单"""
+        self.api_status_menu.clear()
+        state_names = {'closed': '正常', 'open': '已熔断', 'half_open': '探测中'}
+        status = self.event_watcher.api_guard.describe()
+        if not status:
+            self.api_status_menu.addAction("暂无请求记录").setEnabled(False)
+        for key, state, failures, retry_in in status:
+            text = f"{key}: {state_names.get(state, state)}"
+            if state == 'open':
+                text += f"（{int(retry_in) // 60 + 1}分钟后重试）"
+            elif failures:
+                text += f"（连续失败{failures}次）"
+            self.api_status_menu.addAction(text).setEnabled(False)
+        self.api_status_menu.addSeparator()
+        self.api_status_menu.addAction("重置熔断").triggered.connect(self.event_watcher.api_guard.reset)
+    
     def _refresh_weather(self):
         """刷新天气"""
         city = self.config.get("weather_city", "")
@@ -771,6 +854,7 @@ class FlowerWidget(QWidget):
                 if 0 <= hour < 24 and 0 <= minute < 60:
                     self.config[f"time_{time_type}"] = f"{hour:02d}:{minute:02d}"
                     self._save_config()
+                    self.event_watcher.reload_schedule()
                     self.bubble.show_text(f"已设置{time_name}时间为：{self.config[f'time_{time_type}']}", 3000)
                     self._update_bubble_position()
                 else:
@@ -796,54 +880,60 @@ class FlowerWidget(QWidget):
     def _on_idle_trigger(self):
         """随机闲聊触发"""
         print("[FlowerWidget] 处理: 随机闲聊触发 → 播放Idle语音")
-        self.audio_manager.play_random("Idle")
+        # 正在播放其他语音时直接放弃这次闲聊
+        self.audio_manager.play_random("Idle", Priority.IDLE)
     
     def _on_weather_good(self):
         """天气好触发"""
         print("[FlowerWidget] 处理: 天气好触发 → 播放天气语音")
-        self.audio_manager.play_by_trigger("System", "weather_sunny")
+        self.audio_manager.play_by_trigger("System", "weather_sunny", Priority.ALERT)
+    
+    def _on_weather_rain(self):
+        """下雨/即将下雨触发"""
+        print("[FlowerWidget] 处理: 下雨触发 → 播放下雨语音")
+        self.audio_manager.play_by_trigger("System", "weather_rain", Priority.ALERT)
     
     def _on_cpu_temp_high(self):
         """CPU温度高触发"""
         print("[FlowerWidget] 处理: CPU高温触发 → 播放温度警告语音")
-        self.audio_manager.play_by_trigger("System", "cpu_temp>65")
+        self.audio_manager.play_by_trigger("System", "cpu_temp>65", Priority.ALERT)
     
     def _on_cpu_temp_low(self):
         """CPU温度低触发"""
         print("[FlowerWidget] 处理: CPU低温触发 → 播放温度提示语音")
-        self.audio_manager.play_by_trigger("System", "cpu_temp<35")
+        self.audio_manager.play_by_trigger("System", "cpu_temp<35", Priority.ALERT)
     
     def _on_cpu_usage_high(self):
         """CPU使用率高触发"""
         print("[FlowerWidget] 处理: CPU高负载触发 → 播放高负载提示语音")
         # 使用通用的系统警告语音
-        self.audio_manager.play_by_trigger("System", "cpu_temp>65")
+        self.audio_manager.play_by_trigger("System", "cpu_temp>65", Priority.ALERT)
     
     def _on_cpu_usage_low(self):
         """CPU使用率低触发"""
         print("[FlowerWidget] 处理: CPU低负载触发 → 播放低负载提示语音")
         # 使用通用的系统提示语音
-        self.audio_manager.play_by_trigger("System", "cpu_temp<35")
+        self.audio_manager.play_by_trigger("System", "cpu_temp<35", Priority.ALERT)
     
     def _on_time_morning(self):
         """早上触发"""
         print("[FlowerWidget] 处理: 早上时段触发 → 播放早上语音")
-        self.audio_manager.play_by_trigger("System", "time_morning")
+        self.audio_manager.play_by_trigger("System", "time_morning", Priority.TIME)
     
     def _on_time_noon(self):
         """中午触发"""
         print("[FlowerWidget] 处理: 中午时段触发 → 播放中午语音")
-        self.audio_manager.play_by_trigger("System", "time_noon")
+        self.audio_manager.play_by_trigger("System", "time_noon", Priority.TIME)
     
     def _on_time_sunset(self):
         """夕阳触发"""
         print("[FlowerWidget] 处理: 夕阳时段触发 → 播放夕阳语音")
-        self.audio_manager.play_by_trigger("System", "time_sunset")
+        self.audio_manager.play_by_trigger("System", "time_sunset", Priority.TIME)
     
     def _on_time_night(self):
         """入寝触发"""
         print("[FlowerWidget] 处理: 入寝时段触发 → 播放入寝语音")
-        self.audio_manager.play_by_trigger("System", "time_night")
+        self.audio_manager.play_by_trigger("System", "time_night", Priority.TIME)
     
     def _on_time_announce(self, hour: int, minute: int):
         """整点报时触发"""
@@ -872,28 +962,29 @@ class FlowerWidget(QWidget):
         self._save_config()
         print("[FlowerWidget] !"*50 + "\n")
     
-    def _on_astronomy_updated(self, sunset_time: str, moonrise_time: str):
+    def _on_astronomy_updated(self, sunset_time: str, night_time: str):
         """天文数据更新 - 自动匹配夕阳和入寝时间"""
         print(f"\n[FlowerWidget] ========== 收到天文数据更新 ==========")
         print(f"[FlowerWidget] 日落时间: {sunset_time} → 夕阳时段")
-        print(f"[FlowerWidget] 月出时间: {moonrise_time} → 入寝时段")
+        print(f"[FlowerWidget] 天黑时间: {night_time} → 入寝时段")
         
         # 更新配置
         old_sunset = self.config.get("time_sunset", "")
         old_night = self.config.get("time_night", "")
         
         self.config["time_sunset"] = sunset_time
-        self.config["time_night"] = moonrise_time
+        self.config["time_night"] = night_time
         
         self._save_config()
+        self.event_watcher.reload_schedule()
         
         print(f"[FlowerWidget] 配置已更新:")
         print(f"[FlowerWidget]   夕阳: {old_sunset} → {sunset_time}")
-        print(f"[FlowerWidget]   入寝: {old_night} → {moonrise_time}")
+        print(f"[FlowerWidget]   入寝: {old_night} → {night_time}")
         print(f"[FlowerWidget] ======================================\n")
         
         # 显示气泡提示
-        self.bubble.show_text(f"已根据天文数据更新时段\n夕阳: {sunset_time}\n入寝: {moonrise_time}", 5000)
+        self.bubble.show_text(f"已根据天文数据更新时段\n夕阳: {sunset_time}\n入寝: {night_time}", 5000)
         self._update_bubble_position()
     
     def _update_bubble_position(self):
@@ -915,7 +1006,13 @@ class FlowerWidget(QWidget):
             
             self._click_count += 1
             if self._click_count == 1:
-                self._click_timer.start(300)
+                self._press_time = time.perf_counter()
+                self._latency_path = None
+                self._click_timer.start(CLICK_INTERVAL_MS)
+                if self.config.get("speculative_click", False) and self.audio_manager.prepare_random("Idle"):
+                    self._speculative_timer.start(SPECULATIVE_DELAY_MS)
+            elif self._click_count == 2:
+                self._cancel_speculative_click()
         elif event.button() == Qt.MouseButton.RightButton:
             self.context_menu.exec(event.globalPosition().toPoint())
     
@@ -941,10 +1038,45 @@ class FlowerWidget(QWidget):
             else:
                 self._drag_start_pos = None
     
+    def _on_speculative_timeout(self):
+        """推测单击：等待期内没有第二次点击，开始播放预选的台词"""
+        if self._click_count == 1:
+            self._latency_path = "speculative"
+            self._speculative_playing = self.audio_manager.play_prepared()
+    
+    def _cancel_speculative_click(self):
+        """出现第二次点击，取消推测播放，转入双击/三击处理"""
+        self._speculative_timer.stop()
+        self.audio_manager.discard_prepared()
+        if self._speculative_playing:
+            print("[FlowerWidget] 检测到连击，取消推测播放的单击台词")
+            # 推测请求还排在报时等音频后面时只移出队列，不打断正在播放的音频
+            if self.audio_manager.cancel_prepared():
+                self.bubble.hide()
+        self._speculative_playing = False
+        self._latency_path = None
+    
+    def _on_playback_started(self, timestamp: float):
+        """记录从按下到进入播放状态的延迟"""
+        if self._latency_path is None or self._press_time is None:
+            return
+        latency_ms = (timestamp - self._press_time) * 1000
+        history = self._click_latency[self._latency_path]
+        history.append(latency_ms)
+        path_name = "推测播放" if self._latency_path == "speculative" else "等待单击判定"
+        print(f"[Click] 单击延迟 ({path_name}): {latency_ms:.1f}ms "
+              f"(最近{len(history)}次平均 {history.average():.1f}ms)")
+        self._latency_path = None
+    
     def _on_click_timeout(self):
         """点击超时（连击检测结束）"""
         if self._click_count == 1:
-            self._on_single_click()
+            if self._speculative_playing:
+                # 已在按下后推测播放
+                self._speculative_playing = False
+            else:
+                self._latency_path = "timer"
+                self._on_single_click()
         elif self._click_count == 2:
             self._on_double_click()
         elif self._click_count >= 3:
@@ -1058,6 +1190,7 @@ class FlowerWidget(QWidget):
             
             # 已配置API Key，切换到彩云天气
             self.config["weather_api"] = "caiyun"
+            self.event_watcher.cancel_weather_fetch()
             self.weather_api_caiyun.setChecked(True)
             self.weather_api_wttr.setChecked(False)
             self._save_config()
@@ -1067,6 +1200,7 @@ class FlowerWidget(QWidget):
         else:
             # 切换到wttr.in
             self.config["weather_api"] = "wttr.in"
+            self.event_watcher.cancel_weather_fetch()
             self.weather_api_wttr.setChecked(True)
             self.weather_api_caiyun.setChecked(False)
             self._save_config()
@@ -1172,7 +1306,8 @@ class FlowerWidget(QWidget):
         
         # 先显示合并文本
         combined_text = "".join(self._mute_sequence_texts)
-        self.bubble.show_text(combined_text, 5000)
+        duration_ms = sum(self.audio_manager.entry_duration_ms("System", e) for e in selected)
+        self.bubble.show_text(combined_text, max(duration_ms, 5000))
         self._update_bubble_position()
         
         # 然后开始播放第一条
@@ -1189,18 +1324,12 @@ class FlowerWidget(QWidget):
         self._mute_sequence_index += 1
         
         # 播放这一条（不通过audio_manager的signal，直接播放）
-        cat = self.audio_manager.categories["System"]
-        audio_path = Path(cat.audio_dir) / entry.filename
-        
-        if audio_path.exists():
-            from PyQt6.QtCore import QUrl
-            self.audio_manager._player.setSource(QUrl.fromLocalFile(str(audio_path)))
-            self.audio_manager._current_entry = entry
-            self.audio_manager._current_category = "System"
-            self.audio_manager._player.play()
-        else:
+        if not self.audio_manager.play_entry_quiet("System", entry):
             # 文件不存在，跳过
             self._play_next_in_mute_sequence()
+        elif self._mute_sequence_index < len(self._mute_sequence_entries):
+            # 播放期间预加载下一条，衔接时不再冷加载
+            self.audio_manager.prime_entry("System", self._mute_sequence_entries[self._mute_sequence_index])
     
     def _finish_mute_sequence(self):
         """静音序列播放完成"""
@@ -1224,6 +1353,8 @@ class FlowerWidget(QWidget):
         # 播放退出语音（在静音状态下也播放）
         was_mute = self.audio_manager.mute
         self.audio_manager.set_mute(False)
+        # 退出语音优先于一切：清空队列并停止当前音频
+        self.audio_manager.cancel(clear_queue=True)
         self.audio_manager.play_by_trigger("System", "on_exit")
         
         # 等待语音播放开始
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP客户端 - 按主机复用长连接，支持 gzip 压缩和条件请求，并记录每次请求的耗时
+
+与 urllib 一样使用 HTTP(S)_PROXY 环境变量或系统代理设置（HTTPS 经 CONNECT 隧道），
+并跟随重定向（最多 MAX_REDIRECTS 次）。
+"""
+import base64
+import gzip
+import http.client
+import json
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from typing import Dict, Optional, Tuple
+
+# 跟随的重定向状态码和最大次数
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+
+class HttpError(Exception):
+    """HTTP 状态码错误（>= 400、没有缓存内容可用的 304，或无法跟随的重定向）"""
+    def __init__(self, code: int, reason: str = "", retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {code} {reason}".strip())
+        self.code = code
+        self.reason = reason
+        self.retry_after = retry_after  # Retry-After 头（秒），没有则为 None
+
+
+class RequestTiming:
+    """单次请求各阶段耗时（毫秒），复用连接时 DNS/连接/TLS 为 0"""
+    def __init__(self):
+        self.dns_ms = 0.0
+        self.connect_ms = 0.0
+        self.tls_ms = 0.0
+        self.first_byte_ms = 0.0
+        self.total_ms = 0.0
+        self.reused = False
+
+    def __str__(self):
+        text = (f"dns={self.dns_ms:.1f}ms connect={self.connect_ms:.1f}ms tls={self.tls_ms:.1f}ms "
+                f"首字节={self.first_byte_ms:.1f}ms 总计={self.total_ms:.1f}ms")
+        if self.reused:
+            text += " (复用连接)"
+        return text
+
+
+class HttpResponse:
+    """请求结果"""
+    def __init__(self, status: int, headers: dict, body: bytes, wire_bytes: int,
+                 timing: RequestTiming, not_modified: bool = False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.wire_bytes = wire_bytes  # 实际传输的字节数（压缩后）
+        self.timing = timing
+        self.not_modified = not_modified  # 304，body 来自上次响应
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class HttpClient:
+    """复用连接的 HTTP/HTTPS 客户端（线程安全，同一主机的请求串行执行）
+
+    proxies 与 urllib.request.getproxies() 的格式相同（{'https': 'http://代理:端口', 'no': '...'}），
+    为 None 时使用环境变量和系统代理设置。
+    """
+    def __init__(self, ssl_context: Optional[ssl.SSLContext] = None,
+                 user_agent: str = "Mozilla/5.0", idle_timeout: float = 60.0,
+                 proxies: Optional[Dict[str, str]] = None):
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.user_agent = user_agent
+        self.idle_timeout = idle_timeout
+        self._system_proxies = proxies is None
+        self.proxies = urllib.request.getproxies() if proxies is None else dict(proxies)
+        self._connections: Dict[tuple, Tuple[http.client.HTTPConnection, float]] = {}
+        self._host_locks: Dict[tuple, threading.Lock] = {}
+        self._validators: Dict[str, Tuple[str, str, bytes]] = {}  # url -> (etag, last_modified, body)
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'reused_connections': 0,
+            'not_modified': 0,
+            'wire_bytes': 0,
+            'body_bytes': 0,
+        }
+
+    def _host_lock(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            if key not in self._host_locks:
+                self._host_locks[key] = threading.Lock()
+            return self._host_locks[key]
+
+    def _proxy_for(self, scheme: str, host: str) -> Optional[Tuple[str, int, str]]:
+        """请求应经过的代理 (主机, 端口, Proxy-Authorization 头)，直连时为 None"""
+        proxy = self.proxies.get(scheme)
+        if not proxy:
+            return None
+        if self._system_proxies:
+            bypass = urllib.request.proxy_bypass(host)
+        else:
+            bypass = urllib.request.proxy_bypass_environment(host, self.proxies)
+        if bypass:
+            return None
+        parts = urllib.parse.urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+        auth = ''
+        if parts.username:
+            credentials = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+            auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        return parts.hostname, parts.port or 80, auth
+
+    def _open_proxy_connection(self, key: tuple, timeout: float,
+                               timing: RequestTiming) -> http.client.HTTPConnection:
+        """经代理新建连接（HTTPS 先建立 CONNECT 隧道），DNS/连接/隧道/TLS 耗时合计在 connect 中"""
+        scheme, host, port, (proxy_host, proxy_port, auth) = key
+        start = time.perf_counter()
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout, context=self.ssl_context)
+            conn.set_tunnel(host, port, headers={'Proxy-Authorization': auth} if auth else None)
+        else:
+            conn = http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        try:
+            conn.connect()
+        except Exception:
+            conn.close()
+            raise
+        timing.connect_ms = (time.perf_counter() - start) * 1000
+        return conn
+
+    def _open_connection(self, key: tuple, timeout: float, timing: RequestTiming) -> http.client.HTTPConnection:
+        """新建连接，分别记录 DNS、TCP 连接和 TLS 握手耗时"""
+        if key[3] is not None:
+            return self._open_proxy_connection(key, timeout, timing)
+        scheme, host, port, _proxy = key
+        start = time.perf_counter()
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        timing.dns_ms = (resolved - start) * 1000
+
+        sock = None
+        last_error = None
+        for family, socktype, proto, _, address in infos:
+            sock = socket.socket(family, socktype, proto)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(address)
+                break
+            except OSError as e:
+                sock.close()
+                sock = None
+                last_error = e
+        if sock is None:
+            raise last_error or OSError(f"无法连接 {host}:{port}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.perf_counter()
+        timing.connect_ms = (connected - resolved) * 1000
+
+        if scheme == 'https':
+            try:
+                sock = self.ssl_context.wrap_socket(sock, server_hostname=host)
+            except Exception:
+                sock.close()
+                raise
+            timing.tls_ms = (time.perf_counter() - connected) * 1000
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.sock = sock
+        return conn
+
+    def _get_connection(self, key: tuple, timeout: float, timing: RequestTiming) -> http.client.HTTPConnection:
+        with self._lock:
+            pooled = self._connections.pop(key, None)
+        if pooled is not None:
+            conn, last_used = pooled
+            if time.monotonic() - last_used < self.idle_timeout and conn.sock is not None:
+                conn.sock.settimeout(timeout)
+                timing.reused = True
+                return conn
+            conn.close()
+        return self._open_connection(key, timeout, timing)
+
+    def _release_connection(self, key: tuple, conn: http.client.HTTPConnection):
+        with self._lock:
+            self._connections[key] = (conn, time.monotonic())
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn, _ in connections:
+            conn.close()
+
+    def _send(self, key: tuple, path: str, request_headers: dict, timeout: float):
+        """在复用的连接上发送请求，返回 (响应, 原始响应体, 耗时)"""
+        with self._host_lock(key):
+            for attempt in range(2):
+                timing = RequestTiming()
+                start = time.perf_counter()
+                conn = self._get_connection(key, timeout, timing)
+                try:
+                    conn.request('GET', path, headers=request_headers)
+                    response = conn.getresponse()
+                    timing.first_byte_ms = (time.perf_counter() - start) * 1000
+                    raw = response.read()
+                except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                        ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    # 服务器可能已关闭空闲连接，新建连接重试一次
+                    if timing.reused and attempt == 0:
+                        continue
+                    raise
+                except Exception:
+                    conn.close()
+                    raise
+                timing.total_ms = (time.perf_counter() - start) * 1000
+                break
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release_connection(key, conn)
+        return response, raw, timing
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: float = 10) -> HttpResponse:
+        """发送 GET 请求，跟随重定向
+
+        Raises:
+            HttpError: 状态码 >= 400、无法使用的 304、无法跟随或次数过多的重定向
+            OSError / http.client.HTTPException: 网络错误
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._get_once(url, headers, timeout)
+            if response.status < 300 or response.not_modified:
+                return response
+            location = response.headers.get('location')
+            if response.status not in REDIRECT_CODES or not location:
+                raise HttpError(response.status, "无法跟随的重定向")
+            url = urllib.parse.urljoin(url, location)
+        raise HttpError(response.status, f"重定向超过 {MAX_REDIRECTS} 次")
+
+    def _get_once(self, url: str, headers: Optional[dict], timeout: float) -> HttpResponse:
+        """发送一次 GET 请求（不跟随重定向，3xx 原样返回）"""
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        proxy = self._proxy_for(scheme, parts.hostname)
+        key = (scheme, parts.hostname, port, proxy)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if proxy is not None and scheme == 'http':
+            # 经 HTTP 代理时请求行使用完整 URL
+            path = urllib.parse.urlunsplit((scheme, parts.netloc, path, '', ''))
+
+        request_headers = {
+            'User-Agent': self.user_agent,
+            'Accept-Encoding': 'gzip',
+            'Connection': 'keep-alive',
+        }
+        if proxy is not None and scheme == 'http' and proxy[2]:
+            request_headers['Proxy-Authorization'] = proxy[2]
+        if headers:
+            request_headers.update(headers)
+        with self._lock:
+            validator = self._validators.get(url)
+        if validator:
+            etag, last_modified, _ = validator
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+
+        response, raw, timing = self._send(key, path, request_headers, timeout)
+        if response.status == 304 and not validator:
+            # 没有可复用的缓存内容（调用方自带条件头或验证信息已丢失），去掉条件头重新请求
+            request_headers = {k: v for k, v in request_headers.items()
+                               if k.lower() not in ('if-none-match', 'if-modified-since')}
+            response, raw, timing = self._send(key, path, request_headers, timeout)
+        response_headers = {k.lower(): v for k, v in response.getheaders()}
+        body = raw
+        if response_headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(raw)
+
+        not_modified = False
+        if response.status == 304 and validator:
+            body = validator[2]
+            not_modified = True
+        elif response.status == 304:
+            raise HttpError(304, "服务器返回未修改，但没有缓存内容")
+        elif response.status >= 400:
+            retry_after = response_headers.get('retry-after', '')
+            raise HttpError(response.status, response.reason,
+                            float(retry_after) if retry_after.isdigit() else None)
+        elif response.status == 200:
+            etag = response_headers.get('etag', '')
+            last_modified = response_headers.get('last-modified', '')
+            if etag or last_modified:
+                with self._lock:
+                    self._validators[url] = (etag, last_modified, body)
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['reused_connections'] += int(timing.reused)
+            self.stats['not_modified'] += int(not_modified)
+            self.stats['wire_bytes'] += len(raw)
+            self.stats['body_bytes'] += len(body)
+
+        # 路径中可能含有 API Key，日志只输出最后一段
+        endpoint = parts.path.rsplit('/', 1)[-1]
+        status_text = "304 未修改" if not_modified else str(response.status)
+        print(f"[HTTP] GET {parts.hostname} .../{endpoint} {status_text} {timing} "
+              f"传输 {len(raw)}B / 解压后 {len(body)}B")
+        return HttpResponse(response.status, response_headers, body, len(raw), timing, not_modified)
+
+    def get_json(self, url: str, headers: Optional[dict] = None, timeout: float = 10):
+        """GET 并解析 JSON"""
+        return self.get(url, headers=headers, timeout=timeout).json()
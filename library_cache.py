@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+音频库编译缓存 - 把解析好的 Assets/Library 条目表和索引整体存成一个 pickle 文件，
+启动时一次读入；源 JSON 的大小、修改时间都没变时直接使用，
+修改时间变了但内容哈希相同（如仅被 touch）时也继续使用
+"""
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from audio_library import BLOB_COLUMNS, FLAG_COLUMNS, NUMERIC_COLUMNS, POOLED_COLUMNS, UNIQUE_COLUMNS
+
+# 缓存格式版本，编译结果的结构变化时递增
+CACHE_VERSION = 1
+# 列定义变化时旧缓存同样作废
+SCHEMA = (CACHE_VERSION, tuple(NUMERIC_COLUMNS.items()), tuple(FLAG_COLUMNS.items()),
+          tuple(UNIQUE_COLUMNS), tuple(BLOB_COLUMNS), tuple(POOLED_COLUMNS))
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class LibraryCache:
+    """音频库编译缓存（线程安全，原子写入）"""
+    def __init__(self, path: str = "cache/library.pickle"):
+        self.path = Path(path)
+        self._entries: Dict[str, dict] = {}  # 源文件路径 -> {size, mtime_ns, digest, compiled}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                schema, entries = pickle.loads(f.read())
+        except Exception as e:
+            print(f"[LibraryCache] 读取缓存失败，已忽略: {e}")
+            return
+        if schema != SCHEMA:
+            print("[LibraryCache] 缓存版本不符，将重新编译")
+            self._dirty = True
+            return
+        self._entries = entries
+
+    def lookup(self, source: str) -> Optional[Any]:
+        """源文件未变化时返回编译结果，否则返回 None"""
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            item = self._entries.get(source)
+            if item is None or item['size'] != stat.st_size:
+                self.misses += 1
+                return None
+            if item['mtime_ns'] == stat.st_mtime_ns:
+                self.hits += 1
+                return item['compiled']
+        # 修改时间变了，比较内容哈希
+        try:
+            with open(source, 'rb') as f:
+                digest = file_digest(f.read())
+        except OSError:
+            return None
+        with self._lock:
+            if self._entries.get(source) is not item or item['digest'] != digest:
+                self.misses += 1
+                return None
+            item['mtime_ns'] = stat.st_mtime_ns
+            self._dirty = True
+            self.hits += 1
+            return item['compiled']
+
+    def store(self, source: str, stat: os.stat_result, digest: str, compiled: Any):
+        """记录编译结果；stat 和 digest 须取自解析时读到的内容"""
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[source] = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'digest': digest,
+                'compiled': compiled,
+            }
+            self._dirty = True
+
+    def save(self):
+        """有变化时落盘：先写临时文件再替换"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                data = pickle.dumps((SCHEMA, self._entries), protocol=pickle.HIGHEST_PROTOCOL)
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_name(self.path.name + ".tmp")
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"[LibraryCache] 写入缓存失败: {e}")
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+音频解码缓存 - 把 WAV 解码为 PCM 数据常驻内存，按字节预算做 LRU 淘汰；
+命中时不访问文件系统，文件大小或修改时间的变化由重新加载时的 evict_stale() 统一检查
+"""
+import os
+import threading
+import wave
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_BUDGET_BYTES = 32 * 1024 * 1024
+
+
+class PcmClip:
+    """一段解码后的 PCM 音频"""
+    __slots__ = ('path', 'data', 'sample_rate', 'channels', 'sample_width', 'mtime', 'size')
+
+    def __init__(self, path: str, data: bytes, sample_rate: int, channels: int,
+                 sample_width: int, mtime: float, size: int):
+        self.path = path
+        self.data = data
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width  # 每个采样的字节数
+        self.mtime = mtime
+        self.size = size
+
+    @property
+    def duration_ms(self) -> int:
+        frame_bytes = self.channels * self.sample_width
+        if not frame_bytes or not self.sample_rate:
+            return 0
+        return len(self.data) * 1000 // (frame_bytes * self.sample_rate)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def decode_wav(path: str, stat: Optional[os.stat_result] = None) -> Optional[PcmClip]:
+    """解码 PCM WAV 文件；非 PCM 或损坏的文件返回 None"""
+    try:
+        stat = stat or os.stat(path)
+        with wave.open(path, 'rb') as f:
+            data = f.readframes(f.getnframes())
+            return PcmClip(path, data, f.getframerate(), f.getnchannels(), f.getsampwidth(),
+                           stat.st_mtime, stat.st_size)
+    except (OSError, EOFError, wave.Error) as e:
+        print(f"[AudioCache] 无法解码 {os.path.basename(path)}: {e}")
+        return None
+
+
+class PcmCache:
+    """按字节预算淘汰的 PCM 缓存（线程安全，可在后台线程预加载）"""
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._clips: "OrderedDict[str, PcmClip]" = OrderedDict()
+        self._failed: Dict[str, Tuple[float, int]] = {}  # 解码失败的文件 -> (mtime, size)，不反复尝试
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    def lookup(self, path: str) -> Optional[PcmClip]:
+        """只查缓存，未命中时返回 None，不解码"""
+        return self._lookup(path, count=True)
+
+    def load(self, path: str) -> Optional[PcmClip]:
+        """解码并放入缓存（可在后台线程调用）"""
+        return self._load(path) if self.enabled else None
+
+    def contains(self, path: str) -> bool:
+        return self._lookup(path, count=False) is not None
+
+    def _lookup(self, path: str, count: bool) -> Optional[PcmClip]:
+        with self._lock:
+            clip = self._clips.get(path)
+            if clip is not None:
+                self._clips.move_to_end(path)
+            if count:
+                if clip is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return clip
+
+    def _load(self, path: str) -> Optional[PcmClip]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            if self._failed.get(path) == (stat.st_mtime, stat.st_size):
+                return None
+        clip = decode_wav(path, stat)
+        with self._lock:
+            if clip is None:
+                self._failed[path] = (stat.st_mtime, stat.st_size)
+                return None
+            self._failed.pop(path, None)
+            if len(clip) > self.budget_bytes:
+                # 单个文件超过预算，直接使用但不缓存
+                return clip
+            if path in self._clips:
+                self._remove(path)
+            self._clips[path] = clip
+            self._bytes += len(clip)
+            while self._bytes > self.budget_bytes and self._clips:
+                oldest = next(iter(self._clips))
+                self._remove(oldest)
+                self.evictions += 1
+        return clip
+
+    def preload(self, paths: Iterable[str]) -> int:
+        """预加载一组文件（已缓存的跳过），返回新解码的数量"""
+        loaded = 0
+        for path in paths:
+            if not self.enabled:
+                break
+            if self.contains(path) or not os.path.exists(path):
+                continue
+            if self._load(path) is not None:
+                loaded += 1
+        return loaded
+
+    def _remove(self, path: str):
+        """移除条目（调用方持有锁）"""
+        clip = self._clips.pop(path, None)
+        if clip is not None:
+            self._bytes -= len(clip)
+
+    def evict_stale(self) -> int:
+        """移除文件已变化或被删除的条目，返回移除数量"""
+        with self._lock:
+            paths = list(self._clips)
+        removed = 0
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                changed = (stat.st_mtime, stat.st_size)
+            except OSError:
+                changed = None
+            with self._lock:
+                clip = self._clips.get(path)
+                if clip is not None and changed != (clip.mtime, clip.size):
+                    self._remove(path)
+                    removed += 1
+        with self._lock:
+            self._failed.clear()
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._clips),
+                'bytes': self._bytes,
+                'budget_bytes': self.budget_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def describe(self) -> str:
+        s = self.stats()
+        return (f"{s['entries']} 个文件, {s['bytes'] / 1048576:.1f}/{s['budget_bytes'] / 1048576:.0f} MB, "
+                f"命中 {s['hits']} / 未命中 {s['misses']} ({s['hit_rate']:.0%}), 淘汰 {s['evictions']}")
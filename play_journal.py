@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+播放记录日志 - 把每次播放追加写入日志文件（批量 fsync），定期压缩成快照，
+重启后按“快照 + 快照之后的日志”恢复冷却时间、今日已播和最近播放记录；
+日期变化时自动翻篇（清空最近播放，今日已播由播放时间判断）
+"""
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+JOURNAL_VERSION = 1
+# 日志中累计多少条记录后压缩为快照
+COMPACT_EVENTS = 1000
+# 累计多少条记录或多少秒后 fsync 一次（每条记录都会立即 flush 给操作系统）
+FSYNC_EVENTS = 16
+FSYNC_INTERVAL = 5.0
+# 快照中保留多久以内的播放时间（秒）；更早的记录对冷却和今日已播都没有意义
+RETENTION_SECONDS = 7 * 24 * 3600
+# 每个分类保留的最近播放条数（不小于 AudioCategory 的防重复条数）
+RECENT_LIMIT = 16
+
+
+def day_start(day: date) -> float:
+    """某天本地零点的时间戳"""
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class CategoryState:
+    """一个分类的播放状态"""
+    __slots__ = ('last_played', 'recent')
+
+    def __init__(self, last_played: Optional[Dict[str, float]] = None, recent: Optional[List[str]] = None):
+        self.last_played: Dict[str, float] = last_played or {}
+        self.recent: List[str] = recent or []
+
+    def apply(self, entry_id: str, timestamp: float):
+        if timestamp > self.last_played.get(entry_id, 0):
+            self.last_played[entry_id] = timestamp
+        if entry_id in self.recent:
+            self.recent.remove(entry_id)
+        self.recent.append(entry_id)
+        del self.recent[:-RECENT_LIMIT]
+
+    def played_since(self, timestamp: float) -> List[str]:
+        return [entry_id for entry_id, played in self.last_played.items() if played >= timestamp]
+
+
+class PlayJournal:
+    """追加写入的播放记录（线程安全）
+
+    目录下两个文件：snapshot.json（压缩后的状态，含最后一条记录的序号）和
+    journal.log（之后的记录，每行一条 JSON）。恢复时跳过序号不大于快照的记录，
+    因此压缩过程中断也不会重复计入。
+    """
+    def __init__(self, directory: str = "cache/play_journal"):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / "snapshot.json"
+        self.log_path = self.directory / "journal.log"
+        self.states: Dict[str, CategoryState] = {}
+        self.day = date.today()
+        self._seq = 0  # 最后一条记录的序号
+        self._log_events = 0  # 日志文件中的记录数
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def state(self, category: str) -> CategoryState:
+        state = self.states.get(category)
+        if state is None:
+            state = self.states[category] = CategoryState()
+        return state
+
+    def load(self) -> int:
+        """读取快照并重放之后的日志，返回重放的记录数"""
+        with self._lock:
+            snapshot_seq = 0
+            # 没有快照时由日志中第一条记录的日期决定
+            self.day = date.min
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get('version') == JOURNAL_VERSION:
+                    snapshot_seq = self._seq = snapshot.get('seq', 0)
+                    self.day = date.fromisoformat(snapshot['day'])
+                    self.states = {
+                        name: CategoryState(dict(item.get('last_played', {})), list(item.get('recent', [])))
+                        for name, item in snapshot.get('categories', {}).items()
+                    }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[PlayJournal] 读取快照失败，已忽略: {e}")
+            replayed = 0
+            self._log_events = 0
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                with open(self.log_path, 'rb') as f:
+                    complete_end = 0  # 最后一个完整行（以换行结尾）的结束位置
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # 写到一半的最后一行
+                            break
+                        complete_end += len(line)
+                        try:
+                            seq, timestamp, category, entry_id = json.loads(line)
+                        except (ValueError, TypeError):
+                            continue
+                        self._log_events += 1
+                        if seq <= snapshot_seq:
+                            continue
+                        self._apply(seq, timestamp, category, entry_id)
+                        replayed += 1
+                    size = f.seek(0, os.SEEK_END)
+                if complete_end < size:
+                    # 截掉残缺的行，否则之后追加的记录会接在它后面，整行无法解析
+                    print(f"[PlayJournal] 丢弃日志末尾不完整的记录（{size - complete_end} 字节）")
+                    os.truncate(self.log_path, complete_end)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[PlayJournal] 读取日志失败: {e}")
+            self._rollover_locked(date.today())
+            return replayed
+
+    def _apply(self, seq: int, timestamp: float, category: str, entry_id: str):
+        self._seq = max(self._seq, seq)
+        played_day = date.fromtimestamp(timestamp)
+        if played_day > self.day:
+            self._rollover_locked(played_day)
+        self.state(category).apply(entry_id, timestamp)
+
+    def record(self, category: str, entry_id: str, timestamp: Optional[float] = None):
+        """追加一条播放记录"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._seq += 1
+            self._apply(self._seq, timestamp, category, entry_id)
+            try:
+                if self._file is None:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.log_path, 'a', encoding='utf-8')
+                self._file.write(json.dumps([self._seq, timestamp, category, entry_id], ensure_ascii=False) + "\n")
+                self._file.flush()
+                self._log_events += 1
+                self._unsynced += 1
+                if self._unsynced >= FSYNC_EVENTS or time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+                    self._sync_locked()
+            except OSError as e:
+                print(f"[PlayJournal] 写入日志失败: {e}")
+                return
+            if self._log_events >= COMPACT_EVENTS:
+                self._compact_locked()
+
+    def _sync_locked(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            try:
+                self._sync_locked()
+            except OSError as e:
+                print(f"[PlayJournal] 同步日志失败: {e}")
+
+    def _compact_locked(self):
+        """把当前状态写成快照并清空日志"""
+        cutoff = time.time() - RETENTION_SECONDS
+        for state in self.states.values():
+            state.last_played = {i: t for i, t in state.last_played.items() if t >= cutoff}
+        snapshot = {
+            'version': JOURNAL_VERSION,
+            'seq': self._seq,
+            'day': self.day.isoformat(),
+            'categories': {
+                name: {
+                    'last_played': state.last_played,
+                    'recent': state.recent,
+                }
+                for name, state in self.states.items()
+            },
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # 快照落盘后再清空日志；中途退出时旧日志里的记录会按序号跳过
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.log_path, 'w', encoding='utf-8')
+            self._log_events = 0
+            self._unsynced = 0
+        except OSError as e:
+            print(f"[PlayJournal] 压缩日志失败: {e}")
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _rollover_locked(self, today: date) -> bool:
+        if today <= self.day:
+            return False
+        self.day = today
+        for state in self.states.values():
+            state.recent.clear()
+        return True
+
+    def rollover(self, today: Optional[date] = None) -> bool:
+        """日期变化时翻篇并压缩，返回是否翻篇"""
+        with self._lock:
+            if not self._rollover_locked(today or date.today()):
+                return False
+            self._compact_locked()
+            return True
+
+    def played_today(self, category: str) -> List[str]:
+        """今天播放过的条目"""
+        with self._lock:
+            return self.state(category).played_since(day_start(self.day))
+
+    def close(self):
+        with self._lock:
+            try:
+                self._sync_locked()
+            except OSError:
+                pass
+            if self._file is not None:
+                self._file.close()
+                self._file = None
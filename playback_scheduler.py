@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+播放调度 - 按优先级决定新的播放请求是立即播放、打断当前音频、排队还是丢弃
+
+规则：
+- 空闲时直接播放
+- 优先级更高且当前音频可打断（互动、闲聊）时打断当前音频
+- 互动请求替换正在播放的互动（连续点击以最后一次为准）
+- 其余情况进入有界队列，按优先级、先后顺序等待；闲聊不排队，直接丢弃
+- 与正在播放或已在队列中的请求 key 相同时合并（丢弃新请求）
+- 排队超过各优先级的最长等待时间后丢弃
+
+不依赖 Qt：由调用方提供开始播放（start）和停止播放（stop）的回调，播放结束时调用 finished()。
+"""
+import time
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional
+
+
+class Priority(IntEnum):
+    """播放优先级（数值越大越优先）"""
+    IDLE = 0         # 随机闲聊
+    INTERACTION = 1  # 点击等用户互动
+    TIME = 2         # 整点报时、时段提醒
+    ALERT = 3        # CPU、天气等系统提醒
+
+
+# 可以被更高优先级打断的类别（报时和系统提醒一旦开始就播完）
+PREEMPTIBLE = {Priority.IDLE, Priority.INTERACTION}
+# 各优先级在队列中的最长等待时间（秒），0 表示不排队
+MAX_WAIT = {
+    Priority.IDLE: 0,
+    Priority.INTERACTION: 3,
+    Priority.TIME: 60,
+    Priority.ALERT: 30,
+}
+DEFAULT_QUEUE_SIZE = 4
+# 播放开始后多久仍未收到结束通知就视为已结束（后端出错时避免一直占用）
+SESSION_TIMEOUT = 30.0
+
+# submit() 的结果
+STARTED = "started"
+PREEMPTED = "preempted"  # 打断了当前音频并开始播放
+QUEUED = "queued"
+DROPPED = "dropped"
+
+
+class PlaybackRequest:
+    """一个播放请求"""
+    __slots__ = ('priority', 'start', 'key', 'label', 'submitted_at')
+
+    def __init__(self, priority: Priority, start: Callable[[], bool], key: Optional[str], label: str,
+                 submitted_at: float):
+        self.priority = priority
+        self.start = start  # 开始播放，返回是否真正开始
+        self.key = key
+        self.label = label
+        self.submitted_at = submitted_at
+
+    def __repr__(self):
+        return f"PlaybackRequest({self.priority.name}, {self.label or self.key!r})"
+
+
+class PlaybackScheduler:
+    """播放调度器（只应在主线程使用）"""
+    def __init__(self, stop: Callable[[], None], max_queue: int = DEFAULT_QUEUE_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self._stop = stop
+        self.max_queue = max_queue
+        self._clock = clock
+        self.current: Optional[PlaybackRequest] = None
+        self._current_started = 0.0
+        self._queue: List[PlaybackRequest] = []
+        self.started = 0
+        self.preempted = 0
+        self.queued = 0
+        self.dropped: Dict[str, int] = {'busy': 0, 'coalesced': 0, 'overflow': 0, 'expired': 0, 'failed': 0}
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def submit(self, priority: Priority, start: Callable[[], bool], key: Optional[str] = None,
+               label: str = "") -> str:
+        """提交播放请求，返回 STARTED / PREEMPTED / QUEUED / DROPPED"""
+        now = self._clock()
+        request = PlaybackRequest(priority, start, key, label, now)
+        if self.current is not None and now - self._current_started > SESSION_TIMEOUT:
+            print(f"[Scheduler] {self.current} 超时未结束，视为已结束")
+            self.finished()
+        current = self.current
+
+        if key is not None and (
+                (current is not None and current.key == key) or any(r.key == key for r in self._queue)):
+            return self._drop(request, 'coalesced')
+        if current is None:
+            return STARTED if self._start(request) else DROPPED
+        if (priority > current.priority and current.priority in PREEMPTIBLE) or \
+                (priority == current.priority == Priority.INTERACTION):
+            self.preempted += 1
+            print(f"[Scheduler] {request} 打断 {current}")
+            self.current = None
+            self._stop()
+            return PREEMPTED if self._start(request) else DROPPED
+        if not MAX_WAIT[priority]:
+            return self._drop(request, 'busy')
+        return self._enqueue(request)
+
+    def _enqueue(self, request: PlaybackRequest) -> str:
+        if len(self._queue) >= self.max_queue:
+            lowest = min(self._queue, key=lambda r: (r.priority, -r.submitted_at))
+            if lowest.priority >= request.priority:
+                return self._drop(request, 'overflow')
+            self._queue.remove(lowest)
+            self._drop(lowest, 'overflow')
+        # 按优先级从高到低、同优先级先来先播
+        index = len(self._queue)
+        while index > 0 and self._queue[index - 1].priority < request.priority:
+            index -= 1
+        self._queue.insert(index, request)
+        self.queued += 1
+        print(f"[Scheduler] {request} 排队等待 (队列 {len(self._queue)})")
+        return QUEUED
+
+    def _drop(self, request: PlaybackRequest, reason: str) -> str:
+        self.dropped[reason] += 1
+        print(f"[Scheduler] 丢弃 {request} ({reason})")
+        return DROPPED
+
+    def _start(self, request: PlaybackRequest) -> bool:
+        self.current = request
+        self._current_started = self._clock()
+        if request.start():
+            self.started += 1
+            return True
+        # 没有可播放的条目
+        if self.current is request:
+            self.current = None
+        self.dropped['failed'] += 1
+        return False
+
+    def finished(self):
+        """当前音频播放结束，开始播放队列中的下一条"""
+        self.current = None
+        while self._queue and self.current is None:
+            request = self._queue.pop(0)
+            if self._clock() - request.submitted_at > MAX_WAIT[request.priority]:
+                self._drop(request, 'expired')
+                continue
+            self._start(request)
+
+    def remove(self, key: str) -> bool:
+        """从队列中移除 key 相同的请求（不影响正在播放的音频），返回是否移除了请求"""
+        remaining = [r for r in self._queue if r.key != key]
+        if len(remaining) == len(self._queue):
+            return False
+        self._queue = remaining
+        print(f"[Scheduler] 已从队列移除 {key}")
+        return True
+
+    def is_current(self, key: str) -> bool:
+        """正在播放的是否为 key 对应的请求"""
+        return self.current is not None and self.current.key == key
+
+    def clear(self):
+        """清空队列（不影响正在播放的音频）"""
+        self._queue.clear()
+
+    def stats(self) -> dict:
+        return {
+            'current': repr(self.current) if self.current else None,
+            'depth': len(self._queue),
+            'started': self.started,
+            'preempted': self.preempted,
+            'queued': self.queued,
+            'dropped': dict(self.dropped),
+        }
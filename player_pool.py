@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+播放器池 - 持有少量 QMediaPlayer，链式台词（报时错误序列、纠正彩蛋、静音序列）
+的下一段在当前音频播放时就由空闲播放器提前加载，轮到它时只需切换播放器并 play()，
+不必在 EndOfMedia 之后才 setSource 冷加载
+"""
+from pathlib import Path
+from typing import Dict, List
+
+from PyQt6.QtCore import QObject, QUrl, pyqtSignal
+from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+
+DEFAULT_POOL_SIZE = 2
+
+
+class PlayerPool(QObject):
+    """QMediaPlayer 池：任一时刻只有一个“当前”播放器，其余用于预加载"""
+    # 只转发当前播放器的状态变化
+    media_status_changed = pyqtSignal(object)
+    playback_state_changed = pyqtSignal(object)
+    error_occurred = pyqtSignal(object, str)
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, parent=None):
+        super().__init__(parent)
+        self._players: List[QMediaPlayer] = []
+        self._outputs: List[QAudioOutput] = []
+        for _ in range(max(1, size)):
+            player = QMediaPlayer(self)
+            output = QAudioOutput(self)
+            player.setAudioOutput(output)
+            player.mediaStatusChanged.connect(lambda status, p=player: self._forward_status(p, status))
+            player.playbackStateChanged.connect(lambda state, p=player: self._forward_state(p, state))
+            player.errorOccurred.connect(lambda error, text, p=player: self._forward_error(p, error, text))
+            self._players.append(player)
+            self._outputs.append(output)
+        self.active = self._players[0]
+        self._primed: Dict[str, QMediaPlayer] = {}  # 已预加载的文件 -> 播放器
+        self.primed_hits = 0
+        self.cold_loads = 0
+
+    def _forward_status(self, player: QMediaPlayer, status):
+        if player is self.active:
+            self.media_status_changed.emit(status)
+
+    def _forward_state(self, player: QMediaPlayer, state):
+        if player is self.active:
+            self.playback_state_changed.emit(state)
+
+    def _forward_error(self, player: QMediaPlayer, error, text: str):
+        if player is self.active:
+            self.error_occurred.emit(error, text)
+
+    def prime(self, path: Path) -> bool:
+        """用一个空闲播放器预加载文件；没有空闲播放器时返回 False"""
+        key = str(path)
+        if key in self._primed:
+            return True
+        standby = [p for p in self._players if p is not self.active and p not in self._primed.values()]
+        if not standby:
+            # 池已占满：替换最早预加载的那个
+            standby = [p for p in self._players if p is not self.active]
+            if not standby:
+                return False
+            oldest = next(iter(self._primed))
+            standby = [self._primed.pop(oldest)]
+        player = standby[0]
+        url = QUrl.fromLocalFile(key)
+        if player.source() != url:
+            player.setSource(url)
+        self._primed[key] = player
+        return True
+
+    def play(self, path: Path) -> bool:
+        """播放文件，返回是否使用了预加载的播放器"""
+        key = str(path)
+        player = self._primed.pop(key, None)
+        primed = player is not None
+        if player is None:
+            player = self.active
+            player.setSource(QUrl.fromLocalFile(key))
+            self.cold_loads += 1
+        else:
+            self.primed_hits += 1
+        if player is not self.active:
+            previous, self.active = self.active, player
+            previous.stop()
+        player.play()
+        return primed
+
+    def stop(self):
+        self.active.stop()
+
+    def discard_primed(self):
+        """放弃所有预加载（链式播放被打断时）"""
+        self._primed.clear()
+
+    def playback_state(self):
+        return self.active.playbackState()
+
+    def set_volume(self, volume: float):
+        for output in self._outputs:
+            output.setVolume(volume)
+
+    def set_muted(self, muted: bool):
+        for output in self._outputs:
+            output.setMuted(muted)
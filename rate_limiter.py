@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+接口保护 - 令牌桶限流、指数退避重试和熔断器（熔断状态持久化到磁盘）
+"""
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from http_client import HttpError
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，请求被直接拒绝"""
+    def __init__(self, key: str, retry_in: float):
+        super().__init__(f"{key} 已熔断，{int(retry_in)}秒后重试")
+        self.key = key
+        self.retry_in = retry_in
+
+
+class ApiStatusError(Exception):
+    """请求成功但接口返回的状态表示失败（如彩云 status != 'ok'），计入熔断"""
+    def __init__(self, status):
+        super().__init__(f"接口返回状态: {status}")
+        self.status = status
+
+
+class TokenBucket:
+    """令牌桶限流器（线程安全）"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # 每秒补充的令牌数
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """获取一个令牌，不足时阻塞等待（只应在后台线程调用）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却结束进入半开状态放行一次探测请求"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, key: str, failure_threshold: int = 3,
+                 reset_timeout: float = 300, max_reset_timeout: float = 3600):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0  # 墙钟时间，便于跨重启恢复
+        self.reset_timeout = reset_timeout
+        self.last_error = ""
+
+    def retry_in(self) -> float:
+        """距离允许半开探测还剩多少秒"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.time())
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in() <= 0:
+            self.state = self.HALF_OPEN
+            print(f"[ApiGuard] {self.key}: 熔断冷却结束，进入半开状态，发送探测请求")
+            return True
+        # 半开状态下已有探测请求在进行
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            print(f"[ApiGuard] {self.key}: 探测成功，熔断器关闭")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self.last_error = ""
+
+    def record_failure(self, error: str):
+        self.failures += 1
+        self.last_error = error
+        if self.state == self.HALF_OPEN:
+            # 探测失败，冷却时间翻倍
+            self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+            self._open()
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        print(f"[ApiGuard] {self.key}: 连续失败 {self.failures} 次，熔断 {int(self.reset_timeout)} 秒"
+              f"（最后错误: {self.last_error}）")
+
+    def to_dict(self) -> dict:
+        return {
+            'state': self.state, 'failures': self.failures, 'opened_at': self.opened_at,
+            'reset_timeout': self.reset_timeout, 'last_error': self.last_error,
+        }
+
+    def load_dict(self, data: dict):
+        self.state = data.get('state', self.CLOSED)
+        # 半开探测在退出前未完成，按打开处理
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+        self.failures = data.get('failures', 0)
+        self.opened_at = data.get('opened_at', 0.0)
+        self.reset_timeout = data.get('reset_timeout', self.base_reset_timeout)
+        self.last_error = data.get('last_error', "")
+
+
+# 各数据源的限流参数：(每秒令牌数, 桶容量)
+DEFAULT_RATE_LIMITS = {
+    'caiyun': (1.0, 1),
+    'wttr.in': (0.5, 1),
+}
+
+
+class ApiGuard:
+    """按数据源限流、按接口熔断，并对 429/5xx 做带抖动的指数退避重试"""
+    def __init__(self, state_path: str = "cache/api_state.json", max_retries: int = 2,
+                 backoff_base: float = 1.0, backoff_cap: float = 8.0):
+        self.state_path = Path(state_path)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._saved_state: dict = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self._saved_state = json.load(f)
+        except Exception as e:
+            print(f"[ApiGuard] 读取熔断状态失败，已忽略: {e}")
+            return
+        for key, data in self._saved_state.items():
+            breaker = self._breaker(key)
+            if breaker.state != CircuitBreaker.CLOSED:
+                print(f"[ApiGuard] 恢复熔断状态: {key} ({breaker.state}, {int(breaker.retry_in())}秒后重试)")
+
+    def _save(self):
+        """原子写入熔断状态（调用方持有锁）"""
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({k: b.to_dict() for k, b in self._breakers.items()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"[ApiGuard] 保存熔断状态失败: {e}")
+
+    def _bucket(self, provider: str) -> TokenBucket:
+        with self._lock:
+            if provider not in self._buckets:
+                rate, capacity = DEFAULT_RATE_LIMITS.get(provider, (1.0, 1))
+                self._buckets[provider] = TokenBucket(rate, capacity)
+            return self._buckets[provider]
+
+    def _breaker(self, key: str) -> CircuitBreaker:
+        if key not in self._breakers:
+            breaker = CircuitBreaker(key)
+            if key in self._saved_state:
+                breaker.load_dict(self._saved_state[key])
+            self._breakers[key] = breaker
+        return self._breakers[key]
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """全抖动指数退避；服务端给出 Retry-After 时取较大值"""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        return delay
+
+    def call(self, provider: str, endpoint: str, request: Callable[[], object]):
+        """执行受保护的请求（只应在后台线程调用）
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            其余异常原样抛出
+        """
+        key = f"{provider}/{endpoint}"
+        with self._lock:
+            breaker = self._breaker(key)
+            if not breaker.allow_request():
+                raise CircuitOpenError(key, breaker.retry_in())
+
+        bucket = self._bucket(provider)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                result = request()
+            except HttpError as e:
+                retryable = e.code == 429 or e.code >= 500
+                if retryable and attempt < self.max_retries:
+                    delay = self._backoff_delay(attempt, e.retry_after)
+                    print(f"[ApiGuard] {key}: HTTP {e.code}，{delay:.1f}秒后重试 ({attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                if retryable:
+                    self._record_failure(breaker, f"HTTP {e.code}")
+                else:
+                    # 其他 4xx 多为配置问题（如 API Key 错误），不计入熔断
+                    self._record_neutral(breaker)
+                raise
+            except ApiStatusError as e:
+                self._record_failure(breaker, str(e))
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                # 网络不可达/超时不重试，避免离线时反复等待超时
+                self._record_failure(breaker, str(e) or type(e).__name__)
+                raise
+            except Exception:
+                self._record_neutral(breaker)
+                raise
+            self._record_success(breaker)
+            return result
+
+    def _record_success(self, breaker: CircuitBreaker):
+        with self._lock:
+            changed = breaker.state != CircuitBreaker.CLOSED or breaker.failures > 0
+            breaker.record_success()
+            if changed:
+                self._save()
+
+    def _record_failure(self, breaker: CircuitBreaker, error: str):
+        with self._lock:
+            breaker.record_failure(error)
+            self._save()
+
+    def _record_neutral(self, breaker: CircuitBreaker):
+        with self._lock:
+            # 半开探测得到非重试类错误，说明服务可达
+            if breaker.state == CircuitBreaker.HALF_OPEN:
+                breaker.record_success()
+                self._save()
+
+    def reset(self):
+        """手动重置所有熔断器"""
+        with self._lock:
+            for breaker in self._breakers.values():
+                breaker.record_success()
+            self._save()
+        print("[ApiGuard] 已重置所有熔断器")
+
+    def describe(self) -> list:
+        """返回各接口状态 [(key, state, 失败次数, 剩余冷却秒数)]，供菜单显示"""
+        with self._lock:
+            return [(key, b.state, b.failures, b.retry_in()) for key, b in sorted(self._breakers.items())]
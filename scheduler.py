@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+日程调度器 - 把固定时段和整点报时编译成按触发时间排序的最小堆，
+只需为最早的一个事件设置定时器，配置变更时才重新编译
+"""
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# 固定时段及默认时间（顺序即同一时刻的触发顺序）
+PERIOD_DEFAULTS = {
+    'morning': "08:00",
+    'noon': "12:00",
+    'sunset': "18:00",
+    'night': "22:00",
+    'bedtime': "23:00",
+    'wake': "07:00",
+}
+ANNOUNCE = 'announce'  # 整点报时事件名
+
+# 事件迟到超过该秒数（如系统休眠唤醒后）则跳过本次，直接排到下一次
+MAX_LATENESS_SECONDS = 60
+
+
+def parse_time(time_str: str) -> Optional[Tuple[int, int]]:
+    """解析 "HH:MM"，格式错误返回 None"""
+    try:
+        hour, minute = map(int, time_str.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour, minute
+    return None
+
+
+def next_daily(now: datetime, hour: int, minute: int) -> datetime:
+    """now 之后（不含）的下一个 HH:MM"""
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+def next_hour(now: datetime) -> datetime:
+    """now 之后（不含）的下一个整点"""
+    return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+class CalendarScheduler:
+    """日程最小堆：元素为 (触发时间戳, 优先级, 事件名, 时, 分)"""
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._times: Dict[str, Tuple[int, int]] = {}
+        self._signature: Optional[tuple] = None
+        self._announce_enabled = True
+        self._priority = {ANNOUNCE: 0}
+        for i, period in enumerate(PERIOD_DEFAULTS, 1):
+            self._priority[period] = i
+
+    @staticmethod
+    def config_signature(config: dict) -> tuple:
+        return tuple(config.get(f"time_{p}", d) for p, d in PERIOD_DEFAULTS.items())
+
+    def needs_compile(self, config: dict) -> bool:
+        return self.config_signature(config) != self._signature
+
+    def compile(self, config: dict, now: datetime, announce_enabled: bool = True):
+        """根据配置重建整个堆"""
+        self._signature = self.config_signature(config)
+        self._announce_enabled = announce_enabled
+        self._times = {}
+        for period, default in PERIOD_DEFAULTS.items():
+            parsed = parse_time(config.get(f"time_{period}", default))
+            if parsed is None:
+                print(f"[Scheduler] 时间格式错误，已忽略: time_{period}")
+                continue
+            self._times[period] = parsed
+        self._heap = []
+        for period, (hour, minute) in self._times.items():
+            self._push(period, next_daily(now, hour, minute))
+        if announce_enabled:
+            self._push(ANNOUNCE, next_hour(now))
+
+    def _push(self, name: str, when: datetime):
+        heapq.heappush(self._heap, (when.timestamp(), self._priority[name], name, when.hour, when.minute))
+
+    def set_announce_enabled(self, enabled: bool, now: datetime):
+        """开启/关闭整点报时（就寝期间关闭，堆中不再有整点事件）"""
+        if enabled == self._announce_enabled:
+            return
+        self._announce_enabled = enabled
+        if enabled:
+            self._push(ANNOUNCE, next_hour(now))
+        else:
+            self._heap = [item for item in self._heap if item[2] != ANNOUNCE]
+            heapq.heapify(self._heap)
+
+    def next_fire_time(self) -> Optional[float]:
+        """最早的触发时间戳"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, int, int]]:
+        """取出所有已到期的事件并排入下一次；迟到太久的事件被跳过"""
+        now_ts = now.timestamp()
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            fire_ts, _, name, hour, minute = heapq.heappop(self._heap)
+            if now_ts - fire_ts <= MAX_LATENESS_SECONDS:
+                due.append((name, hour, minute))
+            else:
+                print(f"[Scheduler] 跳过过期事件: {name} {hour:02d}:{minute:02d}")
+            if name == ANNOUNCE:
+                if self._announce_enabled:
+                    self._push(ANNOUNCE, next_hour(now))
+            elif name in self._times:
+                self._push(name, next_daily(now, *self._times[name]))
+        return due
+
+    def __len__(self):
+        return len(self._heap)
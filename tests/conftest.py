@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """需要事件循环的测试共用一个 QCoreApplication"""
+    from PyQt6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication([])
+    yield app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def city_index():
+    """城市表按相对路径懒加载：先在仓库根目录加载，之后的测试可以切换工作目录"""
+    from city_index import CITY_INDEX
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        CITY_INDEX.get('北京')
+    finally:
+        os.chdir(cwd)
+    return CITY_INDEX
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from event_watcher import EventWatcher
+
+
+@pytest.fixture
+def make_watcher(qapp, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    watchers = []
+
+    def make(**config):
+        config.setdefault('cpu_monitor_enabled', False)
+        config.setdefault('weather_city', '北京')
+        config.setdefault('time_sunset', '00:00')
+        config.setdefault('time_night', '00:00')
+        w = EventWatcher(config)
+        updates = []
+        w.astronomy_updated.connect(lambda sunset, night: updates.append((sunset, night)))
+        watchers.append(w)
+        return w, updates
+
+    yield make
+    for w in watchers:
+        w.cpu_sampler.stop()
+
+
+def test_auto_update_is_on_by_default(make_watcher):
+    watcher, updates = make_watcher()
+    watcher._update_astronomy()
+    assert len(updates) == 1
+    sunset, night = updates[0]
+    assert sunset < night
+    # 每天 00:01 再次计算
+    assert watcher._astronomy_timer.isActive()
+
+
+def test_auto_update_can_be_disabled(make_watcher):
+    watcher, updates = make_watcher(astronomy_auto_update=False)
+    watcher._update_astronomy()
+    assert updates == []
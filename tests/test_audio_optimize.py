@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+
+from audio_optimize import _k_weighting, integrated_loudness
+
+# BS.1770-4 表 1、表 2 给出的 48kHz 系数 (b0, b1, b2, a1, a2)
+BS1770_SHELF = (1.53512485958697, -2.69169618940638, 1.19839281085285, -1.69065929318241, 0.73248077421585)
+BS1770_HIGH_PASS = (1.0, -2.0, 1.0, -1.99004745483398, 0.99007225036621)
+
+
+def test_k_weighting_matches_bs1770_at_48k():
+    shelf, high_pass = _k_weighting(48000)
+    assert shelf == pytest.approx(BS1770_SHELF, abs=1e-10)
+    assert high_pass == pytest.approx(BS1770_HIGH_PASS, abs=1e-10)
+
+
+def test_full_scale_1k_sine_reads_about_minus_3_lufs():
+    # 1kHz 满幅正弦（单声道）按 BS.1770 约为 -3.01 LUFS
+    rate = 48000
+    samples = [math.sin(2 * math.pi * 1000 * i / rate) for i in range(rate * 2)]
+    assert integrated_loudness([samples], rate) == pytest.approx(-3.01, abs=0.05)
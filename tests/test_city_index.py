@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""城市表查询：别名和地级后缀归一化；区县名不去后缀，找不到时返回 None 而不是同名地级市"""
+
+
+def test_prefecture_suffixes_are_normalized(city_index):
+    assert city_index.resolve('北京市') == '北京'
+    assert city_index.resolve('阿拉善盟') == '阿拉善盟'
+    assert city_index.resolve('阿拉善左旗') == '阿拉善盟'
+    assert city_index.get('朝阳市') == city_index.get('朝阳')
+
+
+def test_district_names_do_not_resolve_to_other_prefectures(city_index):
+    # 北京的朝阳区不是辽宁的朝阳
+    assert city_index.get('朝阳区') is None
+    assert city_index.resolve('朝阳县') is None
+    assert city_index.get('海淀区') is None
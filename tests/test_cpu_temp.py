@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import shutil
+
+import cpu_temp
+from cpu_temp import SysfsTempReader
+
+
+def _make_hwmon(root, millidegrees="45000"):
+    hwmon = root / "sys/class/hwmon/hwmon0"
+    hwmon.mkdir(parents=True)
+    (hwmon / "name").write_text("coretemp\n")
+    (hwmon / "temp1_label").write_text("Package id 0\n")
+    (hwmon / "temp1_input").write_text(millidegrees + "\n")
+    return hwmon
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reprobes_after_interval_when_sensor_missing(tmp_path, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cpu_temp.time, 'monotonic', clock)
+    reader = SysfsTempReader(str(tmp_path), reprobe_interval=60)
+    assert reader.read() is None
+
+    # 驱动稍后加载：间隔内不重新探测，间隔过后能找到传感器
+    _make_hwmon(tmp_path)
+    clock.now += 30
+    assert reader.read() is None
+    clock.now += 31
+    assert reader.read() == 45.0
+    reader.close()
+
+
+def test_reprobes_after_failed_reprobe(tmp_path, monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cpu_temp.time, 'monotonic', clock)
+    hwmon = _make_hwmon(tmp_path)
+    reader = SysfsTempReader(str(tmp_path), reprobe_interval=60)
+    assert reader.read() == 45.0
+
+    # 传感器读出无效值，立即重新探测也失败
+    (hwmon / "temp1_input").write_text("garbage\n")
+    assert reader.read() is None
+    assert not reader.is_available()
+
+    shutil.rmtree(hwmon)
+    _make_hwmon(tmp_path, "52000")
+    clock.now += 61
+    assert reader.read() == 52.0
+    reader.close()
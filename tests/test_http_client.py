@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import json
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import MAX_REDIRECTS, HttpClient, HttpError
+
+BODY = json.dumps({'status': 'ok'}).encode('utf-8')
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    """带条件头的请求一律返回 304"""
+    protocol_version = 'HTTP/1.1'
+    seen = []
+
+    def do_GET(self):
+        conditional = 'If-None-Match' in self.headers or 'If-Modified-Since' in self.headers
+        self.seen.append(conditional)
+        if conditional:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    _ConditionalHandler.seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ConditionalHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/weather"
+    server.shutdown()
+    server.server_close()
+
+
+def test_304_without_stored_body_retries_unconditionally(server_url):
+    client = HttpClient(proxies={})
+    try:
+        data = client.get_json(server_url, headers={'If-None-Match': '"stale"'})
+    finally:
+        client.close()
+    assert data == {'status': 'ok'}
+    assert _ConditionalHandler.seen == [True, False]
+
+
+def test_socket_closed_when_tls_handshake_fails(server_url):
+    wrapped = []
+
+    class FailingContext(ssl.SSLContext):
+        def wrap_socket(self, sock, *args, **kwargs):
+            wrapped.append(sock)
+            raise ssl.SSLError("handshake failed")
+
+    client = HttpClient(ssl_context=FailingContext(ssl.PROTOCOL_TLS_CLIENT), proxies={})
+    with pytest.raises(ssl.SSLError):
+        client.get(server_url.replace('http://', 'https://'))
+    assert wrapped and wrapped[0].fileno() == -1
+
+
+class _RedirectHandler(BaseHTTPRequestHandler):
+    """/weather 返回数据；/moved 重定向到 /weather；/loop 重定向到自身；/choices 是没有 Location 的 300"""
+    protocol_version = 'HTTP/1.1'
+    seen = []
+    proxy_auth = []
+
+    def do_GET(self):
+        self.seen.append(self.path)
+        self.proxy_auth.append(self.headers.get('Proxy-Authorization'))
+        if self.path.endswith('/weather'):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+            return
+        body = b'<html>moved</html>'
+        if self.path == '/choices':
+            self.send_response(300)
+        else:
+            self.send_response(302)
+            self.send_header('Location', '/weather' if self.path == '/moved' else self.path)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_CONNECT(self):
+        self.seen.append(f"CONNECT {self.path}")
+        self.send_response(403)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def redirect_server():
+    _RedirectHandler.seen = []
+    _RedirectHandler.proxy_auth = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RedirectHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_redirects_are_followed_and_bounded(redirect_server):
+    client = HttpClient(proxies={})
+    try:
+        assert client.get_json(f"http://{redirect_server}/moved") == {'status': 'ok'}
+        assert _RedirectHandler.seen == ['/moved', '/weather']
+        # 重定向循环和无法跟随的 3xx 不会被当作数据返回
+        with pytest.raises(HttpError) as loop:
+            client.get(f"http://{redirect_server}/loop")
+        assert loop.value.code == 302
+        assert _RedirectHandler.seen.count('/loop') == MAX_REDIRECTS + 1
+        with pytest.raises(HttpError) as choices:
+            client.get(f"http://{redirect_server}/choices")
+        assert choices.value.code == 300
+    finally:
+        client.close()
+
+
+def test_http_proxy_receives_absolute_url(redirect_server):
+    # 测试服务器同时充当代理：请求行是完整 URL
+    client = HttpClient(proxies={'http': f"http://user:pass@{redirect_server}"})
+    try:
+        assert client.get_json("http://weather.invalid/weather") == {'status': 'ok'}
+    finally:
+        client.close()
+    assert _RedirectHandler.seen == ['http://weather.invalid/weather']
+    assert _RedirectHandler.proxy_auth == ['Basic dXNlcjpwYXNz']
+
+
+def test_https_proxy_uses_connect_tunnel(redirect_server):
+    client = HttpClient(proxies={'https': f"http://{redirect_server}"})
+    with pytest.raises(OSError):
+        client.get("https://weather.invalid:8443/weather")
+    assert _RedirectHandler.seen == ['CONNECT weather.invalid:8443']
+
+
+def test_proxies_default_to_environment(monkeypatch):
+    for name in ('http_proxy', 'HTTP_PROXY', 'https_proxy', 'no_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('HTTPS_PROXY', 'http://proxy.example:3128')
+    monkeypatch.setenv('NO_PROXY', 'localhost')
+    client = HttpClient()
+    assert client._proxy_for('https', 'api.caiyunapp.com') == ('proxy.example', 3128, '')
+    assert client._proxy_for('https', 'localhost') is None
+    assert client._proxy_for('http', 'api.caiyunapp.com') is None
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""音频库热重载：按 id 比较新旧条目表，保留仍存在条目的播放状态；编辑器原子替换文件后监视不丢失"""
+import json
+import os
+
+import pytest
+
+# QtMultimedia 依赖系统音频库（如 libpulse），缺少时跳过
+pytest.importorskip("PyQt6.QtMultimedia", exc_type=ImportError)
+
+from PyQt6.QtCore import QElapsedTimer, QEventLoop, QTimer  # noqa: E402
+
+from audio_manager import LIBRARY_RELOAD_DELAY_MS, AudioCategory, AudioManager  # noqa: E402
+
+
+def _entry(entry_id, text, weight=10):
+    return {'id': entry_id, 'filename': f'{entry_id}.wav', 'text': text,
+            'trigger': 'random', 'weight': weight, 'duration_ms': 1000}
+
+
+def _write_atomic(path, entries):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'category': 'Idle', 'description': 'Idle', 'entries': entries}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def test_reload_diffs_by_id_and_keeps_play_state(tmp_path):
+    json_path = tmp_path / "idle.json"
+    _write_atomic(json_path, [_entry('a', '早'), _entry('b', '午'), _entry('c', '晚')])
+    cat = AudioCategory('Idle', str(tmp_path), str(json_path))
+    cat.load()
+    cat._last_played.update({'a': 100.0, 'b': 200.0})
+    cat._played_today.update({'a', 'b'})
+
+    # 没有变化时保留原条目表
+    table = cat._table
+    assert cat.reload() == {'added': 0, 'removed': 0, 'modified': 0}
+    assert cat._table is table
+
+    _write_atomic(json_path, [_entry('a', '早'), _entry('c', '晚上好'), _entry('d', '夜')])
+    assert cat.reload() == {'added': 1, 'removed': 1, 'modified': 1}
+    assert [e.id for e in cat.entries] == ['a', 'c', 'd']
+    assert cat.get_entry_by_id('c').text == '晚上好'
+    assert cat._last_played == {'a': 100.0}
+    assert cat._played_today == {'a'}
+
+
+def test_one_entry_edit_keeps_cooldown_and_recent_state(tmp_path):
+    json_path = tmp_path / "idle.json"
+    entries = [dict(_entry('a', '早'), cooldown_minutes=30), _entry('b', '午'), _entry('c', '晚'), _entry('d', '夜')]
+    _write_atomic(json_path, entries)
+    cat = AudioCategory('Idle', str(tmp_path), str(json_path))
+    cat.load()
+    cat.mark_played('a')
+    cat.mark_played('b')
+    cat.get_random_entry()  # 先建好抽样器，确认重载后不会沿用旧的
+
+    entries[2] = _entry('c', '晚上好')
+    _write_atomic(json_path, entries)
+    assert cat.reload() == {'added': 0, 'removed': 0, 'modified': 1}
+    assert cat.get_entry_by_id('c').text == '晚上好'
+    assert cat._recent_played == ['a', 'b']
+    assert 'a' in cat._last_played and 'b' in cat._last_played
+    assert [entry_id for _, entry_id in cat._cooldown_heap] == ['a']
+    # 冷却中和最近播放过的条目仍然不会被抽中
+    assert {cat.get_random_entry().id for _ in range(200)} == {'c', 'd'}
+
+
+def test_table_by_id_groups_duplicate_ids(tmp_path):
+    json_path = tmp_path / "idle.json"
+    _write_atomic(json_path, [_entry('a', '一'), _entry('b', '二'), _entry('a', '三')])
+    cat = AudioCategory('Idle', str(tmp_path), str(json_path))
+    cat.load()
+    rows = AudioCategory._table_by_id(cat._table)
+    assert list(rows) == ['a', 'b']
+    assert len(rows['a']) == 2 and rows['a'][0] != rows['a'][1]
+
+
+def _spin(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def test_atomic_rewrites_under_watcher(qapp, tmp_path):
+    assets = tmp_path / "Assets"
+    (assets / "Audio" / "Index").mkdir(parents=True)
+    (assets / "Library").mkdir()
+    json_path = assets / "Library" / "idle.json"
+    _write_atomic(json_path, [_entry('e0', '0')])
+    manager = AudioManager(str(assets), pcm_cache_bytes=0, library_cache_path=None,
+                           asset_manifest_path=None, journal_dir=None, audio_bank_path=None,
+                           optimized_dir=None)
+    manager.initialize()
+    cat = manager.categories['Idle']
+    cat._last_played['e0'] = 123.0
+
+    # 每次写入条目数不同，最后一次的内容是唯一的
+    for i in range(1, 101):
+        _write_atomic(json_path, [_entry(f'e{j}', str(i)) for j in range(i % 7 + 1)] + [_entry('last', str(i))])
+        _spin(1)
+    clock = QElapsedTimer()
+    clock.start()
+    while clock.elapsed() < 5000:
+        _spin(LIBRARY_RELOAD_DELAY_MS)
+        if cat.get_entry_by_id('last') is not None and cat.get_entry_by_id('last').text == '100':
+            break
+
+    assert [e.id for e in cat.entries] == [f'e{j}' for j in range(100 % 7 + 1)] + ['last']
+    assert cat._last_played == {'e0': 123.0}
+    # 原子替换后仍在监视新文件：再改一次也能收到
+    assert os.path.normpath(str(json_path)) in [os.path.normpath(p) for p in manager._watcher.files()]
+    _write_atomic(json_path, [_entry('e0', 'final')])
+    _spin(LIBRARY_RELOAD_DELAY_MS * 3)
+    assert [e.text for e in cat.entries] == ['final']
+    manager.shutdown()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import os
+import wave
+
+import pcm_cache
+from pcm_cache import PcmCache
+
+
+def _write_wav(path, frames=1000, value=b'\x01\x00'):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(value * frames)
+
+
+def test_hit_does_not_stat(tmp_path, monkeypatch):
+    path = tmp_path / "a.wav"
+    _write_wav(path)
+    cache = PcmCache(1 << 20)
+    assert cache.lookup(str(path)) is None
+    assert cache.load(str(path)) is not None
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("命中时不应访问文件系统")
+
+    monkeypatch.setattr(pcm_cache.os, 'stat', no_stat)
+    clip = cache.lookup(str(path))
+    assert clip is not None and len(clip) == 2000
+    assert cache.lookup(str(path)) is clip
+    assert cache.stats()['hits'] == 2
+
+
+def test_changed_file_dropped_by_evict_stale(tmp_path):
+    path = tmp_path / "a.wav"
+    _write_wav(path)
+    cache = PcmCache(1 << 20)
+    cache.load(str(path))
+    _write_wav(path, frames=1500)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.evict_stale() == 1
+    assert cache.lookup(str(path)) is None
+    assert len(cache.load(str(path))) == 3000
+
+
+def test_load_respects_budget(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"{i}.wav")
+        _write_wav(paths[-1])
+    cache = PcmCache(4500)
+    for path in paths:
+        cache.load(str(path))
+    # 预算只够两个，最早的被淘汰
+    assert cache.lookup(str(paths[0])) is None
+    assert cache.contains(str(paths[1])) and cache.contains(str(paths[2]))
+    assert cache.stats()['evictions'] == 1
+
+
+def test_eviction_follows_recent_use(tmp_path):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"{i}.wav"))
+        _write_wav(paths[-1])
+    cache = PcmCache(4500)
+    cache.load(paths[0])
+    cache.load(paths[1])
+    # 命中的音频移到最近使用，淘汰的是更久没用的那个
+    assert cache.lookup(paths[0]) is not None
+    cache.load(paths[2])
+    assert cache.contains(paths[0]) and cache.contains(paths[2])
+    assert not cache.contains(paths[1])
+    stats = cache.stats()
+    assert stats['bytes'] == 4000 and stats['entries'] == 2 and stats['evictions'] == 1
+
+
+def test_clip_larger_than_budget_is_not_cached(tmp_path):
+    small = str(tmp_path / "small.wav")
+    large = str(tmp_path / "large.wav")
+    _write_wav(small)
+    _write_wav(large, frames=3000)
+    cache = PcmCache(4500)
+    cache.load(small)
+    clip = cache.load(large)
+    # 超过预算的音频照常返回，但不放入缓存，也不挤掉已缓存的音频
+    assert clip is not None and len(clip) == 6000
+    assert not cache.contains(large)
+    assert cache.contains(small)
+    assert cache.stats()['evictions'] == 0
+
+
+def test_zero_budget_disables_cache(tmp_path):
+    path = str(tmp_path / "a.wav")
+    _write_wav(path)
+    cache = PcmCache(0)
+    assert not cache.enabled
+    assert cache.load(path) is None
+    assert cache.preload([path]) == 0
+    assert cache.stats()['entries'] == 0
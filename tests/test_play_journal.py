@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+from play_journal import PlayJournal
+
+
+def test_torn_last_line_is_truncated(tmp_path):
+    now = time.time()
+    journal = PlayJournal(str(tmp_path))
+    journal.load()
+    journal.record('Idle', 'a', now - 30)
+    journal.record('Idle', 'b', now - 20)
+    journal.close()
+    # 模拟写到一半时断电
+    with open(journal.log_path, 'ab') as f:
+        f.write(b'[3, 17')
+
+    journal = PlayJournal(str(tmp_path))
+    assert journal.load() == 2
+    journal.record('Idle', 'c', now - 10)
+    journal.close()
+
+    lines = journal.log_path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)[3] for line in lines] == ['a', 'b', 'c']
+    journal = PlayJournal(str(tmp_path))
+    assert journal.load() == 3
+    assert journal.state('Idle').recent == ['a', 'b', 'c']
+
+
+def test_load_resets_log_event_count(tmp_path):
+    journal = PlayJournal(str(tmp_path))
+    journal.load()
+    for entry_id in 'abc':
+        journal.record('Idle', entry_id)
+    journal.load()
+    journal.load()
+    assert journal._log_events == 3
+    journal.close()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from playback_scheduler import (DROPPED, MAX_WAIT, PREEMPTED, QUEUED, SESSION_TIMEOUT, STARTED,
+                                PlaybackScheduler, Priority)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def env():
+    clock = _Clock()
+    played = []
+    stops = []
+    scheduler = PlaybackScheduler(stop=lambda: stops.append(clock.now), max_queue=3, clock=clock)
+
+    def submit(priority, label, key=None, ok=True):
+        def start():
+            played.append(label)
+            return ok
+        return scheduler.submit(priority, start, key=key, label=label)
+
+    return scheduler, clock, played, stops, submit
+
+
+def test_queue_plays_by_priority_then_fifo(env):
+    scheduler, clock, played, _, submit = env
+    assert submit(Priority.TIME, 'time-1') == STARTED
+    assert submit(Priority.INTERACTION, 'click') == QUEUED
+    assert submit(Priority.ALERT, 'alert') == QUEUED
+    assert submit(Priority.TIME, 'time-2') == QUEUED
+    for _ in range(3):
+        scheduler.finished()
+    assert played == ['time-1', 'alert', 'time-2', 'click']
+
+
+def test_preemption_rules(env):
+    scheduler, clock, played, stops, submit = env
+    assert submit(Priority.IDLE, 'idle') == STARTED
+    assert submit(Priority.INTERACTION, 'click-1') == PREEMPTED
+    # 连续点击以最后一次为准
+    assert submit(Priority.INTERACTION, 'click-2') == PREEMPTED
+    assert submit(Priority.TIME, 'time') == PREEMPTED
+    # 报时开始后不可打断
+    assert submit(Priority.ALERT, 'alert') == QUEUED
+    # 闲聊不排队
+    assert submit(Priority.IDLE, 'idle-2') == DROPPED
+    assert played == ['idle', 'click-1', 'click-2', 'time']
+    assert len(stops) == 3
+    assert scheduler.dropped['busy'] == 1
+
+
+def test_queue_bound_evicts_lowest_priority(env):
+    scheduler, clock, played, _, submit = env
+    submit(Priority.ALERT, 'playing')
+    for i in range(3):
+        clock.now += 0.1
+        assert submit(Priority.INTERACTION, f'click-{i}') == QUEUED
+    # 队列已满：更高优先级的请求挤掉最新的低优先级请求
+    assert submit(Priority.TIME, 'time') == QUEUED
+    assert scheduler.depth == 3
+    assert scheduler.dropped['overflow'] == 1
+    # 不高于队列中最低优先级的请求直接丢弃
+    assert submit(Priority.INTERACTION, 'click-3') == DROPPED
+    assert scheduler.dropped['overflow'] == 2
+    for _ in range(3):
+        scheduler.finished()
+    assert played == ['playing', 'time', 'click-0', 'click-1']
+
+
+def test_expired_requests_are_dropped(env):
+    scheduler, clock, played, _, submit = env
+    submit(Priority.ALERT, 'playing')
+    submit(Priority.INTERACTION, 'click')
+    submit(Priority.TIME, 'time')
+    clock.now += MAX_WAIT[Priority.INTERACTION] + 1
+    # 报时最多等 60 秒，仍然播放
+    scheduler.finished()
+    assert played == ['playing', 'time']
+    assert scheduler.dropped['expired'] == 0
+    # 点击最多等 3 秒，已过期
+    scheduler.finished()
+    assert played == ['playing', 'time']
+    assert scheduler.dropped['expired'] == 1
+    assert scheduler.current is None and scheduler.depth == 0
+
+
+def test_same_key_is_coalesced(env):
+    scheduler, clock, played, _, submit = env
+    submit(Priority.TIME, 'hour', key='TimeAnnounce:12')
+    assert submit(Priority.TIME, 'hour-again', key='TimeAnnounce:12') == DROPPED
+    assert submit(Priority.ALERT, 'cpu', key='System:cpu_high') == QUEUED
+    assert submit(Priority.ALERT, 'cpu-again', key='System:cpu_high') == DROPPED
+    assert scheduler.dropped['coalesced'] == 2
+    scheduler.finished()
+    assert played == ['hour', 'cpu']
+
+
+def test_failed_start_frees_slot(env):
+    scheduler, clock, played, _, submit = env
+    assert submit(Priority.TIME, 'nothing', ok=False) == DROPPED
+    assert scheduler.current is None
+    assert submit(Priority.IDLE, 'idle') == STARTED
+
+
+def test_session_timeout_releases_stuck_slot(env):
+    scheduler, clock, played, _, submit = env
+    submit(Priority.TIME, 'stuck')
+    clock.now += SESSION_TIMEOUT + 1
+    assert submit(Priority.IDLE, 'idle') == STARTED
+    assert played == ['stuck', 'idle']
+
+
+def test_remove_queued_request_by_key(env):
+    scheduler, clock, played, stops, submit = env
+    submit(Priority.TIME, 'hour')
+    assert submit(Priority.INTERACTION, 'click', key='speculative') == QUEUED
+    assert scheduler.is_current('speculative') is False
+    assert scheduler.remove('speculative') is True
+    assert scheduler.remove('speculative') is False
+    # 正在播放的报时不受影响，结束后也不会再开始被移除的请求
+    scheduler.finished()
+    assert played == ['hour']
+    assert stops == []
+    assert scheduler.current is None
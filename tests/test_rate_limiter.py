@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from types import SimpleNamespace
+
+import pytest
+
+from event_watcher import EventWatcher
+from rate_limiter import ApiGuard, ApiStatusError, CircuitBreaker, CircuitOpenError, TokenBucket
+
+
+@pytest.fixture
+def guard(tmp_path):
+    guard = ApiGuard(str(tmp_path / "api_state.json"))
+    # 测试中不等待限流
+    guard._buckets['caiyun'] = TokenBucket(1000.0, 10)
+    return guard
+
+
+def test_api_status_error_counts_as_failure(guard):
+    def request():
+        raise ApiStatusError('failed')
+
+    for _ in range(3):
+        with pytest.raises(ApiStatusError):
+            guard.call('caiyun', 'weather', request)
+    with pytest.raises(CircuitOpenError):
+        guard.call('caiyun', 'weather', lambda: {'status': 'ok'})
+
+
+@pytest.mark.parametrize('method, endpoint', [
+    ('_fetch_caiyun_weather', 'realtime'),
+    ('_fetch_caiyun_daily', 'daily'),
+    ('_fetch_caiyun_combined', 'weather'),
+])
+def test_caiyun_status_not_ok_trips_breaker(guard, method, endpoint):
+    requests = []
+
+    def get_json(url, timeout=10):
+        requests.append(url)
+        return {'status': 'failed', 'error': 'token is invalid'}
+
+    watcher = SimpleNamespace(api_guard=guard, http_client=SimpleNamespace(get_json=get_json))
+    watcher._get_caiyun_json = lambda url: EventWatcher._get_caiyun_json(watcher, url)
+    fetch = getattr(EventWatcher, method)
+    for _ in range(4):
+        assert fetch(watcher, '北京', 'key') is None
+    # 第 4 次被熔断器直接拒绝，没有发出请求
+    assert len(requests) == 3
+    assert guard._breakers[f'caiyun/{endpoint}'].state == CircuitBreaker.OPEN
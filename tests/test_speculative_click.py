@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""推测单击：出现连击时取消推测播放，只打断推测播放本身，不打断排在它前面的报时"""
+import json
+import wave
+
+import pytest
+
+# QtMultimedia 依赖系统音频库（如 libpulse），缺少时跳过
+pytest.importorskip("PyQt6.QtMultimedia", exc_type=ImportError)
+
+from audio_manager import AudioManager  # noqa: E402
+from playback_scheduler import Priority  # noqa: E402
+
+
+@pytest.fixture
+def manager(qapp, tmp_path, monkeypatch):
+    assets = tmp_path / "Assets"
+    (assets / "Audio" / "Index").mkdir(parents=True)
+    (assets / "Library").mkdir()
+    with wave.open(str(assets / "Audio" / "Index" / "i1.wav"), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b'\0\0' * 800)
+    with open(assets / "Library" / "idle.json", 'w', encoding='utf-8') as f:
+        json.dump({'entries': [{'id': 'i1', 'filename': 'i1.wav', 'text': '闲聊'}]}, f, ensure_ascii=False)
+    manager = AudioManager(str(assets), pcm_cache_bytes=0, library_cache_path=None,
+                           asset_manifest_path=None, journal_dir=None, audio_bank_path=None,
+                           optimized_dir=None)
+    manager.initialize()
+    events = []
+    monkeypatch.setattr(manager, '_play_entry',
+                        lambda category, entry: events.append(f"play {entry.filename}") or True)
+    monkeypatch.setattr(manager, 'stop', lambda: events.append("stop"))
+    yield manager, events
+    manager.shutdown()
+
+
+def test_cancel_queued_speculative_keeps_time_announce(manager):
+    manager, events = manager
+    manager.scheduler.submit(Priority.TIME, lambda: events.append("play 10.wav") or True, label="报时")
+    assert manager.prepare_random("Idle") is not None
+    assert manager.play_prepared()
+    assert manager.scheduler.depth == 1
+
+    assert manager.cancel_prepared() is False
+    manager._finish_playback()
+    assert events == ["play 10.wav"]
+    assert manager.scheduler.current is None
+
+
+def test_cancel_playing_speculative_interrupts_it(manager):
+    manager, events = manager
+    assert manager.prepare_random("Idle") is not None
+    assert manager.play_prepared()
+    assert manager.cancel_prepared() is True
+    assert events == ["play i1.wav", "stop"]
+    assert manager.scheduler.current is None
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+from weather_cache import WeatherCache
+
+
+def test_put_prunes_entries_older_than_longest_ttl(tmp_path):
+    path = tmp_path / "weather.json"
+    now = time.time()
+    path.write_text(json.dumps({
+        'caiyun|旧城市|weather': {'stored_at': now - 4 * 3600, 'data': {'old': True}},
+        'caiyun|北京|realtime': {'stored_at': now - 2 * 3600, 'data': {'realtime': True}},
+    }), encoding='utf-8')
+    cache = WeatherCache(str(path))
+    cache.put('caiyun', '北京', 'weather', {'new': True})
+
+    stored = json.loads(path.read_text(encoding='utf-8'))
+    assert set(stored) == {'caiyun|北京|realtime', 'caiyun|北京|weather'}
+    # 已过期但仍在最长有效期内的条目保留，供先显示旧数据再后台刷新
+    assert cache.lookup('caiyun', '北京', 'realtime') == ({'realtime': True}, False)
+    assert cache.lookup('caiyun', '旧城市', 'weather') == (None, False)
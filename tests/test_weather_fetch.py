@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""天气请求在线程池中执行：桩 HTTP 服务器故意延迟响应，期间主线程事件循环不能被阻塞"""
+import gc
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PyQt6.QtCore import QElapsedTimer, QEventLoop, QTimer
+
+RESPONSE_DELAY = 0.4
+MAX_GAP_MS = RESPONSE_DELAY * 1000 / 4
+TICK_MS = 10
+
+WTTR_BODY = json.dumps({
+    'current_condition': [{
+        'temp_C': '21', 'FeelsLikeC': '20', 'humidity': '40',
+        'weatherDesc': [{'value': 'Sunny'}],
+    }],
+}).encode('utf-8')
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(RESPONSE_DELAY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(WTTR_BODY)))
+        self.end_headers()
+        self.wfile.write(WTTR_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def watcher(qapp, tmp_path, monkeypatch, stub_server):
+    monkeypatch.chdir(tmp_path)
+    from event_watcher import EventWatcher
+    w = EventWatcher({'weather_api': 'wttr.in', 'weather_city': '北京', 'cpu_monitor_enabled': False})
+    w._check_timer.stop()
+    w._idle_timer.stop()
+    w._fetch_wttr_weather = lambda city: w.http_client.get_json(stub_server, timeout=5)
+    yield w
+    w._weather_pool.waitForDone(5000)
+    w.http_client.close()
+    w.cpu_sampler.stop()
+
+
+def _run_until(predicate, timeout_ms=5000):
+    """运行事件循环直到条件成立，返回主线程两次定时器触发之间的最大间隔（ms）"""
+    loop = QEventLoop()
+    clock = QElapsedTimer()
+    clock.start()
+    gaps = []
+    last = [clock.elapsed()]
+
+    def tick():
+        now = clock.elapsed()
+        gaps.append(now - last[0])
+        last[0] = now
+        if predicate() or now > timeout_ms:
+            loop.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(tick)
+    timer.start(TICK_MS)
+    loop.exec()
+    timer.stop()
+    assert predicate(), "等待超时"
+    return max(gaps)
+
+
+def test_fetch_does_not_block_event_loop(watcher):
+    results = []
+    watcher.weather_data_ready.connect(lambda text, info: results.append(info))
+    start = time.monotonic()
+    watcher._check_weather()
+    # 提交请求本身立即返回，不等待网络
+    assert time.monotonic() - start < RESPONSE_DELAY / 2
+    max_gap = _run_until(lambda: results)
+    assert time.monotonic() - start >= RESPONSE_DELAY
+    assert max_gap < MAX_GAP_MS
+    assert results[0]['temperature'] == '21'
+    assert watcher._weather_task is None
+
+
+def test_cancelled_task_kept_alive_until_finished(watcher):
+    results = []
+    watcher.weather_data_ready.connect(lambda text, info: results.append(info))
+    watcher._check_weather()
+    task = watcher._weather_task
+    watcher.cancel_weather_fetch()
+    assert watcher._weather_task is None
+    assert task in watcher._cancelled_tasks
+    del task
+    gc.collect()
+    max_gap = _run_until(lambda: not watcher._cancelled_tasks)
+    assert max_gap < MAX_GAP_MS
+    # 取消的请求结果被丢弃
+    assert results == []
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import math
+import random
+
+from weighted_sampler import FenwickTree, WeightedSampler
+
+KEYS = list(range(0, 40, 2))
+WEIGHTS = {k: float(w) for k, w in zip(KEYS, [1, 5, 0.5, 3, 10, 2, 0, 7, 1, 4,
+                                               6, 0.25, 8, 2, 3, 9, 1, 5, 2, 12])}
+DRAWS = 40000
+
+
+def _linear_pick(keys, weights, ok):
+    """原来的线性累加抽样，作为基准"""
+    candidates = [k for k in keys if ok(k)]
+    total = sum(weights[k] for k in candidates)
+    r = random.uniform(0, total)
+    acc = 0.0
+    for k in candidates:
+        acc += weights[k]
+        if acc >= r:
+            return k
+    return candidates[-1]
+
+
+def _make_sampler(strict):
+    return WeightedSampler(KEYS, weight=WEIGHTS.__getitem__, strict=strict, relaxed=lambda k: True)
+
+
+def test_same_draws_as_linear_baseline():
+    cooled = {4, 10, 22}
+    sampler = _make_sampler(lambda k: k not in cooled)
+    random.seed(1234)
+    fenwick = [sampler.sample() for _ in range(2000)]
+    random.seed(1234)
+    linear = [_linear_pick(KEYS, WEIGHTS, lambda k: k not in cooled) for _ in range(2000)]
+    assert fenwick == linear
+
+
+def test_empirical_frequencies_match_weights():
+    cooled = set()
+    sampler = _make_sampler(lambda k: k not in cooled)
+    # 部分条目进入冷却，走 refresh 的增量更新
+    cooled.update({8, 30})
+    for k in (8, 30):
+        sampler.refresh(k)
+    random.seed(20240601)
+    counts = dict.fromkeys(KEYS, 0)
+    for _ in range(DRAWS):
+        counts[sampler.sample()] += 1
+
+    total = sum(w for k, w in WEIGHTS.items() if k not in cooled)
+    for k in KEYS:
+        expected = 0.0 if k in cooled else WEIGHTS[k] / total
+        observed = counts[k] / DRAWS
+        # 每个条目的频率落在二项分布 5 个标准差之内
+        sigma = math.sqrt(expected * (1 - expected) / DRAWS)
+        assert abs(observed - expected) <= 5 * sigma + 1e-12, (k, observed, expected)
+
+
+def test_relaxed_pool_honours_exclude():
+    sampler = _make_sampler(lambda k: False)
+    random.seed(7)
+    picks = {sampler.sample(exclude=[38, 18]) for _ in range(2000)}
+    assert 38 not in picks and 18 not in picks
+    # 权重为 0 的条目不会被抽中
+    assert 12 not in picks
+
+
+def test_fenwick_find_matches_prefix_sums():
+    rng = random.Random(3)
+    weights = [rng.random() for _ in range(37)]
+    tree = FenwickTree(weights)
+    for i in range(len(weights)):
+        assert math.isclose(tree.prefix_sum(i + 1), sum(weights[:i + 1]))
+        assert tree.find(sum(weights[:i + 1]) - 1e-9) == i
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+音频条目查询基准 - 合成 1 万 / 10 万条目的音频库，测量按 id 查找、记录播放、
+按触发器随机选取、报时（含错误报时）查找的平均耗时
+
+需要能导入 PyQt6.QtMultimedia（audio_manager 依赖它）。--baseline 指定建立索引之前的版本时
+先用该版本的代码运行一次作为对比。
+
+    python tools/bench_audio_index.py [--baseline <版本>]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import bench_common
+
+SIZES = (10_000, 100_000)
+
+
+def per_call_us(fn, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def format_us(us: float) -> str:
+    return f"{us / 1000:.1f} ms" if us >= 1000 else f"{us:.1f} us"
+
+
+def bench(audio_manager, size: int, directory: str):
+    path = os.path.join(directory, f"library_{size}.json")
+    bench_common.write_library(path, bench_common.synthetic_entries(size), error_rate=0.5)
+    category = audio_manager.AudioCategory('Bench', directory, path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        category.load()
+        load_ms = (time.perf_counter() - start) * 1000
+    rng = random.Random(2)
+    ids = [f'e{rng.randrange(size)}' for _ in range(200)]
+    results = [
+        ("get_entry_by_id", per_call_us(lambda: category.get_entry_by_id(f'e{size - 1}'), 200)),
+        ("mark_played", per_call_us(lambda: category.mark_played(rng.choice(ids)), 200)),
+        ("random-by-trigger", per_call_us(lambda: category.get_random_entry_by_trigger('weather_rain'), 50)),
+        ("time_entry_with_error", per_call_us(lambda: category.get_time_entry_with_error(5, 15), 200)),
+    ]
+    print(f"{size} 个条目（加载 {load_ms:.0f} ms）:")
+    for name, us in results:
+        print(f"    {name:<24}{format_us(us)}/次")
+
+
+def main(argv):
+    baseline, argv = bench_common.split_baseline(argv)
+    if baseline is not None:
+        bench_common.run_baseline(__file__, baseline, argv)
+    bench_common.use_source()
+    try:
+        import audio_manager
+    except ImportError as e:
+        print(f"无法导入 audio_manager（需要 PyQt6.QtMultimedia）: {e}")
+        return 1
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            bench(audio_manager, size, directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+离线音频优化基准 - 生成 43 个 22.05 kHz 单声道合成音频（开头 100-400 ms 静音、音量随机），
+对比优化前后的首个有声采样时间（解码 + 开头静音）和响度分布，并测量处理耗时
+（1 个进程和全部 CPU 核心各一次）
+
+    python tools/bench_audio_optimize.py [音频数量]
+"""
+import array
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import wave
+
+import bench_common
+
+bench_common.use_source()
+import audio_optimize  # noqa: E402
+from asset_manifest import relative_key  # noqa: E402
+from pcm_cache import decode_wav  # noqa: E402
+
+RATE = 22050
+TARGET_LUFS = audio_optimize.DEFAULT_TARGET_LUFS
+SAMPLE_RATE = audio_optimize.DEFAULT_SAMPLE_RATE
+
+
+def write_clip(path: str, rng: random.Random):
+    """开头静音 + 1.5 s 变调正弦 + 0.2 s 结尾静音"""
+    lead = RATE * rng.randint(100, 400) // 1000
+    amplitude = rng.uniform(0.05, 0.9) * 32767
+    body = [int(amplitude * math.sin(2 * math.pi * (200 + 50 * (i // 2000)) * i / RATE)
+                * (0.6 + 0.4 * math.sin(i / 3000)))
+            for i in range(RATE * 3 // 2)]
+    samples = array.array('h', [0] * lead + body + [0] * (RATE // 5))
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(samples.tobytes())
+
+
+def measure(path: str):
+    """返回 (解码耗时 ms, 开头静音 ms, 积分响度 LUFS)"""
+    start = time.perf_counter()
+    clip = decode_wav(path)
+    decode_ms = (time.perf_counter() - start) * 1000
+    channels = audio_optimize._decode(bytes(clip.data), clip.sample_width, clip.channels)
+    threshold = audio_optimize._db_to_gain(audio_optimize.SILENCE_THRESHOLD_DB)
+    lead_ms = audio_optimize._audible_bounds(channels, threshold)[0] * 1000 / clip.sample_rate
+    return decode_ms, lead_ms, audio_optimize.integrated_loudness(channels, clip.sample_rate)
+
+
+def summarize(label: str, results):
+    decode_ms = statistics.mean(r[0] for r in results)
+    lead_ms = statistics.mean(r[1] for r in results)
+    loudness = [r[2] for r in results]
+    print(f"{label}: 首个有声采样 {decode_ms + lead_ms:.1f} ms（解码 {decode_ms:.2f} + 静音 {lead_ms:.1f}），"
+          f"响度 {min(loudness):.1f}..{max(loudness):.1f} LUFS（标准差 {statistics.pstdev(loudness):.2f}）")
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 43
+    rng = random.Random(1)
+    print(f"{'NumPy' if audio_optimize.np is not None else '标准库'}实现，{os.cpu_count()} 个 CPU 核心")
+    with tempfile.TemporaryDirectory() as directory:
+        assets = os.path.join(directory, "Assets")
+        audio_dir = os.path.join(assets, "Audio")
+        output_dir = os.path.join(directory, "optimized_audio")
+        os.makedirs(os.path.join(audio_dir, "Index"))
+        sources = [os.path.join(audio_dir, "Index", f"v{i:03d}.wav") for i in range(count)]
+        for path in sources:
+            write_clip(path, rng)
+
+        for workers in dict.fromkeys((1, os.cpu_count() or 1)):
+            start = time.perf_counter()
+            result = audio_optimize.optimize_assets(assets, output_dir, TARGET_LUFS, SAMPLE_RATE,
+                                                    workers=workers, force=True)
+            elapsed = time.perf_counter() - start
+            assert not result['failed'], result['failed']
+            print(f"{workers} 个进程: {result['optimized']} 个音频 {elapsed:.1f} s（{elapsed / count:.2f} s/个）")
+
+        outputs = [os.path.join(output_dir, relative_key(path, audio_dir)) for path in sources]
+        summarize("优化前", [measure(path) for path in sources])
+        summarize("优化后", [measure(path) for path in outputs])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
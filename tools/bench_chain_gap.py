@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+链式台词衔接基准 - 报时错误序列、纠正彩蛋、静音序列中，下一段实际开始时间与
+“上一段结束 + 预期延迟”之差；分别用单个播放器（每段都冷加载）和播放器池（预加载）测量
+
+媒体加载耗时取决于平台的多媒体后端，为了得到可重复的数据，播放器换成加载固定耗时、
+播放固定时长的模拟播放器（其余部分与程序相同）。需要能导入 PyQt6.QtMultimedia。
+
+    python tools/bench_chain_gap.py [加载耗时ms]
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+from functools import partial
+
+import bench_common
+
+bench_common.use_source()
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QObject, QTimer, QUrl, pyqtSignal  # noqa: E402
+
+CLIP_MS = 150
+DELAY_MS = 30
+ROUNDS = 5
+EVENTS = []  # (start/end, 文件名, perf_counter)
+
+
+def simulated_player_class(media_player, load_ms: int):
+    """加载 load_ms、播放 CLIP_MS 的 QMediaPlayer 替身，状态值使用 Qt 的枚举"""
+    status = media_player.MediaStatus
+    playing = media_player.PlaybackState.PlayingState
+    stopped = media_player.PlaybackState.StoppedState
+
+    class SimulatedPlayer(QObject):
+        mediaStatusChanged = pyqtSignal(object)
+        playbackStateChanged = pyqtSignal(object)
+        errorOccurred = pyqtSignal(object, str)
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self._source = QUrl()
+            self._loaded = False
+            self._pending = False
+            self._state = stopped
+            self._generation = 0
+
+        def setAudioOutput(self, output):
+            pass
+
+        def source(self):
+            return self._source
+
+        def setSource(self, url):
+            if url == self._source:
+                return
+            self.stop()
+            self._source = url
+            self._loaded = False
+            self._generation += 1
+            self.mediaStatusChanged.emit(status.LoadingMedia)
+            QTimer.singleShot(load_ms, partial(self._on_loaded, self._generation))
+
+        def _on_loaded(self, generation: int):
+            if generation != self._generation:
+                return
+            self._loaded = True
+            self.mediaStatusChanged.emit(status.LoadedMedia)
+            if self._pending:
+                self._pending = False
+                self._begin()
+
+        def play(self):
+            if self._loaded:
+                self._begin()
+            else:
+                self._pending = True
+
+        def _begin(self):
+            self._generation += 1
+            self._state = playing
+            EVENTS.append(('start', os.path.basename(self._source.toLocalFile()), time.perf_counter()))
+            self.playbackStateChanged.emit(playing)
+            QTimer.singleShot(CLIP_MS, partial(self._on_end, self._generation))
+
+        def _on_end(self, generation: int):
+            if generation != self._generation:
+                return
+            self._state = stopped
+            EVENTS.append(('end', os.path.basename(self._source.toLocalFile()), time.perf_counter()))
+            self.playbackStateChanged.emit(stopped)
+            self.mediaStatusChanged.emit(status.EndOfMedia)
+
+        def stop(self):
+            self._pending = False
+            if self._state == playing:
+                self._generation += 1
+                self._state = stopped
+                self.playbackStateChanged.emit(stopped)
+
+        def playbackState(self):
+            return self._state
+
+    return SimulatedPlayer
+
+
+class SimulatedOutput(QObject):
+    def setVolume(self, volume: float):
+        pass
+
+    def setMuted(self, muted: bool):
+        pass
+
+
+def write_assets(assets: str):
+    for sub in ('Audio/Index', 'Audio/TimeAnnounce/Error', 'Audio/TimeAnnounce/Correct', 'Library'):
+        os.makedirs(os.path.join(assets, sub))
+    for name in ('Index/e.wav', 'Index/c.wav', 'Index/m1.wav', 'Index/m2.wav', 'TimeAnnounce/Error/12_error_01.wav',
+                 'TimeAnnounce/Error/12_error_02.wav', 'TimeAnnounce/Correct/12.wav'):
+        with wave.open(os.path.join(assets, 'Audio', name), 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(b'\0\0' * 800)
+    libraries = {
+        'idle': {'correction_delay_ms': DELAY_MS, 'entries': [
+            {'id': 'e', 'filename': 'e.wav', 'is_error': True, 'correction_filename': 'c.wav',
+             'correction_text': 'c'}]},
+        'system': {'entries': [
+            {'id': 'Mute-1', 'filename': 'm1.wav', 'trigger': 'mute_on'},
+            {'id': 'Mute-2', 'filename': 'm2.wav', 'trigger': 'mute_on'}]},
+        'timeannounce': {'error_rate': 1.0, 'correction_delay_ms': DELAY_MS, 'entries': [
+            {'id': '12_error_01', 'filename': 'Error/12_error_01.wav', 'hour': 12, 'minute': 0, 'is_error': True},
+            {'id': '12_error_02', 'filename': 'Error/12_error_02.wav', 'hour': 12, 'minute': 0, 'is_error': True},
+            {'id': '12', 'filename': 'Correct/12.wav', 'hour': 12, 'minute': 0}]},
+    }
+    for name, library in libraries.items():
+        with open(os.path.join(assets, 'Library', f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(library, f)
+
+
+def wait_chain(manager, timeout_ms: int = 3000):
+    """等到整段链式播放结束"""
+    loop = QEventLoop()
+
+    def on_finished():
+        if manager._current_entry is None:
+            loop.quit()
+    manager.audio_finished.connect(on_finished)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    manager.audio_finished.disconnect(on_finished)
+
+
+def run(audio_manager, player_pool, assets: str, pool_size: int):
+    audio_manager.PlayerPool = partial(player_pool.PlayerPool, pool_size)
+    manager = audio_manager.AudioManager(assets, pcm_cache_bytes=0, library_cache_path=None,
+                                         asset_manifest_path=None, journal_dir=None,
+                                         audio_bank_path=None, optimized_dir=None)
+    manager.initialize()
+    # 静音序列由界面在 audio_finished 中接着播放（与 FlowerWidget 相同）
+    mute_queue = []
+
+    def on_finished():
+        if mute_queue:
+            entry = mute_queue.pop(0)
+            manager.play_entry_quiet('System', entry)
+    manager.audio_finished.connect(on_finished)
+
+    gaps = {'错误报时': [], '纠正彩蛋': [], '静音序列': []}
+    for _ in range(ROUNDS):
+        for kind in gaps:
+            EVENTS.clear()
+            delay = DELAY_MS
+            if kind == '错误报时':
+                manager.play_time(12, 0)
+            elif kind == '纠正彩蛋':
+                manager.play_specific('Idle', 'e')
+            else:
+                delay = 0
+                first, second = sorted(manager.categories['System'].get_entries_by_trigger('mute_on'),
+                                       key=lambda e: e.id)
+                mute_queue.append(second)
+                manager.play_entry_quiet('System', first)
+                manager.prime_entry('System', second)
+            wait_chain(manager)
+            mute_queue.clear()
+            starts = [e for e in EVENTS if e[0] == 'start']
+            ends = [e for e in EVENTS if e[0] == 'end']
+            assert len(starts) == 2 and ends, EVENTS
+            gaps[kind].append((starts[1][2] - ends[0][2]) * 1000 - delay)
+    manager.shutdown()
+    return {kind: sum(values) / len(values) for kind, values in gaps.items()}, manager._players
+
+
+def main(argv):
+    load_ms = int(argv[0]) if argv else 60
+    try:
+        from PyQt6.QtMultimedia import QMediaPlayer
+        import audio_manager
+        import player_pool
+    except ImportError as e:
+        print(f"无法导入 PyQt6.QtMultimedia: {e}")
+        return 1
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    player_pool.QMediaPlayer = simulated_player_class(QMediaPlayer, load_ms)
+    player_pool.QAudioOutput = SimulatedOutput
+    print(f"模拟加载 {load_ms} ms，每段 {CLIP_MS} ms，各 {ROUNDS} 轮；间隔 = 下一段开始 - 上一段结束 - 预期延迟")
+    with tempfile.TemporaryDirectory() as directory:
+        assets = os.path.join(directory, 'Assets')
+        write_assets(assets)
+        for label, size in (("单个播放器", 1), ("播放器池", 2)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                gaps, players = run(audio_manager, player_pool, assets, size)
+            print(f"{label}: " + "，".join(f"{kind} +{gap:.1f} ms" for kind, gap in gaps.items())
+                  + f"（预加载命中 {players.primed_hits}，冷加载 {players.cold_loads}）")
+    app.processEvents()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+最近城市查询基准 - k-d 树与逐个计算球面距离的线性扫描对比（先核对两者结果一致）
+
+分别使用自带的城市表和随机生成的 5 万个点（写入临时城市表文件）。
+
+    python tools/bench_city_index.py [查询次数]
+"""
+import contextlib
+import io
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from city_index import DEFAULT_CITY_FILE, CityIndex  # noqa: E402
+
+# 查询范围：中国大致的经纬度
+LNG_RANGE = (75.0, 134.0)
+LAT_RANGE = (18.0, 53.0)
+SYNTHETIC_POINTS = 50000
+CHECK_QUERIES = 100
+LINEAR_QUERIES = 50
+
+
+def linear_nearest(index: CityIndex, lng: float, lat: float) -> str:
+    """逐个计算半正矢距离"""
+    coords = index.coords
+    best, best_a = -1, math.inf
+    phi = math.radians(lat)
+    for i in range(len(index.names)):
+        phi2 = math.radians(coords[i * 2 + 1])
+        a = (math.sin((phi2 - phi) / 2) ** 2
+             + math.cos(phi) * math.cos(phi2) * math.sin(math.radians(coords[i * 2] - lng) / 2) ** 2)
+        if a < best_a:
+            best, best_a = i, a
+    return index.names[best]
+
+
+def bench(label: str, index: CityIndex, queries, linear_queries: int):
+    with contextlib.redirect_stdout(io.StringIO()):
+        index.get('')
+    start = time.perf_counter()
+    index.nearest(*queries[0])
+    build_ms = (time.perf_counter() - start) * 1000
+    for lng, lat in queries[:CHECK_QUERIES]:
+        assert index.nearest(lng, lat)[0] == linear_nearest(index, lng, lat), (lng, lat)
+
+    start = time.perf_counter()
+    for lng, lat in queries[:linear_queries]:
+        linear_nearest(index, lng, lat)
+    linear_us = (time.perf_counter() - start) / linear_queries * 1e6
+    start = time.perf_counter()
+    for lng, lat in queries:
+        index.nearest(lng, lat)
+    kd_us = (time.perf_counter() - start) / len(queries) * 1e6
+    linear_text = f"{linear_us / 1000:.1f} ms" if linear_us >= 1000 else f"{linear_us:.0f} us"
+    print(f"{label:>12}: 线性 {linear_text}/次，k-d 树 {kd_us:.0f} us/次（建树 {build_ms:.0f} ms）")
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 2000
+    rng = random.Random(1)
+    queries = [(rng.uniform(*LNG_RANGE), rng.uniform(*LAT_RANGE)) for _ in range(count)]
+
+    shipped = CityIndex(os.path.join(ROOT, DEFAULT_CITY_FILE))
+    bench(f"{len(shipped)} 个城市", shipped, queries, count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cities.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(SYNTHETIC_POINTS):
+                f.write(f"p{i}\t{rng.uniform(*LNG_RANGE):.4f}\t{rng.uniform(*LAT_RANGE):.4f}\n")
+        bench(f"{SYNTHETIC_POINTS} 个点", CityIndex(path), queries, LINEAR_QUERIES)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
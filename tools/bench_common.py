@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+基准脚本共用 - 选择被测代码（当前工作区或某个 git 版本）并生成合成音频库
+
+带 --baseline <版本> 运行基准脚本时，先把该版本（任意 git 版本名，如提交号、标签、HEAD~3）的代码
+导出到临时目录，用它重新运行同一个脚本（即优化前的数据），再用当前代码运行一次。
+"""
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 被测代码目录（--baseline 时由父进程设置为导出的旧版本）
+SOURCE_ENV = "TALKINGFLOWER_BENCH_SOURCE"
+
+TRIGGERS = ['random', 'double_click', 'on_start', 'on_exit', 'mute_on', 'mute_off', 'weather_rain',
+            'weather_sunny', 'cpu_temp>65', 'cpu_temp<35', 'time_morning', 'time_noon']
+
+
+def use_source() -> str:
+    """把被测代码目录放到 sys.path 最前面，返回该目录"""
+    source = os.environ.get(SOURCE_ENV, ROOT)
+    sys.path.insert(0, source)
+    return source
+
+
+def split_baseline(argv: List[str]) -> Tuple[Optional[str], List[str]]:
+    """取出 --baseline <版本>，没有该参数时版本为 None"""
+    rest = list(argv)
+    if "--baseline" not in rest:
+        return None, rest
+    i = rest.index("--baseline")
+    if i + 1 >= len(rest) or rest[i + 1].startswith("-"):
+        raise SystemExit("--baseline 需要指定 git 版本，例如 --baseline HEAD~1")
+    revision = rest.pop(i + 1)
+    rest.pop(i)
+    return revision, rest
+
+
+def run_baseline(script: str, revision: str, argv: List[str]) -> int:
+    """在导出的 revision 代码上运行 script（当前版本的脚本文件）"""
+    archive = subprocess.run(['git', '-C', ROOT, 'archive', '--format=tar', revision],
+                             check=True, capture_output=True).stdout
+    with tempfile.TemporaryDirectory() as directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(directory, filter='data')
+        print(f"=== 基准版本 {revision} ===", flush=True)
+        env = dict(os.environ, **{SOURCE_ENV: directory})
+        code = subprocess.run([sys.executable, os.path.abspath(script)] + argv, env=env).returncode
+    print("=== 当前代码 ===", flush=True)
+    return code
+
+
+def synthetic_entries(count: int, seed: int = 1) -> List[dict]:
+    """合成条目：触发器轮流取 TRIGGERS，每 20 条一个报时条目，其中三分之一为错误报时"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        entry = {'id': f'e{i}', 'filename': f'e{i}.wav', 'trigger': TRIGGERS[i % len(TRIGGERS)],
+                 'weight': rng.randint(1, 20)}
+        if i % 20 == 0:
+            entry.update(hour=(i // 20) % 24, minute=((i // 480) % 4) * 15)
+            if i % 60 == 0:
+                entry.update(is_error=True, id=f'time_{i}_error_0{1 + (i // 60) % 2}')
+        entries.append(entry)
+    return entries
+
+
+def write_library(path: str, entries: List[dict], **fields):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(fields, entries=entries), f, ensure_ascii=False)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+HttpClient 基准 - 本地 HTTPS 桩服务器返回约 16KB 的 JSON（支持 gzip 和 ETag），
+比较每次新建连接的 urllib 与复用连接、条件请求的 HttpClient
+
+证书用 openssl 临时生成；没有 openssl 时退回明文 HTTP（没有 TLS 握手，差距会变小）。
+
+    python tools/bench_http_client.py [请求次数]
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_client import HttpClient  # noqa: E402
+
+PAYLOAD = json.dumps({
+    'status': 'ok',
+    'result': {'realtime': {'temperature': 21}},
+    'pad': [{'k': 'v' * 20, 'n': i} for i in range(400)],
+}).encode('utf-8')
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = PAYLOAD
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compressed:
+            body = gzip.compress(PAYLOAD)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _self_signed_cert(directory: str):
+    """用 openssl 生成自签名证书，失败时返回 None"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                       check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return cert, key
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 30
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    client_context = ssl.create_default_context()
+    client_context.check_hostname = False
+    client_context.verify_mode = ssl.CERT_NONE
+    with tempfile.TemporaryDirectory() as directory:
+        cert = _self_signed_cert(directory)
+        if cert is not None:
+            server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            server_context.load_cert_chain(*cert)
+            server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    scheme = 'https' if cert is not None else 'http'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"{scheme}://127.0.0.1:{server.server_port}/v2.6/KEY/1,2/weather"
+    print(f"桩服务器: {scheme}，响应 {len(PAYLOAD)} B，{count} 次请求")
+
+    start = time.perf_counter()
+    urllib_bytes = 0
+    for _ in range(count):
+        request = urllib.request.Request(url)
+        with urllib.request.urlopen(request, context=client_context if cert else None) as response:
+            urllib_bytes += len(response.read())
+    urllib_ms = (time.perf_counter() - start) / count * 1000
+
+    client = HttpClient(ssl_context=client_context)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        client.get_json(url)
+        first_ms = (time.perf_counter() - start) * 1000
+        warm_start = time.perf_counter()
+        for _ in range(count - 1):
+            client.get_json(url)
+        end = time.perf_counter()
+    client.close()
+    server.shutdown()
+    warm_ms = (end - warm_start) / max(1, count - 1) * 1000
+    average_ms = (end - start) / count * 1000
+    stats = client.stats
+
+    print(f"urllib（每次新建连接）: {urllib_ms:.2f} ms/次，传输 {urllib_bytes // count} B/次")
+    print(f"HttpClient: 首次 {first_ms:.2f} ms，之后 {warm_ms:.2f} ms/次（平均 {average_ms:.2f} ms/次）")
+    print(f"  复用连接 {stats['reused_connections']}/{stats['requests']}，304 {stats['not_modified']} 次，"
+          f"共传输 {stats['wire_bytes']} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+音频库编译缓存基准 - 四个合成音频库文件（每个 1 千 / 2.5 万 / 10 万条目）以及自带的
+音频库，分别测量解析 JSON 并建索引、命中缓存、只改了修改时间（校验哈希）三种情况的
+加载耗时（各取 3 次中最快的一次），并核对缓存结果与重新解析的结果一致
+
+需要能导入 PyQt6.QtMultimedia（audio_manager 依赖它）。
+
+    python tools/bench_library_cache.py
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import bench_common
+
+SIZES = (1000, 25_000, 100_000)
+NAMES = ['idle', 'system', 'doubleclick', 'timeannounce']
+REPEAT = 3
+
+
+def synthetic_library(count: int, prefix: str, rng: random.Random) -> dict:
+    entries = []
+    for i in range(count):
+        entries.append({
+            'id': f'{prefix}_{i:06d}' + ('_error_01' if i % 50 == 0 else ''),
+            'text': '你好世界' * rng.randint(2, 10),
+            'filename': f'{prefix}_{i % 400}.wav',
+            'trigger': rng.choice(['idle', 'click', 'on_start', 'double_click', 'weather_rain']),
+            'weight': rng.randint(1, 30),
+            'cooldown_minutes': rng.choice([0, 5]),
+            'hour': i % 24, 'minute': 0,
+            'is_error': i % 50 == 0,
+        })
+    return {'description': prefix, 'error_rate': 0.1, 'entries': entries}
+
+
+def load_all(audio_manager, library_cache, directory: str, cache_path=None):
+    """加载目录下的四个音频库文件，返回 (耗时 ms, 分类列表, 缓存)"""
+    cache = library_cache.LibraryCache(cache_path) if cache_path else None
+    start = time.perf_counter()
+    categories = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in NAMES:
+            category = audio_manager.AudioCategory(name, directory, os.path.join(directory, f"{name}.json"))
+            category.load(cache)
+            categories.append(category)
+    if cache is not None:
+        cache.save()
+    return (time.perf_counter() - start) * 1000, categories, cache
+
+
+def check_same(parsed, cached):
+    for a, b in zip(parsed, cached):
+        assert a._by_id == b._by_id and a._time_table == b._time_table, a.name
+        assert ({k: list(v) for k, v in a._by_trigger.items()}
+                == {k: list(v) for k, v in b._by_trigger.items()}), a.name
+        assert ([(e.id, e.text, e.weight, e.filename) for e in a.entries]
+                == [(e.id, e.text, e.weight, e.filename) for e in b.entries]), a.name
+
+
+def bench(audio_manager, library_cache, label: str, directory: str):
+    cache_path = os.path.join(directory, "library.pickle")
+    parse_ms = min(load_all(audio_manager, library_cache, directory)[0] for _ in range(REPEAT))
+    load_all(audio_manager, library_cache, directory, cache_path)
+    cached_ms = min(load_all(audio_manager, library_cache, directory, cache_path)[0] for _ in range(REPEAT))
+    check_same(load_all(audio_manager, library_cache, directory)[1],
+               load_all(audio_manager, library_cache, directory, cache_path)[1])
+    touched = []
+    for _ in range(REPEAT):
+        for name in NAMES:
+            os.utime(os.path.join(directory, f"{name}.json"))
+        elapsed, _categories, cache = load_all(audio_manager, library_cache, directory, cache_path)
+        assert cache.hits == len(NAMES), cache.hits
+        touched.append(elapsed)
+    print(f"{label:>14}: 解析+建索引 {parse_ms:8.1f} ms，命中缓存 {cached_ms:7.2f} ms，"
+          f"仅修改时间变化 {min(touched):7.1f} ms（缓存 {os.path.getsize(cache_path) / 1e6:.1f} MB）")
+
+
+def main(argv):
+    source = bench_common.use_source()
+    try:
+        import audio_manager
+        import library_cache
+    except ImportError as e:
+        print(f"无法导入 audio_manager（需要 PyQt6.QtMultimedia）: {e}")
+        return 1
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        for count in SIZES:
+            sub = os.path.join(directory, str(count))
+            os.mkdir(sub)
+            for name in NAMES:
+                with open(os.path.join(sub, f"{name}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(synthetic_library(count, name, rng), f, ensure_ascii=False)
+            bench(audio_manager, library_cache, f"{count} 条/文件 x4", sub)
+            shutil.rmtree(sub)
+        shipped = os.path.join(directory, "shipped")
+        shutil.copytree(os.path.join(source, "Assets", "Library"), shipped)
+        bench(audio_manager, library_cache, "自带音频库", shipped)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+音频库内存基准 - 用 tracemalloc 统计 10 万条目的合成音频库加载后、首次抽取后
+占用的内存，以及抽取并记录播放一次的平均耗时
+
+需要能导入 PyQt6.QtMultimedia（audio_manager 依赖它）。--baseline 指定列式存储之前（或建立索引之前）
+的版本时先用该版本的代码运行一次作为对比。
+
+    python tools/bench_library_memory.py [条目数] [--baseline <版本>]
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import bench_common
+
+PICKS = 200
+
+
+def synthetic_entries(count: int):
+    """带台词文本和时长、文件名大量重复的条目（接近真实音频库的字段构成）"""
+    triggers = ['random', 'double_click', 'weather_rain', 'on_start']
+    entries = []
+    for i in range(count):
+        entry = {'id': f'idle_{i:06d}', 'filename': f'Idle-{i % 500}.wav', 'text': f'台词{i}',
+                 'trigger': triggers[i % 4], 'weight': 10, 'duration_ms': 2000 + i % 900}
+        if i % 10 == 0:
+            entry.update(hour=i % 24, minute=0)
+        entries.append(entry)
+    return entries
+
+
+def main(argv):
+    baseline, argv = bench_common.split_baseline(argv)
+    if baseline is not None:
+        bench_common.run_baseline(__file__, baseline, argv)
+    count = int(argv[0]) if argv else 100_000
+    bench_common.use_source()
+    try:
+        import audio_manager
+    except ImportError as e:
+        print(f"无法导入 audio_manager（需要 PyQt6.QtMultimedia）: {e}")
+        return 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "library.json")
+        bench_common.write_library(path, synthetic_entries(count))
+        gc.collect()
+        tracemalloc.start()
+        category = audio_manager.AudioCategory('Idle', directory, path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            category.load()
+        gc.collect()
+        loaded, load_peak = tracemalloc.get_traced_memory()
+        category.mark_played(category.get_random_entry().id)
+        category.get_random_entry_by_trigger('random')
+        gc.collect()
+        sampled, sample_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(PICKS):
+            category.mark_played(category.get_random_entry().id)
+        pick_us = (time.perf_counter() - start) / PICKS * 1e6
+
+    print(f"{count} 个条目: 加载后 {loaded / 1e6:.1f} MB（{loaded / count:.0f} B/条），"
+          f"首次抽取后 {sampled / 1e6:.1f} MB，峰值 {max(load_peak, sample_peak) / 1e6:.1f} MB；"
+          f"抽取+记录播放 {pick_us:.0f} us/次")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+播放日志基准 - 模拟一年的播放记录（365 天 x 每天 200 次，300 个条目），对比定期压缩
+与从不压缩时每条记录的写入耗时、重启恢复耗时和占用的磁盘空间，并核对两者恢复出的状态一致
+
+记录数取 73000 - 1，压缩时日志里留下 999 行，是恢复最慢的情况。
+
+    python tools/bench_play_journal.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import bench_common
+
+bench_common.use_source()
+import play_journal  # noqa: E402
+
+DAYS = 365
+PER_DAY = 200
+IDS = 300
+REPEAT = 5
+
+
+def simulated_events():
+    rng = random.Random(1)
+    start = time.time() - DAYS * 86400
+    events = []
+    for day in range(DAYS):
+        for k in range(PER_DAY):
+            events.append((start + day * 86400 + 8 * 3600 + k * 60,
+                           rng.choice(['Idle', 'Idle', 'Idle', 'System', 'DoubleClick']),
+                           f'e{rng.randrange(IDS)}'))
+    return events[:-1]
+
+
+def write(directory: str, events, compact_events: int) -> float:
+    """写入全部记录，返回每条的平均耗时（us）"""
+    default = play_journal.COMPACT_EVENTS
+    play_journal.COMPACT_EVENTS = compact_events
+    try:
+        journal = play_journal.PlayJournal(directory)
+        start = time.perf_counter()
+        for timestamp, category, entry_id in events:
+            journal.record(category, entry_id, timestamp)
+        elapsed = time.perf_counter() - start
+        journal.close()
+    finally:
+        play_journal.COMPACT_EVENTS = default
+    return elapsed / len(events) * 1e6
+
+
+def recover(directory: str):
+    """返回 (最快的恢复耗时 ms, 重放的记录数, 恢复出的日志)"""
+    best = None
+    for _ in range(REPEAT):
+        journal = play_journal.PlayJournal(directory)
+        start = time.perf_counter()
+        replayed = journal.load()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, replayed, journal
+
+
+def recent_state(journal):
+    """保留期内的状态（压缩时会丢弃保留期之前的 last_played）"""
+    cutoff = time.time() - play_journal.RETENTION_SECONDS
+    return {name: ({i: t for i, t in state.last_played.items() if t >= cutoff}, state.recent)
+            for name, state in journal.states.items()}
+
+
+def disk_kb(directory: str) -> float:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) / 1024
+
+
+def main(argv):
+    events = simulated_events()
+    print(f"{len(events)} 条记录 / {DAYS} 天")
+    states = []
+    with tempfile.TemporaryDirectory() as directory:
+        for label, compact_events in (("定期压缩", play_journal.COMPACT_EVENTS), ("从不压缩", len(events) + 1)):
+            path = os.path.join(directory, str(compact_events))
+            record_us = write(path, events, compact_events)
+            recover_ms, replayed, journal = recover(path)
+            states.append(recent_state(journal))
+            print(f"{label}: 写入 {record_us:.0f} us/条，恢复 {recover_ms:.1f} ms（重放 {replayed} 条），"
+                  f"磁盘 {disk_kb(path):.0f} KB")
+    print(f"恢复出的状态一致: {states[0] == states[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
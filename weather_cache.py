@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+天气缓存 - 按 (数据源, 城市/坐标, 接口) 持久化天气数据，支持按接口设置过期时间
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+# 各接口的缓存有效期（秒）
+DEFAULT_TTLS = {
+    'weather': 10 * 60,    # 彩云合并接口
+    'realtime': 10 * 60,   # 彩云实况
+    'daily': 3 * 3600,     # 彩云生活指数
+    'j1': 30 * 60,         # wttr.in
+}
+
+
+class WeatherCache:
+    """磁盘天气缓存（线程安全，原子写入）"""
+    def __init__(self, path: str = "cache/weather.json", ttls: Optional[dict] = None):
+        self.path = Path(path)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries: dict = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(provider: str, location: str, endpoint: str) -> str:
+        return f"{provider}|{location}|{endpoint}"
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"[WeatherCache] 读取缓存失败，已忽略: {e}")
+            self._entries = {}
+
+    def _save(self):
+        """原子写入：先写临时文件再替换"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[WeatherCache] 写入缓存失败: {e}")
+
+    def lookup(self, provider: str, location: str, endpoint: str) -> Tuple[Optional[dict], bool]:
+        """查询缓存
+
+        Returns:
+            (数据 or None, 是否仍在有效期内)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            item = self._entries.get(self._make_key(provider, location, endpoint))
+        if not item:
+            return None, False
+        age = time.time() - item.get('stored_at', 0)
+        ttl = self.ttls.get(endpoint, 0)
+        return item.get('data'), 0 <= age < ttl
+
+    def _prune(self, now: float):
+        """删除超过最长有效期的条目（切换过的城市、不再使用的接口），避免文件无限增长"""
+        max_age = max(self.ttls.values(), default=0)
+        stale = [key for key, item in self._entries.items()
+                 if not 0 <= now - item.get('stored_at', 0) < max_age]
+        for key in stale:
+            del self._entries[key]
+
+    def put(self, provider: str, location: str, endpoint: str, data: dict):
+        """写入缓存并落盘（同时清理过期太久的条目）"""
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            self._prune(now)
+            self._entries[self._make_key(provider, location, endpoint)] = {
+                'stored_at': now,
+                'data': data,
+            }
+            self._save()
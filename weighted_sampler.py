@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+加权随机抽样 - 用树状数组（Fenwick 树）维护可选条目的权重前缀和，
+条目进出冷却时增量更新，每次抽样 O(log n)
+"""
+import random
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional, Sequence
+
+
+class FenwickTree:
+    """树状数组：单点加、前缀和、按累计权重定位"""
+    def __init__(self, weights: Sequence[float]):
+        self._size = len(weights)
+        self._tree = array('d', [0.0])
+        self._tree.extend(weights)
+        # O(n) 建树
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[i]
+        self._top = 1
+        while self._top * 2 <= self._size:
+            self._top *= 2
+
+    def add(self, index: int, delta: float):
+        i = index + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def total(self) -> float:
+        return self.prefix_sum(self._size)
+
+    def prefix_sum(self, count: int) -> float:
+        """前 count 个元素之和"""
+        result = 0.0
+        i = count
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, target: float) -> int:
+        """最小的下标 i 使前 i+1 个元素之和 >= target；target 超过总和时返回 size"""
+        pos = 0
+        step = self._top if self._size else 0
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] < target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step //= 2
+        return pos
+
+
+class WeightedSampler:
+    """在一组升序整数 key（如条目行号）上按权重抽样，条目分“严格可选”和“放宽可选”两级
+
+    weight/strict/relaxed 由调用方按 key 提供，状态变化后调用 refresh(key) 增量更新。
+    抽样结果与按 key 顺序线性累加权重、取第一个累计值 >= r 的条目完全一致。
+    """
+    def __init__(self, keys: Sequence[int], weight: Callable[[int], float],
+                 strict: Callable[[int], bool], relaxed: Callable[[int], bool]):
+        self.keys = keys
+        self._weights = array('d', (weight(k) for k in keys))
+        self._strict_fn = strict
+        self._relaxed_fn = relaxed
+        self._strict = bytearray(1 if strict(k) else 0 for k in keys)
+        self._relaxed = bytearray(1 if relaxed(k) else 0 for k in keys)
+        self._strict_count = sum(self._strict)
+        self._relaxed_count = sum(self._relaxed)
+        self._strict_tree = FenwickTree([w if ok else 0.0 for w, ok in zip(self._weights, self._strict)])
+        self._relaxed_tree = FenwickTree([w if ok else 0.0 for w, ok in zip(self._weights, self._relaxed)])
+
+    def _position(self, key: int) -> int:
+        """key 在序列中的位置，不存在返回 -1"""
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    def refresh(self, key: int):
+        """重新计算某个 key 的可选状态"""
+        i = self._position(key)
+        if i < 0:
+            return
+        strict = 1 if self._strict_fn(key) else 0
+        if strict != self._strict[i]:
+            self._strict[i] = strict
+            self._strict_count += 1 if strict else -1
+            self._strict_tree.add(i, self._weights[i] if strict else -self._weights[i])
+        relaxed = 1 if self._relaxed_fn(key) else 0
+        if relaxed != self._relaxed[i]:
+            self._relaxed[i] = relaxed
+            self._relaxed_count += 1 if relaxed else -1
+            self._relaxed_tree.add(i, self._weights[i] if relaxed else -self._weights[i])
+
+    def sample(self, exclude: Iterable[int] = ()) -> Optional[int]:
+        """先在严格可选条目中抽样；没有时在放宽可选条目中（排除 exclude）抽样，返回 key"""
+        if self._strict_count > 0:
+            return self._pick(self._strict_tree, self._strict)
+        excluded = [i for i in (self._position(k) for k in exclude) if i >= 0 and self._relaxed[i]]
+        if self._relaxed_count - len(excluded) <= 0:
+            return None
+        # 临时去掉被排除条目的权重
+        for i in excluded:
+            self._relaxed[i] = 0
+            self._relaxed_tree.add(i, -self._weights[i])
+        try:
+            return self._pick(self._relaxed_tree, self._relaxed)
+        finally:
+            for i in excluded:
+                self._relaxed[i] = 1
+                self._relaxed_tree.add(i, self._weights[i])
+
+    def _pick(self, tree: FenwickTree, mask: bytearray) -> int:
+        total = tree.total()
+        if total <= 0:
+            # 权重全为 0 时原逻辑选第一个可选条目
+            return self.keys[mask.index(1)]
+        r = random.uniform(0, total)
+        if r <= 0:
+            return self.keys[mask.index(1)]
+        index = tree.find(r)
+        if index >= len(mask) or not mask[index]:
+            # 浮点误差导致越界时与原逻辑一样取最后一个可选条目
+            index = mask.rindex(1)
+        return self.keys[index]